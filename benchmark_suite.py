@@ -0,0 +1,196 @@
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lcom_benchmark import synthetic_metrics
+from profiling import start_profiling, stop_profiling
+
+DEFAULT_MODULES = [1_000, 10_000]
+DEFAULT_ROWS = [100_000, 1_000_000]
+DEFAULT_FILES = [200, 2_000]
+
+def synthetic_pydeps(path, modules, avg_imports=4.0, cycle_fraction=0.05, cycle_length=4, seed=0):
+    # A pydeps-format dump of `modules` modules spread over packages. Imports
+    # point at earlier modules only (a layered, acyclic graph with about
+    # `avg_imports` edges per module); then rings of `cycle_length` modules
+    # are added until roughly `cycle_fraction` of all modules sit on a cycle.
+    # Returns the number of import edges written.
+    rng = np.random.default_rng(seed)
+    names = [f"bench.pkg{i // 50}.sub{(i // 10) % 5}.module{i}" for i in range(modules)]
+    imports = [set() for _ in range(modules)]
+    for i in range(1, modules):
+        for j in rng.integers(0, i, rng.poisson(avg_imports)).tolist():
+            imports[i].add(j)
+    if cycle_length > 1 and modules >= cycle_length:
+        for _ in range(int(modules * cycle_fraction) // cycle_length):
+            ring = rng.choice(modules, cycle_length, replace=False).tolist()
+            for a, b in zip(ring, ring[1:] + ring[:1]):
+                imports[a].add(b)
+    imported_by = [[] for _ in range(modules)]
+    for i, targets in enumerate(imports):
+        for j in targets:
+            imported_by[j].append(names[i])
+
+    # Written one module at a time; the dump can be much larger than the sets
+    with open(path, 'w') as out:
+        out.write('{\n')
+        for i, name in enumerate(names):
+            entry = {
+                'bacon': 1,
+                'imported_by': imported_by[i],
+                'imports': [names[j] for j in sorted(imports[i])],
+                'name': name,
+                'path': '/bench/' + name.replace('.', '/') + '.py',
+            }
+            out.write(f"{json.dumps(name)}: {json.dumps(entry)}{',' if i + 1 < modules else ''}\n")
+        out.write('}\n')
+    return sum(len(targets) for targets in imports)
+
+def synthetic_java_tree(root, files, fields=8, methods=10, seed=0):
+    # `files` Java classes under root, 40 per package. Each method reads a
+    # random subset of the fields and sometimes calls another method, so the
+    # LCOM values range from fully cohesive to fully split classes.
+    rng = np.random.default_rng(seed)
+    for f in range(files):
+        package = f"org.bench.p{f // 40}"
+        directory = os.path.join(root, *package.split('.'))
+        os.makedirs(directory, exist_ok=True)
+        lines = [f"package {package};", "", f"public class Type{f} {{"]
+        lines.extend(f"    private int f{k};" for k in range(fields))
+        for m in range(methods):
+            used = rng.choice(fields, rng.integers(0, min(fields, 4) + 1), replace=False).tolist() if fields else []
+            body = ' + '.join(f"f{k}" for k in sorted(used)) or '0'
+            lines.append("")
+            lines.append(f"    public int m{m}(int x) {{")
+            if m and rng.random() < 0.2:
+                lines.append(f"        x += m{rng.integers(0, m)}(x);")
+            lines.append(f"        return x + {body};")
+            lines.append("    }")
+        lines.append("}")
+        with open(os.path.join(directory, f"Type{f}.java"), 'w') as out:
+            out.write('\n'.join(lines) + '\n')
+
+def _dependency_analyzer():
+    # dependency-analyzer.py isn't an importable module name
+    here = os.path.dirname(os.path.abspath(__file__))
+    spec = importlib.util.spec_from_file_location('dependency_analyzer', os.path.join(here, 'dependency-analyzer.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def _analyze_dependencies(path):
+    analyzer = _dependency_analyzer()
+    graph, fan_in, fan_out, _, _, _ = analyzer.analyze_dependencies(path, use_cache=False, top=20)
+    analyzer.impact_assessment(graph, fan_in, fan_out)
+
+def _analyze_lcom_results(path):
+    from lcom_analyzer import analyze_lcom_results
+    analyze_lcom_results(os.path.dirname(path), plots=False)
+
+def _compute_lcom(path):
+    # Writes the results next to the tree, as input for generate_lcom_table
+    from lcom_engine import compute_lcom
+    compute_lcom(path, workers=1).to_csv(os.path.join(os.path.dirname(path), 'lcom_results.csv'), index=False)
+
+def _generate_lcom_table(path):
+    from lcom_table_generator import generate_lcom_table, load_lcom_results
+    src_root = os.path.dirname(path)
+    generate_lcom_table(load_lcom_results(path), os.path.join(src_root, 'src'), os.path.join(src_root, 'lcom_table.md'))
+
+CASES = {
+    'analyze_dependencies': _analyze_dependencies,
+    'analyze_lcom_results': _analyze_lcom_results,
+    'compute_lcom': _compute_lcom,
+    'generate_lcom_table': _generate_lcom_table,
+}
+
+def run_case(case, path, workdir):
+    # Runs in a fresh worker process with the profiler on, so phases, counts
+    # and peak RSS belong to this case only. The scripts' own console output
+    # is discarded and anything they write lands in workdir.
+    os.chdir(workdir)
+    start_profiling(case)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        CASES[case](path)
+    return stop_profiling().report()
+
+def _run(case, path, workdir, size):
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        report = pool.submit(run_case, case, path, workdir).result()
+    report['size'] = size
+    print("{:<22} {:>10} {:>9.2f}s {:>10.1f} MB  {}".format(
+        case, size, report['seconds'], report['peak_rss_mb'] or 0.0,
+        ' '.join(f"{name}={value}" for name, value in report['counts'].items())))
+    return report
+
+def run_suite(modules=DEFAULT_MODULES, rows=DEFAULT_ROWS, files=DEFAULT_FILES, avg_imports=4.0,
+              cycle_fraction=0.05, cycle_length=4, workdir=None, seed=0):
+    # One profiled run per case and size; every input is generated afresh
+    # from `seed`, so runs against different versions are comparable
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size in modules:
+            case_dir = os.path.join(tmp, f"deps_{size}")
+            os.makedirs(case_dir)
+            path = os.path.join(case_dir, 'pydeps.json')
+            synthetic_pydeps(path, size, avg_imports, cycle_fraction, cycle_length, seed)
+            results.append(_run('analyze_dependencies', path, case_dir, size))
+
+        for size in rows:
+            case_dir = os.path.join(tmp, f"metrics_{size}")
+            os.makedirs(case_dir)
+            path = os.path.join(case_dir, 'TypeMetrics.csv')
+            synthetic_metrics(size, seed).to_csv(path, index=False)
+            results.append(_run('analyze_lcom_results', path, case_dir, size))
+
+        for size in files:
+            case_dir = os.path.join(tmp, f"java_{size}")
+            src_root = os.path.join(case_dir, 'src')
+            synthetic_java_tree(src_root, size, seed=seed)
+            results.append(_run('compute_lcom', src_root, case_dir, size))
+            results.append(_run('generate_lcom_table', os.path.join(case_dir, 'lcom_results.csv'), case_dir, size))
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the dependency and LCOM scripts on synthetic inputs")
+    parser.add_argument("--modules", type=int, nargs='*', default=DEFAULT_MODULES,
+                        help="pydeps graph sizes in modules (default: 1k and 10k)")
+    parser.add_argument("--rows", type=int, nargs='*', default=DEFAULT_ROWS,
+                        help="LCOM metrics CSV sizes in rows (default: 100k and 1M)")
+    parser.add_argument("--files", type=int, nargs='*', default=DEFAULT_FILES,
+                        help="Java source tree sizes in files (default: 200 and 2000)")
+    parser.add_argument("--avg-imports", type=float, default=4.0, help="mean imports per module")
+    parser.add_argument("--cycle-fraction", type=float, default=0.05,
+                        help="share of modules placed on import cycles")
+    parser.add_argument("--cycle-length", type=int, default=4, help="modules per generated cycle")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tag", help="label stored with the report, e.g. the version under test")
+    parser.add_argument("-o", "--output", help="write the JSON report to this file")
+    parser.add_argument("--workdir", help="where the generated inputs are written")
+    args = parser.parse_args()
+
+    print("{:<22} {:>10} {:>10} {:>13}  {}".format("Case", "Size", "Time", "Peak RSS", "Counts"))
+    results = run_suite(args.modules, args.rows, args.files, args.avg_imports, args.cycle_fraction,
+                        args.cycle_length, args.workdir, args.seed)
+    if args.output:
+        report = {
+            'tag': args.tag,
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {
+                'avg_imports': args.avg_imports, 'cycle_fraction': args.cycle_fraction,
+                'cycle_length': args.cycle_length, 'seed': args.seed,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as out:
+            json.dump(report, out, indent=2)
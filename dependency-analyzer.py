@@ -1,48 +1,63 @@
+import argparse
 import json
-import matplotlib.pyplot as plt
-import networkx as nx
+import os
 import sys
-from collections import defaultdict
+from dependency_graph import (
+    ReachabilityIndex,
+    compute_dependency_depths,
+    find_cyclic_components,
+    find_entry_points,
+    find_isolated_modules,
+    iter_representative_cycles,
+    load_compact_graph,
+    open_pydeps,
+)
+from dependency_packages import hierarchical_rollup, top_k
+from dependency_results import analyze
+from dependency_snapshot import (
+    load_snapshot,
+    save_snapshot,
+    snapshot_from_graph,
+    update_snapshot,
+)
+# Imported under another name: `count` is a loop variable in the reports below
+from profiling import count as profile_count, phase, start_profiling, stop_profiling
 
-def analyze_dependencies(json_file):
-    with open(json_file, 'r') as f:
-        try:
-            deps_data = json.load(f)
-        except json.JSONDecodeError as e:
-            print(f"Error decoding JSON: {e}")
-            print("The file might not be valid JSON. Here are the first few lines:")
-            f.seek(0)  # Go back to start of file
+def top_items(items, k):
+    # The (module, value) pairs with the k largest values, largest first and
+    # ties by name, via a bounded heap; every pair, ordered, when k is None
+    return [items[i] for i in top_k([value for _, value in items], len(items) if k is None else k,
+                                    [module for module, _ in items])]
+
+def analyze_dependencies(json_file, use_cache=True, top=None):
+    # Stream the pydeps dump straight into the array-backed graph;
+    # fan-in/fan-out are degree counts over it
+    try:
+        with phase("load"):
+            graph = load_compact_graph(json_file, use_cache=use_cache)
+    except json.JSONDecodeError as e:
+        print(f"Error decoding JSON: {e}")
+        print("The file might not be valid JSON. Here are the first few lines:")
+        with open_pydeps(json_file) as f:
             print(f.read(500))  # Print first 500 chars
-            sys.exit(1)
-            
-    # Create a directed graph
-    G = nx.DiGraph()
-    
-    # Process the pydeps JSON format
-    # Create mappings for fan-in and fan-out
-    fan_in = defaultdict(int)
-    fan_out = defaultdict(int)
-    
-    # Add nodes and edges
-    for module_name, module_data in deps_data.items():
-        G.add_node(module_name)
-        
-        # If the module has imports
-        if "imports" in module_data and isinstance(module_data["imports"], list):
-            imports = module_data["imports"]
-            fan_out[module_name] = len(imports)
-            
-            for imported_module in imports:
-                G.add_node(imported_module)
-                G.add_edge(module_name, imported_module)
-                fan_in[imported_module] += 1
+        sys.exit(1)
+    profile_count("nodes", graph.number_of_nodes())
+    profile_count("edges", graph.number_of_edges())
+    fan_in = dict(zip(graph.names, graph.fan_in.tolist()))
+    fan_out = dict(zip(graph.names, graph.fan_out.tolist()))
     
     # Print the results
     print("\n==== Module Fan-in and Fan-out Analysis ====")
+    if top:
+        # Only the most coupled modules, picked with a heap instead of a full sort
+        print(f"Top {top} of {graph.number_of_nodes()} modules by fan-in + fan-out")
+        modules = [graph.names[i] for i in top_k((graph.fan_in + graph.fan_out).tolist(), top, graph.names)]
+    else:
+        modules = sorted(graph.names)
     print("{:<50} {:<10} {:<10}".format("Module", "Fan-in", "Fan-out"))
     print("-" * 70)
     
-    for module in sorted(G.nodes()):
+    for module in modules:
         print("{:<50} {:<10} {:<10}".format(module, fan_in[module], fan_out[module]))
     
     # Identify highly coupled modules (high fan-in or fan-out)
@@ -53,32 +68,51 @@ def analyze_dependencies(json_file):
     
     print("\nHigh Fan-in Modules (many other modules depend on these):")
     high_fan_in = [(m, f) for m, f in fan_in.items() if f > high_fan_in_threshold]
-    for module, count in sorted(high_fan_in, key=lambda x: x[1], reverse=True):
+    for module, count in top_items(high_fan_in, top):
         print(f"- {module}: {count} dependent modules")
+    if top and len(high_fan_in) > top:
+        print(f"... and {len(high_fan_in) - top} more")
     
     print("\nHigh Fan-out Modules (depend on many other modules):")
     high_fan_out = [(m, f) for m, f in fan_out.items() if f > high_fan_out_threshold]
-    for module, count in sorted(high_fan_out, key=lambda x: x[1], reverse=True):
+    for module, count in top_items(high_fan_out, top):
         print(f"- {module}: depends on {count} modules")
+    if top and len(high_fan_out) > top:
+        print(f"... and {len(high_fan_out) - top} more")
     
     # Detect cyclic dependencies
     try:
-        cycles = list(nx.simple_cycles(G))
+        with phase("cycles"):
+            cyclic_components = find_cyclic_components(graph)
+        profile_count("cyclic_groups", len(cyclic_components))
         print("\n==== Cyclic Dependencies ====")
-        if cycles:
-            print(f"Found {len(cycles)} cyclic dependencies:")
-            for i, cycle in enumerate(cycles[:10]):  # Show first 10 cycles if there are many
+        if cyclic_components:
+            print(f"Found {len(cyclic_components)} groups of mutually dependent modules:")
+            for i, members in enumerate(cyclic_components[:10]):  # Show first 10 groups if there are many
+                shown = ', '.join(members[:10])
+                if len(members) > 10:
+                    shown += f", ... ({len(members) - 10} more)"
+                print(f"Group {i+1} ({len(members)} modules): {shown}")
+            if len(cyclic_components) > 10:
+                print(f"... and {len(cyclic_components) - 10} more groups")
+
+            # Only a bounded number of short cycles is kept, never the full set
+            with phase("representative_cycles"):
+                cycles = list(iter_representative_cycles(graph, cyclic_components))
+            profile_count("cycles", len(cycles))
+            print("\nRepresentative cycles:")
+            for i, cycle in enumerate(cycles):
                 print(f"Cycle {i+1}: {' -> '.join(cycle)} -> {cycle[0]}")
-            if len(cycles) > 10:
-                print(f"... and {len(cycles) - 10} more cycles")
         else:
+            cycles = []
             print("No cyclic dependencies detected.")
     except Exception as e:
         print(f"\nError detecting cycles: {e}")
         cycles = []
     
     # Check for unused/disconnected modules
-    isolated = list(nx.isolates(G))
+    with phase("isolated"):
+        isolated = find_isolated_modules(graph)
     print("\n==== Unused/Disconnected Modules ====")
     if isolated:
         print(f"Found {len(isolated)} isolated modules:")
@@ -90,120 +124,256 @@ def analyze_dependencies(json_file):
     # Calculate dependency depth
     print("\n==== Dependency Depth Analysis ====")
     
-    def find_max_path_length(G, source=None):
-        # Find longest path in the graph
-        if source:
-            # Find longest path from source
-            max_length = 0
-            for target in G.nodes():
-                if target == source:
-                    continue
-                try:
-                    # Use all_simple_paths to find all paths from source to target
-                    paths = list(nx.all_simple_paths(G, source, target, cutoff=10))  # Limit path length to avoid excessive computation
-                    if paths:
-                        # Get the longest path length
-                        path_lengths = [len(path) - 1 for path in paths]  # -1 because path length is nodes-1
-                        if path_lengths and max(path_lengths) > max_length:
-                            max_length = max(path_lengths)
-                except (nx.NetworkXError, nx.NetworkXNoPath):
-                    continue
-            return max_length
-        else:
-            # Find longest path in the graph by checking paths between nodes
-            max_length = 0
-            # Sample a subset of nodes to avoid excessive computation
-            nodes = list(G.nodes())
-            sample_size = min(20, len(nodes))  # Limit to 20 nodes if there are many
-            import random
-            sample_nodes = random.sample(nodes, sample_size) if len(nodes) > sample_size else nodes
-            
-            for source_node in sample_nodes:
-                for target_node in sample_nodes:
-                    if source_node == target_node:
-                        continue
-                    try:
-                        # Use all_simple_paths to find all paths
-                        paths = list(nx.all_simple_paths(G, source_node, target_node, cutoff=10))
-                        if paths:
-                            # Get the longest path length
-                            path_lengths = [len(path) - 1 for path in paths]
-                            if path_lengths and max(path_lengths) > max_length:
-                                max_length = max(path_lengths)
-                    except (nx.NetworkXError, nx.NetworkXNoPath):
-                        continue
-            return max_length
-    
     try:
-        # Find maximum depth (with a reasonable cutoff)
-        max_depth = find_max_path_length(G)
+        with phase("depths"):
+            depths = compute_dependency_depths(graph)
+        max_depth = max(depths.values(), default=0)
         print(f"Maximum dependency chain length: {max_depth}")
         
         # Find nodes with no incoming edges (entry points)
-        entry_points = [node for node in G.nodes() if G.in_degree(node) == 0]
+        entry_points = find_entry_points(graph)
         
-        # Find maximum depth from each entry point (limit to a few entry points if there are many)
-        sample_entry_points = entry_points[:5] if len(entry_points) > 5 else entry_points
         print("\nEntry points and their maximum dependency depths:")
-        for entry in sample_entry_points:
-            depth = find_max_path_length(G, entry)
-            print(f"- {entry}: {depth} levels deep")
-        if len(entry_points) > 5:
-            print(f"... and {len(entry_points) - 5} more entry points")
+        for entry in sorted(entry_points, key=lambda n: (-depths[n], n)):
+            print(f"- {entry}: {depths[entry]} levels deep")
     except Exception as e:
         print(f"Error calculating dependency depths: {e}")
+        depths = {}
     
-    return G, fan_in, fan_out, cycles, isolated
+    return graph, fan_in, fan_out, cycles, isolated, depths
 
-def impact_assessment(G, fan_in, fan_out):
+def impact_assessment(G, fan_in, fan_out, reachability=None):
     print("\n==== Dependency Impact Assessment ====")
     
+    # Transitive closure, built once and shared by every query below
+    if reachability is None:
+        with phase("reachability"):
+            reachability = ReachabilityIndex(G)
+    
     # Identify core modules (high fan-in)
     threshold = 3
     core_modules = [(m, f) for m, f in fan_in.items() if f > threshold]
     print("\nCore Modules (critical dependencies):")
-    for module, count in sorted(core_modules, key=lambda x: x[1], reverse=True)[:5]:
+    for module, count in top_items(core_modules, 5):
         print(f"- {module}: {count} dependent modules")
         
         # What would happen if this module changed
-        print(f"  Impact if modified: Would affect {count} dependent modules:")
-        # Get all modules that depend on this one
-        dependents = [n for n in G.predecessors(module)]
-        for dep in dependents[:3]:  # Show first 3 dependents
+        affected = reachability.affected_by(module)
+        print(f"  Impact if modified: Would affect {count} direct and {len(affected)} transitive dependent modules:")
+        # Closest dependents first, then the rest of the blast radius
+        dependents = G.predecessors(module)
+        direct = set(dependents)
+        rest = [m for m in affected if m not in direct]
+        for dep in (dependents + rest)[:3]:  # Show first 3 dependents
             print(f"  - {dep}")
-        if len(dependents) > 3:
-            print(f"  - ... and {len(dependents) - 3} more")
+        if len(affected) > 3:
+            print(f"  - ... and {len(affected) - 3} more")
     
     # Identify high-risk modules (high fan-out)
     high_risk = [(m, f) for m, f in fan_out.items() if f > threshold]
     print("\nHigh-Risk Modules (if modified):")
-    for module, count in sorted(high_risk, key=lambda x: x[1], reverse=True)[:5]:
-        print(f"- {module}: depends on {count} modules")
+    for module, count in top_items(high_risk, 5):
+        print(f"- {module}: depends on {count} modules ({reachability.count_dependencies(module)} transitively)")
         print(f"  Risk: Changes to any of its dependencies could break this module")
+    
+    return reachability
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python analyze_deps.py <dependency_json_file>")
-        sys.exit(1)
+def report_changed_modules(reachability, changed):
+    # Modules to re-test when `changed` (module names or file paths) change
+    affected, unresolved = reachability.affected_by_changes(changed)
+    print("\n==== Modules Affected by Changes ====")
+    print(f"{len(changed) - len(unresolved)} changed modules affect {len(affected)} modules:")
+    for module in affected:
+        print(f"- {module}")
+    if unresolved:
+        print(f"\nNot found in the dependency graph ({len(unresolved)}):")
+        for entry in unresolved:
+            print(f"- {entry}")
+    return affected
+
+def package_report(graph, max_depth, top=10):
+    # Roll module imports up to every package level and show the most
+    # coupled and most unstable packages at each one
+    rollups = hierarchical_rollup(graph, max_depth)
+    for rollup in rollups:
+        names = rollup['names']
+        print(f"\n==== Package Roll-up (level {rollup['depth']}) ====")
+        print(f"{len(names)} packages, {rollup['graph'].number_of_edges()} inter-package dependencies, "
+              f"{len(rollup['cycles'])} cyclic package groups")
+        
+        print("{:<40} {:<8} {:<8} {:<8} {:<12}".format("Package", "Modules", "Fan-in", "Fan-out", "Instability"))
+        print("-" * 78)
+        for i in top_k(rollup['fan_in'].tolist(), top, names):
+            print("{:<40} {:<8} {:<8} {:<8} {:<12.2f}".format(
+                names[i], rollup['modules'][i], rollup['fan_in'][i], rollup['fan_out'][i], rollup['instability'][i]))
+        
+        # Packages many others depend on but which themselves lean on others
+        # are the risky ones (Stable Dependencies Principle)
+        risk = (rollup['instability'] * rollup['fan_in']).tolist()
+        print("\nMost depended-upon unstable packages:")
+        for i in top_k(risk, min(top, 5), names):
+            if risk[i] > 0:
+                print(f"- {names[i]}: instability {rollup['instability'][i]:.2f}, {rollup['fan_in'][i]} dependent packages")
+        
+        for members in rollup['cycles'][:5]:
+            print(f"Package cycle ({len(members)} packages): {', '.join(members[:10])}")
+    return rollups
+
+def update_state(json_file, state_file, use_cache=True):
+    # Compare a new pydeps dump against the state saved by the previous run,
+    # re-analysing only the modules the edge delta can affect, and save the
+    # new state. Returns (graph, delta); delta is None when there was no
+    # previous state and a baseline was saved instead.
+    graph = load_compact_graph(json_file, use_cache=use_cache)
+    if not os.path.exists(state_file):
+        save_snapshot(state_file, snapshot_from_graph(graph))
+        return graph, None
+    snapshot, delta = update_snapshot(load_snapshot(state_file), graph)
+    save_snapshot(state_file, snapshot)
+    return graph, delta
+
+def incremental_analysis(json_file, state_file, use_cache=True):
+    # Text report of what changed since the state saved by the previous run
+    graph, delta = update_state(json_file, state_file, use_cache=use_cache)
+    if delta is None:
+        print(f"No previous state found; saved a baseline of {graph.number_of_nodes()} modules to {state_file}")
+        return None
     
-    json_file = sys.argv[1]
-    G, fan_in, fan_out, cycles, isolated = analyze_dependencies(json_file)
-    impact_assessment(G, fan_in, fan_out)
+    print("\n==== Incremental Dependency Analysis ====")
+    print(f"Modules added: {len(delta['added_modules'])}, removed: {len(delta['removed_modules'])}")
+    print(f"Imports added: {len(delta['added_edges'])}, removed: {len(delta['removed_edges'])}")
+    print(f"Re-analysed {delta['reanalysed_modules']} of {graph.number_of_nodes()} modules")
+    
+    for source, target in delta['added_edges'][:20]:
+        print(f"+ {source} -> {target}")
+    for source, target in delta['removed_edges'][:20]:
+        print(f"- {source} -> {target}")
+    
+    print("\nNew or changed cyclic dependencies:")
+    for members in delta['new_cycles']:
+        print(f"- ({len(members)} modules) {', '.join(members)}")
+    if not delta['new_cycles']:
+        print("None")
+    if delta['resolved_cycles']:
+        print("\nResolved or changed cyclic dependencies:")
+        for members in delta['resolved_cycles']:
+            print(f"- ({len(members)} modules) {', '.join(members)}")
+    
+    print("\nModules that became highly depended upon:")
+    for module, before, after in delta['fan_in_crossed_up']:
+        print(f"- {module}: fan-in {before} -> {after}")
+    if not delta['fan_in_crossed_up']:
+        print("None")
+    if delta['fan_in_crossed_down']:
+        print("\nModules no longer highly depended upon:")
+        for module, before, after in delta['fan_in_crossed_down']:
+            print(f"- {module}: fan-in {before} -> {after}")
+    
+    print("\nDependency depth regressions:")
+    for module, before, after in delta['depth_regressions']:
+        print(f"- {module}: {before} -> {after} levels deep")
+    if not delta['depth_regressions']:
+        print("None")
+    
+    return delta
+
+
+def run(args):
+    # Everything after argument parsing; the caller wraps it so the
+    # profile report is written however the run ends
+    if args.incremental:
+        if args.format == "json":
+            graph, delta = update_state(args.json_file, args.incremental, use_cache=not args.no_cache)
+            text = json.dumps({'modules': graph.number_of_nodes(), 'baseline': delta is None, 'delta': delta}, indent=2)
+            if args.output:
+                with open(args.output, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            else:
+                print(text)
+        else:
+            incremental_analysis(args.json_file, args.incremental, use_cache=not args.no_cache)
+        return
+    
+    changed = list(args.changed)
+    if args.changed_from:
+        with (sys.stdin if args.changed_from == "-" else open(args.changed_from)) as f:
+            changed.extend(line.strip() for line in f if line.strip())
+    
+    if args.format != "text":
+        # Structured results only; nothing is printed or computed beyond
+        # what the chosen format needs
+        analysis = analyze(args.json_file, use_cache=not args.no_cache)
+        if args.format == "json":
+            analysis.to_json(args.output or sys.stdout, top=args.top or 20, changed=changed,
+                             package_levels=args.package_levels)
+        elif args.format == "csv":
+            analysis.to_csv(args.output or sys.stdout)
+        else:
+            analysis.to_parquet(args.output)
+        graph = analysis.graph
+    else:
+        graph, fan_in, fan_out, cycles, isolated, depths = analyze_dependencies(args.json_file, use_cache=not args.no_cache,
+                                                                           top=args.top)
+        if args.package_levels:
+            package_report(graph, args.package_levels, top=args.top or 10)
+        reachability = impact_assessment(graph, fan_in, fan_out)
+        if changed:
+            report_changed_modules(reachability, changed)
     
     # Generate a visualization
+    if args.graph_view != "none":
+        # The rendering stage (and matplotlib for PNGs) is only imported here
+        from dependency_render import render_dependency_graph
+        try:
+            with phase("render"):
+                output_file = render_dependency_graph(graph, args.graph_output, view=args.graph_view,
+                                                      package_depth=args.package_depth)
+            # Keep stdout clean when it carries machine-readable results
+            log = sys.stdout if args.format == "text" else sys.stderr
+            print(f"\nDependency graph visualization saved as '{output_file}'", file=log)
+        except Exception as e:
+            print(f"Error generating visualization: {e}", file=sys.stderr if args.format != "text" else sys.stdout)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze module dependencies from a pydeps JSON dump")
+    parser.add_argument("json_file", help="pydeps JSON file (optionally .gz or .zst compressed)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't read or write the binary edge-list cache next to the dump")
+    parser.add_argument("--changed", nargs="+", default=[], metavar="MODULE_OR_FILE",
+                        help="report every module transitively affected by these modules or source files")
+    parser.add_argument("--changed-from", metavar="FILE",
+                        help="read changed modules/files one per line (e.g. from git diff --name-only), '-' for stdin")
+    parser.add_argument("--incremental", metavar="STATE_FILE",
+                        help="only report what changed since the analysis state saved in STATE_FILE, then update it")
+    parser.add_argument("--graph-view", choices=["scc", "package", "module", "none"],
+                        help="draw import cycles collapsed (scc, the default for text output), modules rolled up "
+                             "by package, the raw module graph, or nothing (the default for other formats)")
+    parser.add_argument("--package-depth", type=int, default=2,
+                        help="number of name parts kept per package in the package view")
+    parser.add_argument("--graph-output", default="dependency_graph_analysis.png",
+                        help="visualization file; .png, .svg or .json (large graphs are written as SVG)")
+    parser.add_argument("--top", type=int, metavar="K",
+                        help="only print the K most coupled modules instead of every module")
+    parser.add_argument("--package-levels", type=int, default=0, metavar="N",
+                        help="also report package roll-ups for package levels 1..N")
+    parser.add_argument("--format", choices=["text", "json", "csv", "parquet"], default="text",
+                        help="text report, or machine-readable results (json: everything; csv/parquet: module table)")
+    parser.add_argument("-o", "--output", help="file for json/csv/parquet results (default: stdout)")
+    parser.add_argument("--profile", metavar="REPORT",
+                        help="record per-phase wall time, peak RSS and counts into this JSON file")
+    args = parser.parse_args()
+    if args.format == "parquet" and not args.output:
+        parser.error("--format parquet requires --output")
+    if args.package_levels and args.format in ("csv", "parquet"):
+        parser.error("--package-levels needs --format text or json; csv/parquet hold the module table only")
+    if args.incremental and args.format not in ("text", "json"):
+        parser.error("--incremental supports --format text or json")
+    if args.graph_view is None:
+        args.graph_view = "scc" if args.format == "text" else "none"
+    
+    if args.profile:
+        start_profiling("dependency-analyzer")
     try:
-        plt.figure(figsize=(15, 12))
-        # Use a layout algorithm suitable for directed graphs
-        pos = nx.spring_layout(G, k=0.3, iterations=50)
-        
-        # Size nodes based on their importance (fan-in)
-        node_sizes = [100 + (fan_in.get(node, 0) * 30) for node in G.nodes()]
-        
-        nx.draw(G, pos, with_labels=True, node_color='lightblue', 
-                node_size=node_sizes, edge_color='gray', arrows=True, 
-                font_size=8, font_weight='bold', alpha=0.8)
-        plt.title("Module Dependency Graph")
-        plt.savefig("dependency_graph_analysis.png", dpi=300, bbox_inches='tight')
-        print("\nDependency graph visualization saved as 'dependency_graph_analysis.png'")
-    except Exception as e:
-        print(f"Error generating visualization: {e}")
+        run(args)
+    finally:
+        stop_profiling(args.profile)
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Workers only ever import the array-backed graph core; matplotlib and
+# networkx are never loaded because nothing here renders.
+from dependency_graph import load_compact_graph
+from dependency_results import graph_summary, module_table, write_table
+
+PYDEPS_SUFFIXES = ('.json', '.json.gz', '.json.zst', '.json.zstd')
+
+SUMMARY_COLUMNS = [
+    'repository', 'status', 'seconds', 'modules', 'imports', 'max_depth', 'entry_points',
+    'isolated_modules', 'cyclic_groups', 'modules_in_cycles', 'largest_cycle',
+]
+
+def repository_name(path):
+    # File name without its pydeps suffix (or last extension), so dots in
+    # the name itself are kept: a.b.json -> a.b
+    name = os.path.basename(path)
+    for suffix in PYDEPS_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return os.path.splitext(name)[0]
+
+def _unique_names(entries):
+    # Output files are named after the repository, so repeated names (the
+    # same file name in different directories, or a repeated manifest name)
+    # get -2, -3, ... appended in listing order
+    seen = set()
+    unique = []
+    for repo, path in entries:
+        name, k = repo, 1
+        while name in seen:
+            k += 1
+            name = f"{repo}-{k}"
+        if name != repo:
+            print(f"Warning: repository name '{repo}' is used more than once; {path} is reported as '{name}'",
+                  file=sys.stderr)
+        seen.add(name)
+        unique.append((name, path))
+    return unique
+
+def find_pydeps_files(source):
+    # A directory of pydeps dumps, or a manifest listing one dump per line
+    # (optionally "name,path"); relative manifest paths are resolved against
+    # the manifest's directory. Returns [(repository name, path)] with
+    # unique names.
+    if os.path.isdir(source):
+        entries = []
+        for name in sorted(os.listdir(source)):
+            if name.endswith(PYDEPS_SUFFIXES) and not name.startswith('.'):
+                entries.append((repository_name(name), os.path.join(source, name)))
+        return _unique_names(entries)
+
+    base = os.path.dirname(os.path.abspath(source))
+    entries = []
+    with open(source, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if ',' in line:
+                repo, path = (part.strip() for part in line.split(',', 1))
+            else:
+                path = line
+                repo = repository_name(path)
+            entries.append((repo, os.path.join(base, path)))
+    return _unique_names(entries)
+
+def _limit_worker_memory(max_memory_mb):
+    # Cap each worker's address space so one huge dump fails on its own
+    # instead of taking the whole machine down (Unix only)
+    if not max_memory_mb:
+        return
+    try:
+        import resource
+    except ImportError:
+        return
+    limit = max_memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def analyse_repository(repo, json_file, output_dir, top=20, use_cache=True):
+    # Worker entry point: writes <repo>.json (summary) and the per-module
+    # table, and returns only the small summary row to the parent process
+    start = time.perf_counter()
+    row = {'repository': repo}
+    try:
+        graph = load_compact_graph(json_file, use_cache=use_cache)
+        table = module_table(graph)
+        summary = graph_summary(graph, top=top, table=table)
+        summary['repository'] = repo
+        summary['source'] = json_file
+        summary['module_table'] = os.path.basename(write_table(os.path.join(output_dir, repo + '.modules'), table))
+        with open(os.path.join(output_dir, repo + '.json'), 'w') as out:
+            json.dump(summary, out, indent=2)
+        row.update({key: summary[key] for key in SUMMARY_COLUMNS if key in summary})
+        row['status'] = 'ok'
+    except MemoryError:
+        row['status'] = 'error: out of memory'
+    except Exception as e:
+        row['status'] = f"error: {e}"
+    row['seconds'] = round(time.perf_counter() - start, 3)
+    return row
+
+def run_batch(source, output_dir, workers=None, max_memory_mb=None, top=20, use_cache=True):
+    entries = find_pydeps_files(source)
+    if not entries:
+        print(f"No pydeps JSON files found in {source}")
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    print(f"Analyzing {len(entries)} repositories with {workers or os.cpu_count()} workers")
+
+    # One task per worker process, so memory is returned to the OS after
+    # every repository
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_limit_worker_memory,
+                             initargs=(max_memory_mb,), max_tasks_per_child=1) as pool:
+        futures = [
+            pool.submit(analyse_repository, repo, path, output_dir, top, use_cache)
+            for repo, path in entries
+        ]
+        for future in as_completed(futures):
+            try:
+                row = future.result()
+            except Exception as e:  # Worker died (e.g. killed by the memory cap)
+                row = {'repository': entries[futures.index(future)][0], 'status': f"error: {e}"}
+            print(f"- {row['repository']}: {row['status']} ({row.get('modules', 0)} modules)")
+            rows.append(row)
+
+    rows.sort(key=lambda r: r['repository'])
+    write_summary(output_dir, rows)
+    return rows
+
+def write_summary(output_dir, rows):
+    # Cross-repository summary as both JSON and a flat table
+    with open(os.path.join(output_dir, 'summary.json'), 'w') as out:
+        json.dump(rows, out, indent=2)
+    table = {column: [row.get(column) for row in rows] for column in SUMMARY_COLUMNS}
+    path = write_table(os.path.join(output_dir, 'summary'), table)
+
+    ok = [row for row in rows if row.get('status') == 'ok']
+    print("\n==== Batch Summary ====")
+    print(f"{len(ok)} of {len(rows)} repositories analyzed; summary written to {path}")
+    print("{:<30} {:<10} {:<10} {:<10} {:<10}".format("Repository", "Modules", "Imports", "Max depth", "Cycles"))
+    print("-" * 70)
+    for row in ok:
+        print("{:<30} {:<10} {:<10} {:<10} {:<10}".format(
+            row['repository'], row['modules'], row['imports'], row['max_depth'], row['cyclic_groups']))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Analyze many pydeps JSON dumps in parallel")
+    parser.add_argument("source", help="directory of pydeps JSON files, or a manifest with one file per line")
+    parser.add_argument("-o", "--output-dir", default="dependency_batch_results",
+                        help="where per-repository results and the summary are written")
+    parser.add_argument("-j", "--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--max-memory-mb", type=int, help="address-space limit per worker process")
+    parser.add_argument("--top", type=int, default=20, help="modules kept in each top fan-in/fan-out list")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't read or write the binary edge-list cache next to each dump")
+    args = parser.parse_args()
+
+    rows = run_batch(args.source, args.output_dir, args.workers, args.max_memory_mb, args.top, not args.no_cache)
+    sys.exit(0 if rows and all(row.get('status') == 'ok' for row in rows) else 1)
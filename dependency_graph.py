@@ -0,0 +1,534 @@
+import gzip
+import io
+import json
+import os
+import sys
+import time
+from array import array
+from collections import defaultdict
+
+import numpy as np
+
+class CompactGraph:
+    # Array-backed directed graph for large pydeps dumps. Module names are
+    # interned once and mapped to dense integer ids; adjacency is stored in
+    # CSR form (offsets + int32 neighbour ids) instead of per-node dicts.
+    def __init__(self, names, sources, targets):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(names)}
+        n = len(names)
+
+        # Fan-in/fan-out count every import as listed, duplicates included
+        self.fan_out = np.bincount(sources, minlength=n)
+        self.fan_in = np.bincount(targets, minlength=n)
+
+        # The adjacency itself keeps each edge once, sorted by (source, target)
+        keys = np.unique(sources.astype(np.int64) * max(n, 1) + targets)
+        self.targets = (keys % max(n, 1)).astype(np.int32)
+        out_degree = np.bincount((keys // max(n, 1)).astype(np.int64), minlength=n)
+        self.offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(out_degree, out=self.offsets[1:])
+
+        self._reverse = None
+        self._components = None
+        self._nx_graph = None
+
+    def number_of_nodes(self):
+        return len(self.names)
+
+    def number_of_edges(self):
+        return len(self.targets)
+
+    def nodes(self):
+        return iter(self.names)
+
+    def out_degree_array(self):
+        return np.diff(self.offsets)
+
+    def in_degree_array(self):
+        return np.bincount(self.targets, minlength=len(self.names))
+
+    def edge_sources(self):
+        # Source id of every deduplicated edge, aligned with self.targets
+        return np.repeat(np.arange(len(self.names), dtype=np.int32), self.out_degree_array())
+
+    def successor_ids(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def predecessor_ids(self, i):
+        offsets, sources = self._reverse_csr()
+        return sources[offsets[i]:offsets[i + 1]]
+
+    def successors(self, name):
+        return [self.names[j] for j in self.successor_ids(self.index[name])]
+
+    def predecessors(self, name):
+        return [self.names[j] for j in self.predecessor_ids(self.index[name])]
+
+    def has_edge(self, u, v):
+        i, j = self.index.get(u), self.index.get(v)
+        if i is None or j is None:
+            return False
+        row = self.successor_ids(i)
+        k = np.searchsorted(row, j)
+        return k < len(row) and row[k] == j
+
+    def _reverse_csr(self):
+        # Transposed CSR, built the first time predecessors are needed
+        if self._reverse is None:
+            n = len(self.names)
+            sources = self.edge_sources()
+            order = np.argsort(self.targets, kind='stable')
+            offsets = np.zeros(n + 1, dtype=np.int64)
+            np.cumsum(self.in_degree_array(), out=offsets[1:])
+            self._reverse = (offsets, sources[order])
+        return self._reverse
+
+    def components(self):
+        if self._components is None:
+            self._components = strongly_connected_components(self)
+        return self._components
+
+    def to_networkx(self):
+        # Only materialised for callers that really need a networkx graph
+        # (e.g. drawing); all analyses run on the arrays directly.
+        if self._nx_graph is None:
+            import networkx as nx
+            G = nx.DiGraph()
+            G.add_nodes_from(self.names)
+            sources = self.edge_sources()
+            names = self.names
+            G.add_edges_from((names[u], names[v]) for u, v in zip(sources.tolist(), self.targets.tolist()))
+            self._nx_graph = G
+        return self._nx_graph
+
+def collect_edges(module_entries):
+    # module_entries yields (module_name, module_data) pairs in pydeps format.
+    # Returns the interned names plus the raw (source, target) id arrays.
+    index = {}
+    names = []
+    sources = array('i')
+    targets = array('i')
+
+    def intern(name):
+        i = index.get(name)
+        if i is None:
+            i = index[name] = len(names)
+            names.append(sys.intern(name))
+        return i
+
+    for module_name, module_data in module_entries:
+        u = intern(module_name)
+
+        # If the module has imports
+        if "imports" in module_data and isinstance(module_data["imports"], list):
+            for imported_module in module_data["imports"]:
+                sources.append(u)
+                targets.append(intern(imported_module))
+
+    return names, np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int32)
+
+def build_compact_graph(module_entries):
+    return CompactGraph(*collect_edges(module_entries))
+
+def open_pydeps(path):
+    # Text stream over a pydeps dump, transparently decompressing .gz/.zst
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst') or path.endswith('.zstd'):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("Reading .zst files requires the 'zstandard' package")
+        raw = open(path, 'rb')
+        return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def iter_pydeps_entries(path, chunk_size=1 << 20):
+    # Incrementally parse the top-level pydeps object, yielding one
+    # (module_name, module_data) pair at a time so the whole document never
+    # has to be held in memory. Raises json.JSONDecodeError on malformed input.
+    decoder = json.JSONDecoder()
+    with open_pydeps(path) as f:
+        buf = ''
+        pos = 0
+        eof = False
+
+        def fill():
+            nonlocal buf, pos, eof
+            chunk = f.read(chunk_size)
+            if not chunk:
+                eof = True
+            buf = buf[pos:] + chunk
+            pos = 0
+
+        def next_char():
+            # Skip whitespace, refilling as needed; returns '' at end of input
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return buf[pos:pos + 1]
+                fill()
+
+        def decode_value():
+            # A value ending exactly at the buffer edge may be truncated
+            # (e.g. a number), so only accept it once more input is known.
+            nonlocal pos
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                    if end < len(buf) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        if next_char() != '{':
+            raise json.JSONDecodeError("Expecting '{'", buf, pos)
+        pos += 1
+        # Same grammar as json.load: members separated by exactly one comma
+        # (none trailing), and nothing but whitespace after the closing brace
+        c = next_char()
+        while c != '}':
+            if c != '"':
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", buf, pos)
+            key = decode_value()
+            if next_char() != ':':
+                raise json.JSONDecodeError("Expecting ':' delimiter", buf, pos)
+            pos += 1
+            next_char()
+            yield key, decode_value()
+            c = next_char()
+            if c == ',':
+                pos += 1
+                c = next_char()
+                if c != '"':
+                    raise json.JSONDecodeError("Expecting property name enclosed in double quotes", buf, pos)
+            elif c != '}':
+                raise json.JSONDecodeError("Expecting ',' delimiter", buf, pos)
+        pos += 1
+        if next_char():
+            raise json.JSONDecodeError("Extra data", buf, pos)
+
+def pack_names(names):
+    # Module names as one newline-separated UTF-8 buffer, for .npz storage
+    return np.frombuffer('\n'.join(names).encode('utf-8'), dtype=np.uint8)
+
+def unpack_names(packed, count):
+    names = packed.tobytes().decode('utf-8').split('\n')
+    return [sys.intern(n) for n in names[:count]]
+
+def edge_cache_path(path):
+    return path + '.edges.npz'
+
+def load_compact_graph(path, use_cache=True):
+    # Build the graph straight from the streamed pydeps entries. With
+    # use_cache, the interned names and raw edge arrays are stored next to the
+    # dump and reused while the dump's size and mtime are unchanged.
+    stat = os.stat(path)
+    cache_file = edge_cache_path(path)
+    if use_cache and os.path.exists(cache_file):
+        try:
+            with np.load(cache_file, allow_pickle=False) as cached:
+                if int(cached['size']) == stat.st_size and int(cached['mtime_ns']) == stat.st_mtime_ns:
+                    names = unpack_names(cached['names'], int(cached['count']))
+                    return CompactGraph(names, cached['sources'], cached['targets'])
+        except (OSError, ValueError, KeyError):
+            pass  # Unreadable or stale cache, fall through to parsing
+
+    names, sources, targets = collect_edges(iter_pydeps_entries(path))
+    if use_cache:
+        try:
+            with open(cache_file, 'wb') as out:
+                np.savez(
+                    out,
+                    names=pack_names(names),
+                    sources=sources,
+                    targets=targets,
+                    count=len(names),
+                    size=stat.st_size,
+                    mtime_ns=stat.st_mtime_ns,
+                )
+        except OSError as e:
+            print(f"Warning: could not write edge cache {cache_file}: {e}", file=sys.stderr)
+    return CompactGraph(names, sources, targets)
+
+def strongly_connected_components(graph, region=None):
+    # Iterative Tarjan over the CSR arrays. Returns (component id per node,
+    # number of components); ids are assigned in reverse topological order of
+    # the condensation, so every edge between components points to a lower id.
+    # With `region` (a set of node ids) only the induced subgraph is searched
+    # and the ids come back as a dict, so the cost is proportional to the
+    # region rather than the whole graph.
+    n = graph.number_of_nodes()
+    offsets = graph.offsets
+    targets = graph.targets
+    if region is None:
+        offsets = offsets.tolist()
+        targets = targets.tolist()
+        roots = range(n)
+        index = [-1] * n
+        low = [0] * n
+        on_stack = [False] * n
+        component = [-1] * n
+    else:
+        roots = sorted(region)
+        index = defaultdict(lambda: -1)
+        low = {}
+        on_stack = defaultdict(bool)
+        component = {}
+    stack = []
+    counter = 0
+    count = 0
+
+    for root in roots:
+        if index[root] != -1:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [[root, int(offsets[root])]]
+        while work:
+            frame = work[-1]
+            v, i = frame
+            if i < offsets[v + 1]:
+                frame[1] = i + 1
+                w = int(targets[i])
+                if region is not None and w not in region:
+                    continue
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append([w, int(offsets[w])])
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component[w] = count
+                    if w == v:
+                        break
+                count += 1
+
+    if region is not None:
+        return component, count
+    return np.array(component, dtype=np.int32), count
+
+def dependency_depth_array(graph):
+    # Longest dependency chain starting at every module, in O(V+E).
+    # Strongly connected components (import cycles) are collapsed into single
+    # nodes of the condensation DAG, so a cycle counts as one level and the
+    # search can never run away on tangled graphs.
+    component, count = graph.components()
+    offsets = graph.offsets.tolist()
+    targets = graph.targets.tolist()
+    comp = component.tolist()
+
+    # Components are numbered sinks first, so visiting them in id order means
+    # every component's successors are finished before the component itself.
+    component_depth = [0] * count
+    for v in np.argsort(component, kind='stable').tolist():
+        c = comp[v]
+        best = component_depth[c]
+        for w in targets[offsets[v]:offsets[v + 1]]:
+            cw = comp[w]
+            if cw != c and component_depth[cw] + 1 > best:
+                best = component_depth[cw] + 1
+        component_depth[c] = best
+
+    if not count:
+        return np.zeros(0, dtype=np.int64)
+    return np.asarray(component_depth, dtype=np.int64)[component]
+
+def compute_dependency_depths(graph):
+    # Depth per module name, see dependency_depth_array
+    return dict(zip(graph.names, dependency_depth_array(graph).tolist()))
+
+def find_cyclic_components(graph):
+    # Strongly connected components that contain at least one cycle: every SCC
+    # with more than one module, plus single modules that import themselves.
+    # Largest tangles first so the report leads with the worst offenders.
+    component, count = graph.components()
+    sizes = np.bincount(component, minlength=count)
+    cyclic = sizes > 1
+
+    sources = graph.edge_sources()
+    self_loops = sources[sources == graph.targets]
+    cyclic[component[self_loops]] = True
+
+    members = {c: [] for c in np.flatnonzero(cyclic).tolist()}
+    for v in np.flatnonzero(cyclic[component]).tolist():
+        members[int(component[v])].append(graph.names[v])
+
+    components = [sorted(m) for m in members.values()]
+    components.sort(key=lambda c: (-len(c), c[0]))
+    return components
+
+def shortest_cycle_through(graph, members, start):
+    # Breadth-first search from start back to itself, restricted to one SCC.
+    # Works on node ids; returns the cycle (without repeating start) or None.
+    parent = {start: None}
+    queue = [start]
+    for node in queue:
+        for succ in graph.successor_ids(node).tolist():
+            if succ not in members:
+                continue
+            if succ == start:
+                cycle = []
+                while node is not None:
+                    cycle.append(node)
+                    node = parent[node]
+                return cycle[::-1]
+            if succ not in parent:
+                parent[succ] = node
+                queue.append(succ)
+    return None
+
+def iter_representative_cycles(graph, components, max_per_component=3, max_cycles=50, time_budget=5.0):
+    # Lazily yield a few short cycles per cyclic component instead of
+    # enumerating every simple cycle. Stops when either the total count or the
+    # time budget (seconds) is exhausted, so huge tangles can't stall the run.
+    deadline = time.monotonic() + time_budget
+    emitted = 0
+    for component_members in components:
+        members = {graph.index[name] for name in component_members}
+        seen = set()
+        found = 0
+        for name in component_members:
+            if emitted >= max_cycles or time.monotonic() > deadline:
+                return
+            if found >= max_per_component:
+                break
+            cycle = shortest_cycle_through(graph, members, graph.index[name])
+            if cycle is None:
+                continue
+            key = frozenset(cycle)
+            if key in seen:
+                continue
+            seen.add(key)
+            found += 1
+            emitted += 1
+            yield [graph.names[i] for i in cycle]
+
+def find_isolated_modules(graph):
+    # Modules that neither import nor are imported by anything
+    isolated = (graph.out_degree_array() == 0) & (graph.in_degree_array() == 0)
+    return [graph.names[i] for i in np.flatnonzero(isolated).tolist()]
+
+def find_entry_points(graph):
+    # Modules that no other module imports
+    return [graph.names[i] for i in np.flatnonzero(graph.in_degree_array() == 0).tolist()]
+
+class ReachabilityIndex:
+    # Transitive closure over the condensation DAG, one bitset (a Python int,
+    # bit i = module id i) per strongly connected component. Built once in
+    # O(E * V / 64); afterwards "who is affected by X" and "what does X depend
+    # on" are a single lookup, and their sizes a popcount.
+    def __init__(self, graph):
+        self.graph = graph
+        component, count = graph.components()
+        self.component = component.tolist()
+
+        members = [0] * count
+        for v, c in enumerate(self.component):
+            members[c] |= 1 << v
+        self.members = members
+
+        # Distinct edges between components, grouped by source component
+        sources = graph.edge_sources()
+        src_comp = component[sources].astype(np.int64)
+        dst_comp = component[graph.targets].astype(np.int64)
+        keys = np.unique(src_comp[src_comp != dst_comp] * max(count, 1) + dst_comp[src_comp != dst_comp])
+        successors = [[] for _ in range(count)]
+        for s, d in zip((keys // max(count, 1)).tolist(), (keys % max(count, 1)).tolist()):
+            successors[s].append(d)
+
+        # Components are numbered sinks first: successors always have lower ids
+        descendants = [0] * count
+        for c in range(count):
+            bits = 0
+            for d in successors[c]:
+                bits |= descendants[d] | members[d]
+            descendants[c] = bits
+
+        ancestors = [0] * count
+        for c in range(count - 1, -1, -1):
+            bits = ancestors[c] | members[c]
+            for d in successors[c]:
+                ancestors[d] |= bits
+        self.descendants = descendants
+        self.ancestors = ancestors
+
+    def _bits(self, table, module):
+        v = self.graph.index[module]
+        c = self.component[v]
+        # Other members of the module's own import cycle are reachable both ways
+        return table[c] | (self.members[c] & ~(1 << v))
+
+    def _names(self, bits):
+        if not bits:
+            return []
+        packed = np.frombuffer(bits.to_bytes((bits.bit_length() + 7) // 8, 'little'), dtype=np.uint8)
+        ids = np.flatnonzero(np.unpackbits(packed, bitorder='little'))
+        return sorted(self.graph.names[i] for i in ids.tolist())
+
+    def affected_by(self, module):
+        # Modules that transitively import `module`
+        return self._names(self._bits(self.ancestors, module))
+
+    def dependencies_of(self, module):
+        # Modules that `module` transitively imports
+        return self._names(self._bits(self.descendants, module))
+
+    def count_affected(self, module):
+        return self._bits(self.ancestors, module).bit_count()
+
+    def count_dependencies(self, module):
+        return self._bits(self.descendants, module).bit_count()
+
+    def affected_by_changes(self, changed):
+        # Batch query for test selection: `changed` mixes module names and
+        # file paths (e.g. `git diff --name-only`). Returns the changed modules
+        # plus everything that transitively imports them, and the entries that
+        # could not be matched to a module.
+        bits = 0
+        unresolved = []
+        for entry in changed:
+            module = resolve_module(self.graph, entry)
+            if module is None:
+                unresolved.append(entry)
+                continue
+            bits |= self._bits(self.ancestors, module) | (1 << self.graph.index[module])
+        return self._names(bits), unresolved
+
+def resolve_module(graph, entry):
+    # Map a module name or a source file path onto a module in the graph,
+    # e.g. "src/flask/json/__init__.py" -> "flask.json"
+    entry = entry.strip()
+    if entry in graph.index:
+        return entry
+    if not entry.endswith('.py'):
+        return None
+    parts = entry[:-3].replace('\\', '/').split('/')
+    if parts[-1] == '__init__':
+        parts.pop()
+    for i in range(len(parts)):
+        candidate = '.'.join(parts[i:])
+        if candidate in graph.index:
+            return candidate
+    return None
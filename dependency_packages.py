@@ -0,0 +1,71 @@
+import heapq
+
+import numpy as np
+
+from dependency_graph import CompactGraph, find_cyclic_components
+
+def split_module_names(names):
+    # Dotted name parts of every module, computed once for all roll-up levels
+    return [name.split('.') for name in names]
+
+def package_prefixes(parts, depth):
+    # Package label of every module at `depth` name parts (modules with fewer
+    # parts stand for themselves). Returns (labels, package id per module).
+    index = {}
+    group_of = np.fromiter(
+        (index.setdefault('.'.join(p[:depth]), len(index)) for p in parts),
+        dtype=np.int32, count=len(parts),
+    )
+    return list(index), group_of
+
+def rollup_packages(graph, depth, parts=None):
+    # Collapse module imports onto packages `depth` parts deep in one
+    # vectorised pass over the edge arrays. Fan-in/fan-out count distinct
+    # neighbouring packages; import counts are the module-level edges that
+    # cross the package boundary. Instability is Ce / (Ca + Ce).
+    if parts is None:
+        parts = split_module_names(graph.names)
+    labels, group_of = package_prefixes(parts, depth)
+    k = max(len(labels), 1)
+
+    sources = group_of[graph.edge_sources()].astype(np.int64)
+    targets = group_of[graph.targets].astype(np.int64)
+    crossing = sources != targets
+    keys, counts = np.unique(sources[crossing] * k + targets[crossing], return_counts=True)
+    package_sources = (keys // k).astype(np.int32)
+    package_targets = (keys % k).astype(np.int32)
+
+    fan_out = np.bincount(package_sources, minlength=len(labels))
+    fan_in = np.bincount(package_targets, minlength=len(labels))
+    total = fan_in + fan_out
+    instability = np.divide(fan_out, total, out=np.zeros(len(labels)), where=total > 0)
+
+    package_graph = CompactGraph(labels, package_sources, package_targets)
+    return {
+        'depth': depth,
+        'names': labels,
+        'graph': package_graph,
+        'modules': np.bincount(group_of, minlength=len(labels)),
+        'fan_in': fan_in,
+        'fan_out': fan_out,
+        'imports_in': np.bincount(package_targets, weights=counts, minlength=len(labels)).astype(np.int64),
+        'imports_out': np.bincount(package_sources, weights=counts, minlength=len(labels)).astype(np.int64),
+        'instability': instability,
+        'cycles': find_cyclic_components(package_graph),
+    }
+
+def hierarchical_rollup(graph, max_depth=None):
+    # Roll-ups for every package level from 1 up to max_depth (default: the
+    # deepest module name), sharing one split of the module names
+    parts = split_module_names(graph.names)
+    deepest = max((len(p) for p in parts), default=0)
+    if max_depth is None or max_depth > deepest:
+        max_depth = deepest
+    return [rollup_packages(graph, depth, parts) for depth in range(1, max_depth + 1)]
+
+def top_k(values, k, names=None):
+    # Indices of the k largest values via a bounded heap instead of a full
+    # sort; ties broken by name when names are given
+    if names is None:
+        return heapq.nlargest(k, range(len(values)), key=values.__getitem__)
+    return [i for _, _, i in heapq.nsmallest(k, ((-values[i], names[i], i) for i in range(len(values))))]
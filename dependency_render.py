@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import sys
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from dependency_graph import CompactGraph, dependency_depth_array
+from dependency_packages import package_prefixes, split_module_names
+
+LAYOUT_CACHE_DIR = '.dependency_layout_cache'
+
+# Above this many nodes a PNG is unreadable anyway, so SVG is written instead
+MAX_RASTER_NODES = 2000
+
+# Only this many of the heaviest nodes get text labels on large drawings
+MAX_LABELS = 60
+
+def condense_graph(graph, view='scc', package_depth=2):
+    # Group modules for drawing. Returns (labels, group id per module):
+    #   'scc'     - one node per strongly connected component (import cycle)
+    #   'package' - one node per package prefix of `package_depth` parts
+    #   'module'  - the raw module graph
+    n = graph.number_of_nodes()
+    if view == 'module':
+        return list(graph.names), np.arange(n, dtype=np.int32)
+
+    if view == 'package':
+        return package_prefixes(split_module_names(graph.names), package_depth)
+
+    if view == 'scc':
+        component, count = graph.components()
+        sizes = np.bincount(component, minlength=count)
+        # Label each component by its alphabetically first member
+        first = [None] * count
+        for name, c in zip(graph.names, component.tolist()):
+            if first[c] is None or name < first[c]:
+                first[c] = name
+        labels = [name if size == 1 else f"{name} (+{size - 1})" for name, size in zip(first, sizes.tolist())]
+        return labels, component
+
+    raise ValueError(f"Unknown graph view: {view}")
+
+def aggregate_graph(graph, labels, group_of):
+    # Collapse module edges onto their groups; returns the group-level graph
+    # and the summed fan-in of each group (used for node sizes)
+    sources = group_of[graph.edge_sources()]
+    targets = group_of[graph.targets]
+    keep = sources != targets
+    weights = np.bincount(group_of, weights=graph.fan_in, minlength=len(labels))
+    return CompactGraph(labels, sources[keep].astype(np.int32), targets[keep].astype(np.int32)), weights
+
+def layered_layout(graph):
+    # Hierarchical layout in O(V+E): the layer of each node is its dependency
+    # depth (leaf dependencies at the bottom, entry points on top), and nodes
+    # within a layer are ordered by the mean position of what they import,
+    # which keeps most edges short without any force simulation.
+    n = graph.number_of_nodes()
+    depth = dependency_depth_array(graph)
+    x = np.zeros(n)
+    if not n:
+        return np.zeros((0, 2))
+
+    order = np.argsort(depth, kind='stable')
+    boundaries = np.searchsorted(depth[order], np.arange(int(depth.max()) + 2))
+    for d in range(int(depth.max()) + 1):
+        layer = order[boundaries[d]:boundaries[d + 1]].tolist()
+        keys = []
+        for v in layer:
+            below = [w for w in graph.successor_ids(v).tolist() if depth[w] < d]
+            barycenter = float(np.mean(x[below])) if below else 0.0
+            keys.append((barycenter, graph.names[v]))
+        layer = [v for _, v in sorted(zip(keys, layer))]
+        x[layer] = np.arange(len(layer)) - (len(layer) - 1) / 2.0
+
+    return np.column_stack([x, depth.astype(float)])
+
+def layout_key(graph, view, package_depth):
+    # Content hash of the drawn graph, so unchanged inputs reuse their layout
+    digest = hashlib.sha1(f"{view}:{package_depth}:".encode())
+    digest.update('\n'.join(graph.names).encode('utf-8'))
+    digest.update(graph.offsets.tobytes())
+    digest.update(graph.targets.tobytes())
+    return digest.hexdigest()
+
+def cached_layout(graph, view, package_depth, cache_dir=LAYOUT_CACHE_DIR):
+    path = os.path.join(cache_dir, layout_key(graph, view, package_depth) + '.npy') if cache_dir else None
+    if path and os.path.exists(path):
+        try:
+            return np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            pass  # Corrupt cache entry, recompute it
+    pos = layered_layout(graph)
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(path, pos)
+        except OSError as e:
+            print(f"Warning: could not cache layout in {cache_dir}: {e}", file=sys.stderr)
+    return pos
+
+def _labelled_nodes(weights):
+    if len(weights) <= MAX_LABELS:
+        return set(range(len(weights)))
+    return set(np.argpartition(-weights, MAX_LABELS)[:MAX_LABELS].tolist())
+
+def _node_sizes(weights):
+    # Same spirit as the original 100 + 30 * fan-in, but bounded
+    return 100 + np.minimum(weights, 50) * 30
+
+def write_png(path, graph, pos, weights, title):
+    # Draws straight onto an Agg canvas with collections, without pyplot;
+    # matplotlib is only imported when a raster image is requested
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(15, 12))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    segments = np.stack([pos[graph.edge_sources()], pos[graph.targets]], axis=1)
+    ax.add_collection(LineCollection(segments, colors='gray', linewidths=0.5, alpha=0.6))
+    ax.scatter(pos[:, 0], pos[:, 1], s=_node_sizes(weights), c='lightblue', edgecolors='steelblue', alpha=0.8, zorder=2)
+    for v in _labelled_nodes(weights):
+        ax.annotate(graph.names[v], pos[v], fontsize=8, fontweight='bold', ha='center', va='center', zorder=3)
+    ax.set_title(title)
+    ax.set_axis_off()
+    ax.autoscale()
+    fig.savefig(path, dpi=150, bbox_inches='tight')
+
+def write_svg(path, graph, pos, weights, title):
+    # Plain SVG written directly; every node carries a <title> tooltip and
+    # only the heaviest nodes get visible labels
+    spacing_x, spacing_y, margin = 40.0, 80.0, 40.0
+    px = (pos[:, 0] - (pos[:, 0].min() if len(pos) else 0)) * spacing_x + margin
+    py = ((pos[:, 1].max() if len(pos) else 0) - pos[:, 1]) * spacing_y + margin
+    width = (px.max() if len(px) else 0) + margin
+    height = (py.max() if len(py) else 0) + margin
+    radius = np.sqrt(_node_sizes(weights)) / 2
+    labelled = _labelled_nodes(weights)
+
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:.0f}" height="{height:.0f}">\n')
+        out.write(f'<title>{escape(title)}</title>\n<g stroke="gray" stroke-opacity="0.6" stroke-width="0.5">\n')
+        for u, v in zip(graph.edge_sources().tolist(), graph.targets.tolist()):
+            out.write(f'<line x1="{px[u]:.1f}" y1="{py[u]:.1f}" x2="{px[v]:.1f}" y2="{py[v]:.1f}"/>\n')
+        out.write('</g>\n<g fill="lightblue" stroke="steelblue" font-family="sans-serif" font-size="8">\n')
+        for v, name in enumerate(graph.names):
+            out.write(f'<circle cx="{px[v]:.1f}" cy="{py[v]:.1f}" r="{radius[v]:.1f}"><title>{escape(name)}</title></circle>\n')
+            if v in labelled:
+                out.write(f'<text x="{px[v]:.1f}" y="{py[v]:.1f}" text-anchor="middle" fill="black" stroke="none">{escape(name)}</text>\n')
+        out.write('</g>\n</svg>\n')
+
+def write_layout_json(path, graph, pos, weights, view):
+    # Positions plus edges for interactive viewers to render client-side
+    data = {
+        'view': view,
+        'nodes': [
+            {'id': v, 'label': name, 'weight': float(weights[v]), 'x': float(pos[v, 0]), 'y': float(pos[v, 1])}
+            for v, name in enumerate(graph.names)
+        ],
+        'edges': np.column_stack([graph.edge_sources(), graph.targets]).tolist(),
+    }
+    with open(path, 'w', encoding='utf-8') as out:
+        json.dump(data, out)
+
+def render_dependency_graph(graph, output_file='dependency_graph_analysis.png', view='scc', package_depth=2,
+                            cache_dir=LAYOUT_CACHE_DIR):
+    # Draw the condensed graph; the output format follows the file extension
+    # (.png, .svg or .json). Large graphs are never rasterised: a .png request
+    # is written as .svg instead. Returns the path actually written.
+    labels, group_of = condense_graph(graph, view, package_depth)
+    drawn, weights = aggregate_graph(graph, labels, group_of)
+    pos = cached_layout(drawn, view, package_depth, cache_dir)
+
+    root, ext = os.path.splitext(output_file)
+    ext = ext.lower()
+    if ext == '.png' and drawn.number_of_nodes() > MAX_RASTER_NODES:
+        print(f"{drawn.number_of_nodes()} nodes is too many to rasterise; writing SVG instead", file=sys.stderr)
+        output_file, ext = root + '.svg', '.svg'
+
+    title = f"Module Dependency Graph ({view} view)"
+    if ext == '.png':
+        write_png(output_file, drawn, pos, weights, title)
+    elif ext == '.svg':
+        write_svg(output_file, drawn, pos, weights, title)
+    elif ext == '.json':
+        write_layout_json(output_file, drawn, pos, weights, view)
+    else:
+        raise ValueError(f"Unsupported graph output format: {ext}")
+    return output_file
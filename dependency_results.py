@@ -0,0 +1,217 @@
+import csv
+import json
+
+import numpy as np
+
+from dependency_graph import (
+    ReachabilityIndex,
+    dependency_depth_array,
+    find_cyclic_components,
+    find_entry_points,
+    find_isolated_modules,
+    iter_representative_cycles,
+    load_compact_graph,
+)
+from dependency_packages import hierarchical_rollup, top_k
+from profiling import count, phase
+
+# Same threshold impact_assessment uses for core modules
+CORE_MODULE_THRESHOLD = 3
+
+def module_table(graph):
+    # Per-module metrics as parallel columns: fan-in, fan-out, dependency
+    # depth and the size of the import cycle the module sits in (1 if none)
+    component, count = graph.components()
+    sizes = np.bincount(component, minlength=count)
+    return {
+        'module': list(graph.names),
+        'fan_in': graph.fan_in,
+        'fan_out': graph.fan_out,
+        'depth': dependency_depth_array(graph),
+        'cycle_size': sizes[component] if count else np.zeros(0, dtype=np.int64),
+    }
+
+def graph_summary(graph, top=20, table=None):
+    # Compact, JSON-serialisable overview of one dependency graph
+    if table is None:
+        table = module_table(graph)
+    names = graph.names
+    cyclic = find_cyclic_components(graph)
+    fan_in = graph.fan_in.tolist()
+    fan_out = graph.fan_out.tolist()
+    return {
+        'modules': graph.number_of_nodes(),
+        'imports': graph.number_of_edges(),
+        'max_depth': int(table['depth'].max()) if len(names) else 0,
+        'entry_points': len(find_entry_points(graph)),
+        'isolated_modules': len(find_isolated_modules(graph)),
+        'cyclic_groups': len(cyclic),
+        'modules_in_cycles': sum(len(members) for members in cyclic),
+        'largest_cycle': len(cyclic[0]) if cyclic else 0,
+        'top_fan_in': [[names[i], fan_in[i]] for i in top_k(fan_in, top, names)],
+        'top_fan_out': [[names[i], fan_out[i]] for i in top_k(fan_out, top, names)],
+    }
+
+def package_summary(rollup):
+    # One package roll-up level (dependency_packages.rollup_packages) as
+    # JSON-serialisable records
+    columns = ['modules', 'fan_in', 'fan_out', 'imports_in', 'imports_out', 'instability']
+    return {
+        'depth': rollup['depth'],
+        'packages': [
+            dict(package=name, **dict(zip(columns, values)))
+            for name, *values in zip(rollup['names'], *(rollup[c].tolist() for c in columns))
+        ],
+        'inter_package_dependencies': rollup['graph'].number_of_edges(),
+        'cyclic_groups': rollup['cycles'],
+    }
+
+class DependencyAnalysis:
+    # Structured result of analysing one pydeps dump, for use as a library.
+    # Every metric is computed on first access and then kept, so a caller
+    # asking only for fan-in never pays for cycles, depths or reachability.
+    # Each computation is a profiling phase named after the metric.
+    def __init__(self, graph):
+        self.graph = graph
+        self._cache = {}
+
+    def _cached(self, key, compute):
+        if key not in self._cache:
+            with phase(key):
+                self._cache[key] = compute()
+        return self._cache[key]
+
+    @property
+    def fan_in(self):
+        return self._cached('fan_in', lambda: dict(zip(self.graph.names, self.graph.fan_in.tolist())))
+
+    @property
+    def fan_out(self):
+        return self._cached('fan_out', lambda: dict(zip(self.graph.names, self.graph.fan_out.tolist())))
+
+    @property
+    def table(self):
+        return self._cached('table', lambda: module_table(self.graph))
+
+    @property
+    def depths(self):
+        return self._cached('depths', lambda: dict(zip(self.graph.names, self.table['depth'].tolist())))
+
+    @property
+    def cyclic_components(self):
+        return self._cached('cyclic_components', lambda: find_cyclic_components(self.graph))
+
+    @property
+    def cycles(self):
+        # Bounded set of representative cycles, never the full enumeration
+        return self._cached('cycles', lambda: list(iter_representative_cycles(self.graph, self.cyclic_components)))
+
+    @property
+    def isolated(self):
+        return self._cached('isolated', lambda: find_isolated_modules(self.graph))
+
+    @property
+    def entry_points(self):
+        return self._cached('entry_points', lambda: find_entry_points(self.graph))
+
+    @property
+    def reachability(self):
+        return self._cached('reachability', lambda: ReachabilityIndex(self.graph))
+
+    def impact(self, module):
+        # Modules transitively affected if `module` changes
+        return self.reachability.affected_by(module)
+
+    def affected_by_changes(self, changed):
+        return self.reachability.affected_by_changes(changed)
+
+    def core_modules(self, top=5):
+        # Most depended-upon modules with their transitive blast radius
+        fan_in = self.graph.fan_in.tolist()
+        names = self.graph.names
+        return [
+            {'module': names[i], 'fan_in': fan_in[i], 'affected': self.impact(names[i])}
+            for i in top_k(fan_in, top, names) if fan_in[i] > CORE_MODULE_THRESHOLD
+        ]
+
+    def package_rollups(self, max_depth=None):
+        # Package roll-ups for levels 1..max_depth (default: every level)
+        with phase('package_rollups'):
+            return hierarchical_rollup(self.graph, max_depth)
+
+    def to_dict(self, top=20, changed=None, package_levels=0):
+        data = {
+            'summary': graph_summary(self.graph, top=top, table=self.table),
+            'modules': self.rows(),
+            'cyclic_components': self.cyclic_components,
+            'representative_cycles': self.cycles,
+            'isolated_modules': self.isolated,
+            'entry_points': sorted(self.entry_points, key=lambda m: (-self.depths[m], m)),
+            'core_modules': self.core_modules(),
+        }
+        if changed:
+            affected, unresolved = self.affected_by_changes(changed)
+            data['changed'] = {'changed': list(changed), 'affected': affected, 'unresolved': unresolved}
+        if package_levels:
+            data['package_rollups'] = [package_summary(rollup) for rollup in self.package_rollups(package_levels)]
+        return data
+
+    def rows(self):
+        # Module table as a list of records
+        columns = list(self.table)
+        values = [col if isinstance(col, list) else col.tolist() for col in self.table.values()]
+        return [dict(zip(columns, row)) for row in zip(*values)]
+
+    def to_json(self, out=None, top=20, changed=None, package_levels=0):
+        # Writes to a path or file object; returns the JSON text when out is None
+        text = json.dumps(self.to_dict(top=top, changed=changed, package_levels=package_levels), indent=2)
+        if out is None:
+            return text
+        if isinstance(out, str):
+            with open(out, 'w', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            out.write(text)
+
+    def to_csv(self, out):
+        write_csv(out, self.table)
+
+    def to_parquet(self, path):
+        write_parquet(path, self.table)
+
+def analyze(json_file, use_cache=True):
+    # Library entry point: no printing, nothing computed until asked for
+    with phase('load'):
+        graph = load_compact_graph(json_file, use_cache=use_cache)
+    count('nodes', graph.number_of_nodes())
+    count('edges', graph.number_of_edges())
+    return DependencyAnalysis(graph)
+
+def write_csv(out, table):
+    # Column dict as CSV, to a path or an open text file (e.g. sys.stdout)
+    if isinstance(out, str):
+        with open(out, 'w', newline='', encoding='utf-8') as f:
+            return write_csv(f, table)
+    columns = list(table)
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    writer.writerows(zip(*(table[c] if isinstance(table[c], list) else table[c].tolist() for c in columns)))
+
+def write_parquet(path, table):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Writing Parquet files requires the 'pyarrow' package")
+    pq.write_table(pa.table(table), path)
+
+def write_table(path, table):
+    # Column dict to Parquet when pyarrow is installed, otherwise CSV; the
+    # extension of `path` is replaced accordingly. Returns the written path.
+    root = path.rsplit('.', 1)[0] if path.endswith(('.parquet', '.csv')) else path
+    try:
+        write_parquet(root + '.parquet', table)
+        return root + '.parquet'
+    except RuntimeError:
+        write_csv(root + '.csv', table)
+        return root + '.csv'
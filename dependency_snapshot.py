@@ -0,0 +1,181 @@
+import numpy as np
+
+from dependency_graph import (
+    dependency_depth_array,
+    pack_names,
+    strongly_connected_components,
+    unpack_names,
+)
+
+# Same coupling threshold analyze_dependencies uses for high fan-in modules
+HIGH_FAN_IN_THRESHOLD = 3
+
+SNAPSHOT_ARRAYS = ('offsets', 'targets', 'fan_in', 'fan_out', 'component', 'depth')
+
+def snapshot_from_graph(graph):
+    # Full analysis state of one pydeps dump: deduplicated edges (CSR),
+    # fan counts, an SCC label per module and the dependency depth table
+    component, _ = graph.components()
+    return {
+        'names': list(graph.names),
+        'offsets': graph.offsets,
+        'targets': graph.targets,
+        'fan_in': graph.fan_in,
+        'fan_out': graph.fan_out,
+        'component': component.astype(np.int64),
+        'depth': dependency_depth_array(graph),
+    }
+
+def save_snapshot(path, snapshot):
+    with open(path, 'wb') as out:
+        np.savez(
+            out,
+            names=pack_names(snapshot['names']),
+            count=len(snapshot['names']),
+            **{key: snapshot[key] for key in SNAPSHOT_ARRAYS},
+        )
+
+def load_snapshot(path):
+    with np.load(path, allow_pickle=False) as data:
+        snapshot = {key: data[key] for key in SNAPSHOT_ARRAYS}
+        snapshot['names'] = unpack_names(data['names'], int(data['count']))
+    return snapshot
+
+def _self_loops(offsets, targets, nodes):
+    # Nodes (ids) among `nodes` that import themselves
+    return {v for v in nodes if v in targets[offsets[v]:offsets[v + 1]]}
+
+def update_snapshot(old, graph, fan_in_threshold=HIGH_FAN_IN_THRESHOLD):
+    # Bring `old` up to date with `graph` and describe what changed.
+    #
+    # A module's SCC or depth can only change if it can reach the source of
+    # an added or removed edge, so SCCs and depths are recomputed just for
+    # the backward closure of those sources; everything else is carried over
+    # from the previous snapshot. Returns (new snapshot, delta report dict).
+    names = graph.names
+    n = len(names)
+    old_names = old['names']
+    n_old = len(old_names)
+
+    # Old ids -> new ids; removed modules get ids past the end of the new graph
+    remap = np.fromiter((graph.index.get(name, -1) for name in old_names), dtype=np.int64, count=n_old)
+    removed_modules = np.flatnonzero(remap < 0)
+    remap[removed_modules] = n + np.arange(len(removed_modules))
+    kept_old = np.flatnonzero(remap < n)
+    kept_new = remap[kept_old]
+    is_added = np.ones(n, dtype=bool)
+    is_added[kept_new] = False
+    added_modules = np.flatnonzero(is_added)
+
+    # Edge delta, as sorted (source, target) keys in the new id space
+    width = max(n + len(removed_modules), 1)
+    old_sources = remap[np.repeat(np.arange(n_old), np.diff(old['offsets']))]
+    old_keys = old_sources * width + remap[old['targets']]
+    new_sources = graph.edge_sources().astype(np.int64)
+    new_keys = new_sources * width + graph.targets
+    added_edges = np.setdiff1d(new_keys, old_keys, assume_unique=True)
+    removed_edges = np.setdiff1d(old_keys, new_keys, assume_unique=True)
+
+    seeds = set((added_edges // width).tolist())
+    seeds.update(s for s in (removed_edges // width).tolist() if s < n)
+    seeds.update(added_modules.tolist())
+
+    # Backward closure of the changed sources in the new graph
+    region = set(seeds)
+    queue = list(seeds)
+    for v in queue:
+        for u in graph.predecessor_ids(v).tolist():
+            if u not in region:
+                region.add(u)
+                queue.append(u)
+
+    # Carry over labels and depths, then recompute the region
+    component = np.zeros(n, dtype=np.int64)
+    depth = np.zeros(n, dtype=np.int64)
+    component[kept_new] = old['component'][kept_old]
+    depth[kept_new] = old['depth'][kept_old]
+    old_depth = depth.copy()
+
+    local, count = strongly_connected_components(graph, region)
+    base = int(old['component'].max()) + 1 if n_old else 0
+    component_depth = [0] * count
+    for v in sorted(region, key=local.__getitem__):
+        c = local[v]
+        best = component_depth[c]
+        for w in graph.successor_ids(v).tolist():
+            if w in region:
+                if local[w] == c:
+                    continue
+                candidate = component_depth[local[w]] + 1
+            else:
+                candidate = int(depth[w]) + 1
+            if candidate > best:
+                best = candidate
+        component_depth[c] = best
+    for v, c in local.items():
+        component[v] = base + c
+        depth[v] = component_depth[c]
+
+    # Cycles: compare cyclic groups touching the region before and after
+    members = {}
+    for v, c in local.items():
+        members.setdefault(c, []).append(v)
+    loops = _self_loops(graph.offsets, graph.targets, [m[0] for m in members.values() if len(m) == 1])
+    new_groups = {
+        frozenset(names[v] for v in m)
+        for m in members.values() if len(m) > 1 or m[0] in loops
+    }
+
+    old_index = {name: i for i, name in enumerate(old_names)} if n_old else {}
+    touched = [old_index[names[v]] for v in region if not is_added[v]] + removed_modules.tolist()
+    old_labels = np.unique(old['component'][touched]) if touched else np.zeros(0, dtype=np.int64)
+    old_members = {}
+    for v in np.flatnonzero(np.isin(old['component'], old_labels)).tolist():
+        old_members.setdefault(int(old['component'][v]), []).append(v)
+    old_loops = _self_loops(old['offsets'], old['targets'], [m[0] for m in old_members.values() if len(m) == 1])
+    old_groups = {
+        frozenset(old_names[v] for v in m)
+        for m in old_members.values() if len(m) > 1 or m[0] in old_loops
+    }
+
+    # Fan-in threshold crossings and depth regressions
+    old_fan_in = np.zeros(n, dtype=np.int64)
+    old_fan_in[kept_new] = old['fan_in'][kept_old]
+    crossed_up = np.flatnonzero((old_fan_in <= fan_in_threshold) & (graph.fan_in > fan_in_threshold))
+    crossed_down = np.flatnonzero((old_fan_in > fan_in_threshold) & (graph.fan_in <= fan_in_threshold))
+    regressions = [
+        (names[v], int(old_depth[v]), int(depth[v]))
+        for v in region if not is_added[v] and depth[v] > old_depth[v]
+    ]
+    regressions.sort(key=lambda r: (r[1] - r[2], r[0]))
+
+    def edge_names(keys, lookup):
+        return sorted((lookup(s), lookup(t)) for s, t in zip((keys // width).tolist(), (keys % width).tolist()))
+
+    removed_names = [old_names[i] for i in removed_modules.tolist()]
+    lookup = lambda i: names[i] if i < n else removed_names[i - n]
+
+    delta = {
+        'added_modules': sorted(names[v] for v in added_modules.tolist()),
+        'removed_modules': sorted(removed_names),
+        'added_edges': edge_names(added_edges, lookup),
+        'removed_edges': edge_names(removed_edges, lookup),
+        'reanalysed_modules': len(region),
+        'new_cycles': sorted((sorted(g) for g in new_groups - old_groups), key=lambda g: (-len(g), g)),
+        'resolved_cycles': sorted((sorted(g) for g in old_groups - new_groups), key=lambda g: (-len(g), g)),
+        'fan_in_crossed_up': [(names[v], int(old_fan_in[v]), int(graph.fan_in[v])) for v in crossed_up.tolist()],
+        'fan_in_crossed_down': [(names[v], int(old_fan_in[v]), int(graph.fan_in[v])) for v in crossed_down.tolist()],
+        'depth_regressions': regressions,
+    }
+
+    snapshot = {
+        'names': list(names),
+        'offsets': graph.offsets,
+        'targets': graph.targets,
+        'fan_in': graph.fan_in,
+        'fan_out': graph.fan_out,
+        # Relabel densely so labels don't grow without bound across runs
+        'component': np.unique(component, return_inverse=True)[1].astype(np.int64) if n else component,
+        'depth': depth,
+    }
+    return snapshot, delta
@@ -0,0 +1,141 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from dependency_graph import load_compact_graph
+from lcom_select import add_class_names, compact_frame, read_lcom_metrics, top_n
+from profiling import count, phase, start_profiling, stop_profiling
+
+# Lack of cohesion is judged on these; LCOM5 is optional in older dumps
+COHESION_COLUMNS = ['LCOM1', 'LCOM5']
+
+HOTSPOT_COLUMNS = [
+    'ClassName', 'Module', 'Fan-in', 'Fan-out', 'LCOM1', 'LCOM5',
+    'Coupling Rank', 'Cohesion Rank', 'Hotspot Score',
+]
+
+def load_metrics(path):
+    # LCOM results from a CSV/Parquet/Feather file or an incremental metrics
+    # store, with categorical names and a ClassName column
+    if path.endswith(('.sqlite', '.db')):
+        from lcom_store import load_metrics as load_store
+        df = compact_frame(load_store(path))
+    else:
+        df = read_lcom_metrics(path)
+    if 'ClassName' not in df.columns:
+        add_class_names(df)
+    elif not isinstance(df['ClassName'].dtype, pd.CategoricalDtype):
+        df['ClassName'] = df['ClassName'].astype('category')
+    return df
+
+def class_module_ids(graph, class_names):
+    # Module id (into graph.names) for every row of a categorical ClassName
+    # column, -1 where no module matches. A class maps to the module with
+    # its exact name (class-level graphs, e.g. Java) or else to the longest
+    # module name that is a dotted prefix of it (the Python module defining
+    # the class, or the outer class of a nested one). The lookup runs once
+    # per distinct name; rows are then mapped through the category codes.
+    index = graph.index
+    lookup = np.full(len(class_names.cat.categories) + 1, -1, dtype=np.int64)
+    for k, name in enumerate(class_names.cat.categories.astype(str).tolist()):
+        while name:
+            module = index.get(name)
+            if module is not None:
+                lookup[k] = module
+                break
+            name = name.rpartition('.')[0]
+    # Code -1 (missing name) picks the trailing -1
+    return lookup[class_names.cat.codes.to_numpy()]
+
+def hotspot_table(graph, metrics):
+    # Inner join of per-module coupling with per-class cohesion, one row per
+    # class that maps onto a module. Both sides are ranked within their own
+    # population first (percentiles: coupling among all modules, lack of
+    # cohesion among all classes) so neither scale dominates; the hotspot
+    # score is the product, high only when a class is both.
+    with phase('join'):
+        ids = class_module_ids(graph, metrics['ClassName'])
+        matched = np.flatnonzero(ids >= 0)
+    count('classes', len(metrics))
+    count('classes_matched', len(matched))
+
+    with phase('score'):
+        coupling = pd.Series(graph.fan_in + graph.fan_out).rank(pct=True).to_numpy()
+        columns = [c for c in COHESION_COLUMNS if c in metrics.columns]
+        ranks = np.column_stack([metrics[c].rank(pct=True).to_numpy(dtype=np.float64, na_value=np.nan)
+                                 for c in columns])
+        # Mean over the metrics a class actually has; none at all scores 0
+        present = ~np.isnan(ranks)
+        cohesion = np.divide(np.nansum(ranks, axis=1), present.sum(axis=1),
+                             out=np.zeros(len(ranks)), where=present.any(axis=1))
+
+        module_ids = ids[matched]
+        table = pd.DataFrame({
+            'ClassName': metrics['ClassName'].array.take(matched),
+            'Module': pd.Categorical.from_codes(module_ids, graph.names) if len(graph.names) else [],
+            'Fan-in': graph.fan_in[module_ids],
+            'Fan-out': graph.fan_out[module_ids],
+            'LCOM1': metrics['LCOM1'].to_numpy()[matched],
+            'LCOM5': metrics['LCOM5'].to_numpy()[matched] if 'LCOM5' in metrics.columns else np.nan,
+            'Coupling Rank': coupling[module_ids],
+            'Cohesion Rank': cohesion[matched],
+        })
+        table['Hotspot Score'] = table['Coupling Rank'] * table['Cohesion Rank']
+    return table[HOTSPOT_COLUMNS]
+
+def find_hotspots(json_file, metrics_file, top=20, use_cache=True):
+    # The `top` classes by hotspot score, plus the full joined table. The
+    # graph comes from the pydeps dump's edge cache when it is current, so
+    # neither input is parsed more than once.
+    with phase('load_graph'):
+        graph = load_compact_graph(json_file, use_cache=use_cache)
+    count('nodes', graph.number_of_nodes())
+    count('edges', graph.number_of_edges())
+    with phase('load_metrics'):
+        metrics = load_metrics(metrics_file)
+    table = hotspot_table(graph, metrics)
+    with phase('select'):
+        hotspots = top_n(table, 'Hotspot Score', top)
+    return hotspots, table
+
+def write_hotspots(table, path):
+    if path.endswith('.parquet'):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Rank classes that are both highly coupled (pydeps graph) and poorly cohesive (LCOM metrics)")
+    parser.add_argument("json_file", help="pydeps JSON file (optionally .gz or .zst compressed)")
+    parser.add_argument("metrics_file", help="LCOM results: CSV, Parquet, Feather or a metrics store (.sqlite)")
+    parser.add_argument("--top", type=int, default=20, help="number of hotspots to print (default: 20)")
+    parser.add_argument("-o", "--output", help="write the full joined table (.csv or .parquet)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't read or write the binary edge-list cache next to the dump")
+    parser.add_argument("--profile", metavar="REPORT",
+                        help="record per-phase wall time, peak RSS and counts into this JSON file")
+    args = parser.parse_args()
+    if args.profile:
+        start_profiling("hotspot_analyzer")
+
+    try:
+        hotspots, table = find_hotspots(args.json_file, args.metrics_file, args.top, use_cache=not args.no_cache)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    print("==== Coupling-Cohesion Hotspots ====")
+    print(f"{len(table)} classes matched to modules of the dependency graph")
+    if table.empty:
+        print("No class names match module names; check that both inputs describe the same code base.")
+    else:
+        print(f"\nTop {len(hotspots)} classes by hotspot score (coupling rank x cohesion rank):")
+        print(hotspots.to_string(index=False))
+    if args.output:
+        write_hotspots(table, args.output)
+        print(f"\nSaved the joined table to {args.output}")
+
+    stop_profiling(args.profile)
@@ -0,0 +1,445 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+OUTLINE_CACHE_DIR = '.java_outline_cache'
+OUTLINE_VERSION = 2
+
+# Below this many files a process pool costs more than it saves
+MIN_FILES_FOR_POOL = 32
+
+TYPE_KEYWORDS = ('class', 'interface', 'enum', 'record')
+
+# One master pattern, tried at the current position only: every alternative
+# is anchored and either fixed-length or stops at its first terminator, so
+# the whole file is lexed in a single linear pass with no backtracking.
+_TOKEN = re.compile(r'''
+    (?P<space>\s+)
+  | (?P<comment>//[^\n]*|/\*.*?(?:\*/|\Z))
+  | (?P<text_block>""".*?(?:"""|\Z))
+  | (?P<string>"(?:[^"\\\n]|\\.)*"?)
+  | (?P<char>'(?:[^'\\\n]|\\.)*'?)
+  | (?P<annotation_type>@\s*interface\b)
+  | (?P<annotation>@\s*[\w$]+(?:\s*\.\s*[\w$]+)*)
+  | (?P<word>[A-Za-z_$][\w$]*)
+  | (?P<number>\d[\w.]*)
+  | (?P<symbol>.)
+''', re.DOTALL | re.VERBOSE)
+
+def tokenize(text):
+    # Yields (kind, value, start, end), dropping whitespace and comments.
+    # Annotation arguments are folded into the annotation token so their
+    # parentheses aren't mistaken for a method's parameter list.
+    pos = 0
+    n = len(text)
+    match = _TOKEN.match
+    while pos < n:
+        m = match(text, pos)
+        kind = m.lastgroup
+        end = m.end()
+        if kind == 'annotation':
+            end = _skip_annotation_arguments(text, end)
+        if kind not in ('space', 'comment'):
+            yield kind, text[m.start():end], m.start(), end
+        pos = end
+
+def _skip_annotation_arguments(text, pos):
+    # Consume a balanced "( ... )" after an annotation name, if present
+    i = pos
+    while i < len(text) and text[i].isspace():
+        i += 1
+    if i >= len(text) or text[i] != '(':
+        return pos
+    depth = 0
+    while i < len(text):
+        m = _TOKEN.match(text, i)
+        value = m.group()
+        if m.lastgroup == 'symbol':
+            if value == '(':
+                depth += 1
+            elif value == ')':
+                depth -= 1
+                if depth == 0:
+                    return m.end()
+        i = m.end()
+    return i
+
+def _type_keyword_at(tokens):
+    # Index of a type-declaring keyword in a pending declaration, or None.
+    # "Foo.class" and contextual uses of "record" don't count.
+    for i, (kind, value, _, _) in enumerate(tokens):
+        if kind == 'annotation_type':
+            return i
+        if kind == 'word' and value in TYPE_KEYWORDS:
+            previous = tokens[i - 1][1] if i else ''
+            following = tokens[i + 1] if i + 1 < len(tokens) else None
+            if previous != '.' and following is not None and following[0] == 'word':
+                return i
+    return None
+
+def _declaration_text(text, tokens, stop=None):
+    # Source text of a declaration without its annotations, whitespace collapsed
+    tokens = [t for t in tokens if t[0] != 'annotation']
+    if stop is not None:
+        tokens = tokens[:stop]
+    if not tokens:
+        return ''
+    return ' '.join(text[tokens[0][2]:tokens[-1][3]].split())
+
+def _is_method(tokens):
+    # A '(' before any '=' means a method/constructor, otherwise a field
+    for kind, value, _, _ in tokens:
+        if kind != 'symbol':
+            continue
+        if value == '=':
+            return False
+        if value == '(':
+            return True
+    return False
+
+def _walk(text, keep_bodies=False):
+    # Brace-depth aware pass over the type-level structure of a source,
+    # yielding events in order:
+    #   ('type', declaration tokens, keyword index)  a type body opens
+    #   ('end', None, None)                          the innermost type body closes
+    #   ('method', declaration tokens, body tokens)  body is None when abstract,
+    #                                                and only kept with keep_bodies
+    #   ('field', declaration tokens, None)
+    #   ('constants', enum constant tokens, None)
+    #   ('statement', tokens, None)                  outside any type (package, imports)
+    in_constants = []   # one flag per open type body: still reading enum constants?
+    pending = []        # tokens of the member declaration being read at type level
+    skipping = 0        # depth inside a skipped block (method body, initializer, ...)
+    body = None         # tokens of the method body being collected
+
+    for token in tokenize(text):
+        kind, value = token[0], token[1]
+
+        if skipping:
+            if kind == 'symbol' and value == '{':
+                skipping += 1
+            elif kind == 'symbol' and value == '}':
+                skipping -= 1
+                if not skipping and body is not None:
+                    yield 'method', method, body
+                    body = None
+                    continue
+            if body is not None:
+                body.append(token)
+            continue
+
+        in_type = bool(in_constants)
+
+        if kind == 'symbol' and value == '{':
+            keyword = _type_keyword_at(pending)
+            if keyword is not None:
+                yield 'type', pending, keyword
+                in_constants.append(pending[keyword][1] == 'enum')
+                pending = []
+            elif in_type and in_constants[-1]:
+                skipping = 1  # Enum constant with a body
+            elif in_type and _is_method(pending):
+                if keep_bodies:
+                    method, body = pending, []
+                else:
+                    yield 'method', pending, None
+                pending = []
+                skipping = 1
+            else:
+                # Initializer block, or an array/anonymous-class field
+                # initializer whose declaration continues after the block
+                skipping = 1
+                if not in_type or not any(t[0] == 'symbol' and t[1] == '=' for t in pending):
+                    pending = []
+            continue
+
+        if kind == 'symbol' and value == '}':
+            if in_type:
+                if in_constants.pop() and pending:
+                    yield 'constants', pending, None
+                yield 'end', None, None
+            pending = []
+            continue
+
+        if kind == 'symbol' and value == ';':
+            if in_type and in_constants[-1]:
+                yield 'constants', pending, None
+                in_constants[-1] = False
+            elif not in_type:
+                yield 'statement', pending, None
+            elif pending:
+                yield ('method' if _is_method(pending) else 'field'), pending, None
+            pending = []
+            continue
+
+        pending.append(token)
+
+def _type_header(tokens, keyword):
+    kind = 'annotation' if tokens[keyword][0] == 'annotation_type' else tokens[keyword][1]
+    name = tokens[keyword + 1][1] if keyword + 1 < len(tokens) else ''
+    return kind, name
+
+def parse_outline(text):
+    # Outline of every type declared in a Java source: kind, name,
+    # declaration line, fields, method signatures and enum constants, plus
+    # the enclosing type for nested ones. Brace-depth aware and linear.
+    types = []
+    stack = []  # outlines of the type bodies currently open
+    for event, tokens, extra in _walk(text):
+        outline = stack[-1] if stack else None
+        if event == 'type':
+            kind, name = _type_header(tokens, extra)
+            nested = {
+                'kind': kind,
+                'name': name,
+                'declaration': _declaration_text(text, tokens),
+                'parent': outline['name'] if outline else None,
+                'fields': [],
+                'methods': [],
+                'constants': [],
+            }
+            types.append(nested)
+            stack.append(nested)
+        elif event == 'end':
+            stack.pop()
+        elif event == 'method':
+            outline['methods'].append(_declaration_text(text, tokens))
+        elif event == 'field':
+            eq = next((i for i, t in enumerate(t for t in tokens if t[0] != 'annotation')
+                       if t[0] == 'symbol' and t[1] == '='), None)
+            outline['fields'].append(_declaration_text(text, tokens, eq))
+        elif event == 'constants':
+            outline['constants'].extend(_enum_constants(tokens))
+    return types
+
+# Symbols that can appear between the brackets of a type-argument list
+# besides names and nested lists ("Map.Entry<K, V[]>"); '?' only as a wildcard
+_TYPE_ARGUMENT_SYMBOLS = ('.', ',', '[', ']')
+
+def type_argument_brackets(tokens):
+    # Positions of the '<' and '>' tokens that delimit type-argument lists
+    # ("List<String>", "new HashMap<>()"), as opposed to comparison and shift
+    # operators or the '>' of a lambda arrow. A '<' right after a name opens
+    # a candidate list; any token that can't appear in a type (operators,
+    # literals, parentheses, ';') abandons every open candidate.
+    brackets = set()
+    opened = []
+    for k, (kind, value, start, _) in enumerate(tokens):
+        if kind in ('word', 'annotation'):
+            continue
+        if kind == 'symbol':
+            if value == '<':
+                if k and tokens[k - 1][0] == 'word':
+                    opened.append(k)
+                    continue
+            elif value == '>':
+                arrow = k and tokens[k - 1][1] == '-' and tokens[k - 1][3] == start
+                if opened and not arrow:
+                    brackets.add(opened.pop())
+                    brackets.add(k)
+                    continue
+            elif opened and (value in _TYPE_ARGUMENT_SYMBOLS
+                             or (value == '?' and tokens[k - 1][1] in ('<', ','))):
+                continue
+        opened.clear()
+    return brackets
+
+def _split_top_level(tokens):
+    # Split declaration tokens on commas outside (), <>, [] and {}; only
+    # type-argument brackets count as <>, not "x < y" in an initialiser
+    brackets = type_argument_brackets(tokens)
+    parts, current, depth = [], [], 0
+    for k, token in enumerate(tokens):
+        if token[0] == 'symbol':
+            if token[1] in '([{' or (token[1] == '<' and k in brackets):
+                depth += 1
+            elif token[1] in ')]}' or (token[1] == '>' and k in brackets):
+                depth -= 1
+            elif token[1] == ',' and depth == 0:
+                parts.append(current)
+                current = []
+                continue
+        current.append(token)
+    if current:
+        parts.append(current)
+    return parts
+
+def _declared_name(tokens):
+    # Name in "Type name", "Type name = ...", "Type name[]" or "Type... name"
+    for i, (kind, value, _, _) in enumerate(tokens):
+        if kind == 'symbol' and value == '=':
+            tokens = tokens[:i]
+            break
+    words = [value for kind, value, _, _ in tokens if kind == 'word']
+    return words[-1] if words else None
+
+def _field_names(tokens):
+    tokens = [t for t in tokens if t[0] != 'annotation']
+    return [name for name in map(_declared_name, _split_top_level(tokens)) if name]
+
+def _method_signature(tokens):
+    # (name, parameter names, modifiers) of a method declaration
+    tokens = [t for t in tokens if t[0] != 'annotation']
+    open_at = next(i for i, t in enumerate(tokens) if t[0] == 'symbol' and t[1] == '(')
+    name = tokens[open_at - 1][1] if open_at else ''
+    depth, close_at = 0, len(tokens)
+    for i in range(open_at, len(tokens)):
+        if tokens[i][0] == 'symbol' and tokens[i][1] == '(':
+            depth += 1
+        elif tokens[i][0] == 'symbol' and tokens[i][1] == ')':
+            depth -= 1
+            if depth == 0:
+                close_at = i
+                break
+    params = [_declared_name(part) for part in _split_top_level(tokens[open_at + 1:close_at])]
+    modifiers = {value for kind, value, _, _ in tokens[:open_at] if kind == 'word'}
+    return name, [p for p in params if p], modifiers
+
+def parse_members(text):
+    # Per-type members for cohesion metrics: the package, instance field
+    # names and, for every method, its name, parameters and body tokens.
+    # Nested types are listed separately with dotted names ("Outer.Inner").
+    package = ''
+    types = []
+    stack = []
+    for event, tokens, extra in _walk(text, keep_bodies=True):
+        current = stack[-1] if stack else None
+        if event == 'statement':
+            words = [t[1] for t in tokens if t[0] == 'word']
+            if words and words[0] == 'package':
+                package = ''.join(t[1] for t in tokens[1:])
+        elif event == 'type':
+            kind, name = _type_header(tokens, extra)
+            nested = {
+                'package': package,
+                'name': current['name'] + '.' + name if current else name,
+                'simple_name': name,
+                'kind': kind,
+                'fields': [],
+                'methods': [],
+            }
+            types.append(nested)
+            stack.append(nested)
+        elif event == 'end':
+            stack.pop()
+        elif event == 'field':
+            modifiers = {t[1] for t in tokens if t[0] == 'word'}
+            # Interface and annotation fields are implicitly static constants
+            if 'static' not in modifiers and current['kind'] not in ('interface', 'annotation'):
+                current['fields'].extend(_field_names(tokens))
+        elif event == 'method':
+            name, params, modifiers = _method_signature(tokens)
+            current['methods'].append({
+                'name': name,
+                'params': params,
+                'static': 'static' in modifiers,
+                'constructor': name == current['simple_name'],
+                'body': extra or [],
+            })
+    return types
+
+def _enum_constants(tokens):
+    # Constant names at the start of an enum body ("A, B(1), C")
+    names = []
+    depth = 0
+    expect_name = True
+    for kind, value, _, _ in tokens:
+        if kind == 'symbol' and value == '(':
+            depth += 1
+        elif kind == 'symbol' and value == ')':
+            depth -= 1
+        elif depth == 0 and kind == 'symbol' and value == ',':
+            expect_name = True
+        elif depth == 0 and expect_name and kind == 'word':
+            names.append(value)
+            expect_name = False
+    return names
+
+def read_source(path):
+    # Memory-mapped read; empty files can't be mapped
+    with open(path, 'rb') as f:
+        try:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                return m[:].decode('utf-8', errors='replace')
+        except ValueError:
+            return ''
+
+def _cache_file(path, cache_dir):
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, key[:2], key + '.json')
+
+def load_outline(path, cache_dir=OUTLINE_CACHE_DIR):
+    # Parse one file, memoised on disk by (path, mtime)
+    mtime = os.stat(path).st_mtime_ns
+    cache_path = _cache_file(path, cache_dir) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                cached = json.load(f)
+            if cached['version'] == OUTLINE_VERSION and cached['mtime_ns'] == mtime:
+                return cached['types']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    types = parse_outline(read_source(path))
+    if cache_path:
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({'version': OUTLINE_VERSION, 'mtime_ns': mtime, 'types': types}, f)
+        except OSError:
+            pass  # Caching is best effort
+    return types
+
+def _load_outline_safe(args):
+    path, cache_dir = args
+    try:
+        return path, load_outline(path, cache_dir), None
+    except Exception as e:
+        return path, None, str(e)
+
+def load_outlines(paths, cache_dir=OUTLINE_CACHE_DIR, workers=None, pool=None):
+    # Outlines for many files at once; returns {path: (types or None, error)}.
+    # Large batches are spread over a process pool (an existing `pool` can be
+    # shared between calls), small ones are parsed in-process.
+    unique = list(dict.fromkeys(p for p in paths if p))
+    jobs = [(path, cache_dir) for path in unique]
+    if pool is not None:
+        results = pool.map(_load_outline_safe, jobs, chunksize=8)
+    elif len(jobs) >= MIN_FILES_FOR_POOL and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            results = list(own_pool.map(_load_outline_safe, jobs, chunksize=8))
+    else:
+        results = map(_load_outline_safe, jobs)
+    return {path: (types, error) for path, types, error in results}
+
+def find_type(types, class_name=None):
+    # The outline for `class_name` (simple or qualified), else the first
+    # top-level type in the file
+    if class_name:
+        simple_name = class_name.split('.')[-1]
+        for outline in types:
+            if outline['name'] == simple_name:
+                return outline
+    for outline in types:
+        if outline['parent'] is None:
+            return outline
+    return types[0] if types else None
+
+def format_outline(outline, max_fields=3, max_methods=5):
+    # Compact Java-looking summary for report tables
+    lines = [outline['declaration'] + ' {']
+    if outline['constants']:
+        lines.append('    ' + ', '.join(outline['constants'][:8]) + (', ...' if len(outline['constants']) > 8 else '') + ';')
+    for field in outline['fields'][:max_fields]:
+        lines.append(f"    {field};")
+    for method in outline['methods'][:max_methods]:
+        lines.append(f"    {method} {{ ... }}")
+    hidden = max(len(outline['fields']) - max_fields, 0) + max(len(outline['methods']) - max_methods, 0)
+    if hidden:
+        lines.append(f"    // ... {hidden} more members")
+    lines.append('}')
+    return '\n'.join(lines)
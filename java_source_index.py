@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+INDEX_CACHE_DIR = '.java_index_cache'
+INDEX_VERSION = 2
+
+# Comments and string/char literals are blanked before looking for
+# declarations, so commented-out code or "class Foo" in a string is ignored
+_NOISE = re.compile(r'//[^\n]*|/\*.*?\*/|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'', re.DOTALL)
+_PACKAGE = re.compile(r'^\s*package\s+([\w.]+)\s*;', re.MULTILINE)
+_TYPE = re.compile(r'(?<![\w.$])(?:class|interface|enum|record)\s+([A-Za-z_$][\w$]*)')
+
+def scan_java_file(path):
+    # Package and declared type names (top-level and nested) of one file
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            content = _NOISE.sub(' ', f.read())
+    except OSError:
+        return {'package': '', 'types': []}
+    package = _PACKAGE.search(content)
+    types = list(dict.fromkeys(_TYPE.findall(content)))
+    return {'package': package.group(1) if package else '', 'types': types}
+
+def _scan_directory(path, cached):
+    # One directory level: subdirectories plus parsed .java files. The
+    # directory is always listed (an edit inside a file doesn't change the
+    # directory's mtime), but a file is only re-read when its mtime or size
+    # differs from the cached scan.
+    subdirs = []
+    files = {}
+    old_files = cached['files'] if cached else {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif entry.name.endswith('.java') and entry.is_file():
+                    st = entry.stat()
+                    old = old_files.get(entry.name)
+                    if old is not None and old['mtime_ns'] == st.st_mtime_ns and old['size'] == st.st_size:
+                        files[entry.name] = old
+                    else:
+                        info = scan_java_file(entry.path)
+                        info.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                        files[entry.name] = info
+    except OSError:
+        return None
+    return {'subdirs': sorted(subdirs), 'files': files}
+
+class JavaSourceIndex:
+    # Maps fully qualified and simple class names (including nested types)
+    # to the .java file declaring them, built in one pass over the tree and
+    # cached on disk. Files whose mtime and size are unchanged since the
+    # cached scan are not read again, but every build still lists every
+    # directory and stats every .java file: a directory's mtime doesn't
+    # change when a file in it is edited, so no directory can be skipped.
+    def __init__(self, src_root, dirs):
+        self.src_root = src_root
+        self.dirs = dirs
+        self.by_fqn = {}
+        self.by_simple_name = {}
+        for rel, entry in sorted(dirs.items()):
+            for filename, info in sorted(entry['files'].items()):
+                path = os.path.join(src_root, rel, filename) if rel else os.path.join(src_root, filename)
+                stem = filename[:-len('.java')]
+                prefix = info['package'] + '.' if info['package'] else ''
+                for type_name in info['types']:
+                    self.by_fqn.setdefault(prefix + type_name, path)
+                    if type_name != stem:
+                        self.by_fqn.setdefault(prefix + stem + '.' + type_name, path)
+                    self.by_simple_name.setdefault(type_name, []).append((info['package'], path))
+
+    def find(self, class_name):
+        path = self.by_fqn.get(class_name)
+        if path:
+            return path
+        # Fall back to the simple name, preferring a file in the same package
+        package, _, simple_name = class_name.rpartition('.')
+        candidates = self.by_simple_name.get(simple_name)
+        if not candidates:
+            return None
+        for candidate_package, candidate_path in candidates:
+            if candidate_package == package:
+                return candidate_path
+        return candidates[0][1]
+
+    def paths(self):
+        # Every indexed .java file, in a stable order
+        return [
+            os.path.join(self.src_root, rel, filename) if rel else os.path.join(self.src_root, filename)
+            for rel, entry in sorted(self.dirs.items()) for filename in sorted(entry['files'])
+        ]
+
+    def __len__(self):
+        return len(self.by_fqn)
+
+def _cache_file(src_root, cache_dir):
+    key = hashlib.sha1(os.path.abspath(src_root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, key + '.json')
+
+def build_source_index(src_root, cache_dir=INDEX_CACHE_DIR, workers=None):
+    # Breadth-first scan with one task per directory; the thread pool overlaps
+    # the filesystem calls and file reads, which release the GIL
+    cached_dirs = {}
+    cache_path = _cache_file(src_root, cache_dir) if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                cached_dirs = data['dirs']
+        except (OSError, ValueError, KeyError):
+            cached_dirs = {}
+
+    dirs = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        level = ['']
+        while level:
+            scans = pool.map(
+                lambda rel: _scan_directory(os.path.join(src_root, rel), cached_dirs.get(rel)),
+                level,
+            )
+            next_level = []
+            for rel, entry in zip(level, scans):
+                if entry is None:
+                    continue
+                dirs[rel] = entry
+                next_level.extend(os.path.join(rel, sub) if rel else sub for sub in entry['subdirs'])
+            level = next_level
+
+    if cache_path and dirs != cached_dirs:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(cache_path, 'w') as f:
+                json.dump({'version': INDEX_VERSION, 'root': os.path.abspath(src_root), 'dirs': dirs}, f)
+        except OSError as e:
+            print(f"Warning: could not write source index cache {cache_path}: {e}", file=sys.stderr)
+    return JavaSourceIndex(src_root, dirs)
@@ -1,9 +1,10 @@
 import os
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-def analyze_lcom_results(output_dir):
+from lcom_select import add_class_names, compact_frame, quantile_thresholds, read_lcom_metrics, top_n
+from profiling import count, phase, start_profiling, stop_profiling
+
+def find_metrics_file(output_dir):
+    # TypeMetrics.csv from the external tool, or the first CSV in output_dir
     print(f"Looking for LCOM results in: {output_dir}")
     if not os.path.exists(output_dir):
         print(f"Error: Output directory '{output_dir}' does not exist!")
@@ -23,19 +24,111 @@ def analyze_lcom_results(output_dir):
         else:
             print("Error: No CSV files found in the output directory!")
             return None
-    
-    # Load LCOM results from CSV
+    return metrics_file
+
+def load_type_metrics(output_dir):
+    metrics_file = find_metrics_file(output_dir)
+    return read_lcom_metrics(metrics_file) if metrics_file else None
+
+def plot_top_classes(top_classes, heatmap_cols, output_dir='.'):
+    # Heatmap and LCOM1 bar chart of the selected classes. The rendering
+    # stage (matplotlib/seaborn on an Agg canvas) is only imported here, and
+    # figures whose data hasn't changed are copied from the plot cache.
+    try:
+        from lcom_render import render_lcom_plots
+        rendered = render_lcom_plots(top_classes, heatmap_cols, output_dir)
+        for path, drawn in rendered.items():
+            print(f"Saved {path}" + ("" if drawn else " (unchanged, from cache)"))
+    except Exception as e:
+        print(f"Warning: Error creating visualizations: {e}")
+        import traceback
+        traceback.print_exc()
+
+def analyze_lcom_streaming(output_dir, chunk_rows=None, top=15, plot_dir='.', plots=True, results_dir='.'):
+    # Out-of-core variant for metric files larger than memory (lcom_stream):
+    # chunked passes with running top-k and quantile sketches, results
+    # written into results_dir as partitioned Parquet instead of one sorted
+    # CSV. Returns the summary dict from stream_lcom_results.
+    from lcom_stream import stream_lcom_results
+    try:
+        metrics_file = find_metrics_file(output_dir)
+        if metrics_file is None:
+            return None
+        kwargs = {'chunk_rows': chunk_rows} if chunk_rows else {}
+        with phase('stream'):
+            summary = stream_lcom_results(metrics_file, results_dir, top=max(top, 10), **kwargs)
+        count('classes', summary['rows'])
+        print(f"Streamed LCOM data for {summary['rows']} classes")
+        
+        print("==== LCOM Analysis Results ====")
+        for metric in ('LCOM1', 'LCOM5', 'YALCOM'):
+            if metric in summary['top']:
+                print(f"\nTop 10 classes with highest {metric} values:")
+                print(summary['top'][metric][['ClassName', metric]].head(10))
+        
+        print("\n==== Classes with High LCOM Values ====")
+        for metric, threshold in summary['thresholds'].items():
+            print(f"Using approximate {metric} threshold of {threshold}")
+        if summary['concerning_rows']:
+            print(f"\n{summary['concerning_rows']} classes may need functional decomposition; "
+                  f"written to {summary['concerning_path']}")
+        else:
+            print("\nNo classes with critically high LCOM values found.")
+        
+        if plots and 'LCOM1' in summary['top']:
+            print("\nGenerating visualizations...")
+            top_classes = summary['top']['LCOM1'].head(top)
+            with phase('plots'):
+                plot_top_classes(top_classes, [col for col in top_classes.columns if 'LCOM' in col], plot_dir)
+        
+        print(f"Saved LCOM results to {summary['results_path']}")
+        return summary
+    except ValueError as e:
+        # Unusable input (e.g. no column to name the classes by)
+        print(f"Error analyzing LCOM results: {e}")
+        return None
+    except Exception as e:
+        print(f"Error analyzing LCOM results: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def analyze_lcom_results(output_dir, src_root=None, store=None, top=15, plot_dir='.', plots=True, results_dir='.'):
+    # With src_root the metrics are computed natively from the Java sources
+    # (see lcom_engine) instead of being read from a TypeMetrics.csv. With a
+    # store they come from the incremental metrics store, which is first
+    # brought up to date with src_root when that is given too (lcom_store).
+    # The `top` classes by LCOM1 are plotted into plot_dir unless plots=False;
+    # the sorted results are saved as lcom_results.csv in results_dir.
     try:
-        df = pd.read_csv(metrics_file)
+        with phase('load'):
+            if store is not None:
+                from lcom_store import load_metrics, update_store
+                if src_root is not None:
+                    summary = update_store(src_root, store)
+                    print(f"Updated {store}: {summary['measured']} files measured, "
+                          f"{summary['unchanged']} unchanged, {summary['removed']} removed")
+                df = load_metrics(store)
+            elif src_root is not None:
+                from lcom_engine import compute_lcom
+                print(f"Computing LCOM metrics from sources in: {src_root}")
+                df = compute_lcom(src_root)
+            else:
+                df = load_type_metrics(output_dir)
+                if df is None:
+                    return None
+            compact_frame(df)
+        count('classes', len(df))
         print(f"Successfully loaded LCOM data with {len(df)} classes")
         
         # Print column names to verify structure
         print("CSV columns:", df.columns.tolist())
         
         # Create a ClassName column as a combination of package and type name for better readability
-        try:
-            df['ClassName'] = df['Package Name'] + '.' + df['Type Name']
-        except KeyError:
+        if 'Package Name' in df.columns and 'Type Name' in df.columns:
+            with phase('class_names'):
+                add_class_names(df)
+        else:
             # If columns are different, try to identify the right ones
             if 'Type Name' in df.columns:
                 df['ClassName'] = df['Type Name']
@@ -48,34 +141,34 @@ def analyze_lcom_results(output_dir):
                 if 'ClassName' not in df.columns:
                     df['ClassName'] = df.iloc[:, 0]  # Use first column as fallback
         
-        # Sort by LCOM1 (or another metric of choice)
-        df_sorted = df.sort_values(by='LCOM1', ascending=False)
-        
+        # Rankings are selections (nlargest), not sorts of the whole frame
         print("==== LCOM Analysis Results ====")
         print("\nTop 10 classes with highest LCOM1 values:")
-        print(df_sorted[['ClassName', 'LCOM1']].head(10))
+        print(top_n(df, 'LCOM1', 10)[['ClassName', 'LCOM1']])
         
         # Show other metrics if available
         if 'LCOM5' in df.columns:
             print("\nTop 10 classes with highest LCOM5 values:")
-            print(df_sorted.sort_values(by='LCOM5', ascending=False)[['ClassName', 'LCOM5']].head(10))
+            print(top_n(df, 'LCOM5', 10)[['ClassName', 'LCOM5']])
         
         if 'YALCOM' in df.columns:
             print("\nTop 10 classes with highest YALCOM values:")
-            print(df_sorted.sort_values(by='YALCOM', ascending=False)[['ClassName', 'YALCOM']].head(10))
+            print(top_n(df, 'YALCOM', 10)[['ClassName', 'YALCOM']])
         
         # Classes with concerning cohesion (high LCOM values)
         print("\n==== Classes with High LCOM Values ====")
         
         # Adaptive thresholds based on the data distribution
-        lcom1_threshold = df['LCOM1'].quantile(0.9)  # Top 10% of values
+        with phase('thresholds'):
+            thresholds = quantile_thresholds(df, ['LCOM1', 'LCOM5'], 0.9)  # Top 10% of values
+        lcom1_threshold = thresholds['LCOM1']
         print(f"Using LCOM1 threshold of {lcom1_threshold}")
         
         # Create filter conditions based on available columns
         filter_conditions = (df['LCOM1'] > lcom1_threshold)
         
         if 'LCOM5' in df.columns and not df['LCOM5'].isna().all():
-            lcom5_threshold = df['LCOM5'].quantile(0.9)
+            lcom5_threshold = thresholds['LCOM5']
             filter_conditions = filter_conditions | (df['LCOM5'] > lcom5_threshold)
         
         concerning_classes = df[filter_conditions]
@@ -88,55 +181,20 @@ def analyze_lcom_results(output_dir):
             print("\nNo classes with critically high LCOM values found.")
         
         # Create visualizations
-        print("\nGenerating visualizations...")
-        try:
-            # Select the top 15 classes for visualization
-            top_classes = df_sorted.head(15)
-            
-            # Create a heatmap of the LCOM metrics
-            plt.figure(figsize=(12, 8))
-            
-            # Use shortened class names for better readability
-            class_names = top_classes['ClassName'].apply(lambda x: x.split('.')[-1] if '.' in str(x) else x)
-            
-            # Prepare the data for heatmap - only select LCOM metric columns
-            heatmap_cols = [col for col in df.columns if 'LCOM' in col]
-            heatmap_data = top_classes[heatmap_cols].copy()
-            heatmap_data.index = class_names
-            
-            sns.heatmap(
-                heatmap_data, 
-                annot=True, 
-                cmap="YlOrRd"
-            )
-            plt.title("LCOM Metrics for Top 15 Classes")
-            plt.savefig("lcom_heatmap.png", bbox_inches='tight')
-            print("Saved LCOM metrics heatmap to lcom_heatmap.png")
-            
-            # Create a bar chart for LCOM1
-            plt.figure(figsize=(14, 8))
-            
-            # Create a new DataFrame with shortened class names
-            bar_data = pd.DataFrame({
-                'ClassName': class_names,
-                'LCOM1': top_classes['LCOM1'].values
-            })
-            
-            sns.barplot(x='ClassName', y='LCOM1', data=bar_data)
-            plt.title("LCOM1 Values for Top 15 Classes")
-            plt.xticks(rotation=45, ha='right')
-            plt.tight_layout()
-            plt.savefig("lcom1_barchart.png")
-            print("Saved LCOM1 bar chart to lcom1_barchart.png")
-            
-        except Exception as e:
-            print(f"Warning: Error creating visualizations: {e}")
-            import traceback
-            traceback.print_exc()
-        
-        # Save the results to a CSV file for further analysis
-        df_sorted.to_csv("lcom_results.csv", index=False)
-        print("Saved LCOM results to lcom_results.csv")
+        if plots:
+            print("\nGenerating visualizations...")
+            top_classes = top_n(df, 'LCOM1', top)
+            with phase('plots'):
+                plot_top_classes(top_classes, [col for col in df.columns if 'LCOM' in col], plot_dir)
+        
+        # Save the results to a CSV file for further analysis; the saved file
+        # is ordered by LCOM1, which is the one full sort left
+        results_path = os.path.join(results_dir, "lcom_results.csv")
+        with phase('save'):
+            df_sorted = df.sort_values(by='LCOM1', ascending=False, ignore_index=True)
+            os.makedirs(results_dir, exist_ok=True)
+            df_sorted.to_csv(results_path, index=False)
+        print(f"Saved LCOM results to {results_path}")
         
         return df_sorted
     except Exception as e:
@@ -146,17 +204,40 @@ def analyze_lcom_results(output_dir):
         return None
 
 if __name__ == "__main__":
-    import sys
+    import argparse
     
-    # Allow specifying the output directory as a command line argument
-    if len(sys.argv) > 1:
-        output_dir = sys.argv[1]
-    else:
-        output_dir = "lcom_output"
+    parser = argparse.ArgumentParser(description='Analyze LCOM metrics of Java types')
+    parser.add_argument('output_dir', nargs='?', default='lcom_output',
+                        help='Directory holding TypeMetrics.csv (default: lcom_output)')
+    parser.add_argument('--src', dest='src_root', default=None,
+                        help='Compute the metrics natively from this Java source tree instead')
+    parser.add_argument('--store', default=None,
+                        help='Read metrics from this incremental store, updating it from --src if given')
+    parser.add_argument('--stream', action='store_true',
+                        help='Process the metrics CSV in chunks on a fixed memory budget (for files larger than RAM)')
+    parser.add_argument('--chunk-rows', type=int, default=None,
+                        help='Rows per chunk in --stream mode (default: 1,000,000)')
+    parser.add_argument('--top', type=int, default=15, help='Classes shown in the plots (default: 15)')
+    parser.add_argument('--plot-dir', default='.', help='Directory the plots are written to (default: .)')
+    parser.add_argument('--results-dir', default='.',
+                        help='Directory the analysed results are written to (default: .)')
+    parser.add_argument('--no-plots', action='store_true', help='Skip rendering the plots')
+    parser.add_argument('--profile', metavar='REPORT',
+                        help='Record per-phase wall time, peak RSS and counts into this JSON file')
+    args = parser.parse_args()
+    if args.profile:
+        start_profiling('lcom_analyzer')
     
-    lcom_results = analyze_lcom_results(output_dir)
+    if args.stream:
+        lcom_results = analyze_lcom_streaming(args.output_dir, args.chunk_rows, args.top, args.plot_dir, not args.no_plots,
+                                               args.results_dir)
+    else:
+        lcom_results = analyze_lcom_results(args.output_dir, args.src_root, args.store, args.top, args.plot_dir,
+                                            not args.no_plots, args.results_dir)
     
     if lcom_results is not None:
-        print("\nAnalysis complete. Visualizations saved as lcom_heatmap.png and lcom1_barchart.png")
+        print("\nAnalysis complete." + ("" if args.no_plots else f" Visualizations saved in {args.plot_dir}"))
     else:
         print("\nAnalysis failed. Please check the error messages above.")
+    
+    stop_profiling(args.profile)
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from lcom_select import add_class_names, quantile_thresholds, rank_slice, read_lcom_metrics, top_n
+
+DEFAULT_ROWS = [100_000, 1_000_000, 10_000_000]
+
+def synthetic_metrics(rows, seed=0):
+    # A TypeMetrics-shaped frame with realistic name repetition: about 40
+    # types per package and heavy-tailed LCOM values
+    rng = np.random.default_rng(seed)
+    packages = max(rows // 40, 1)
+    package_names = [f"org.example.module{p // 100}.feature{p % 100}" for p in range(packages)]
+    type_names = [f"Type{t}Service" for t in range(max(rows // packages, 1) * 4)]
+    lcom1 = np.floor(rng.pareto(1.2, rows) * 20)
+    return pd.DataFrame({
+        'Project Name': pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), ['.']),
+        'Package Name': pd.Categorical.from_codes(rng.integers(0, packages, rows), package_names),
+        'Type Name': pd.Categorical.from_codes(rng.integers(0, len(type_names), rows), type_names),
+        'LCOM1': lcom1,
+        'LCOM2': np.maximum(lcom1 - np.floor(rng.pareto(1.5, rows) * 20), 0),
+        'LCOM3': rng.integers(1, 40, rows).astype(float),
+        'LCOM4': rng.integers(1, 30, rows).astype(float),
+        'LCOM5': rng.random(rows) * 1.1,
+        'YALCOM': rng.random(rows),
+    })
+
+def baseline_pipeline(path):
+    # What analyze_lcom_results and generate_lcom_table used to do: object
+    # strings, per-row concatenation and a full sort for every ranking
+    df = pd.read_csv(path)
+    df['ClassName'] = df['Package Name'] + '.' + df['Type Name']
+    df_sorted = df.sort_values(by='LCOM1', ascending=False)
+    df_sorted[['ClassName', 'LCOM1']].head(10)
+    df_sorted.sort_values(by='LCOM5', ascending=False)[['ClassName', 'LCOM5']].head(10)
+    df_sorted.sort_values(by='YALCOM', ascending=False)[['ClassName', 'YALCOM']].head(10)
+    concerning = df[(df['LCOM1'] > df['LCOM1'].quantile(0.9)) | (df['LCOM5'] > df['LCOM5'].quantile(0.9))]
+    df_sorted.head(15)
+    mid = len(df) // 3
+    pd.concat([
+        df.sort_values(by='LCOM1', ascending=False).head(4),
+        df.sort_values(by='LCOM1', ascending=False).iloc[mid:mid + 3],
+        df.sort_values(by='LCOM1', ascending=True).head(3),
+    ])
+    return df, len(concerning)
+
+def selection_pipeline(path):
+    # The same questions through lcom_select
+    df = read_lcom_metrics(path)
+    add_class_names(df)
+    top_n(df, 'LCOM1', 10)
+    top_n(df, 'LCOM5', 10)
+    top_n(df, 'YALCOM', 10)
+    thresholds = quantile_thresholds(df, ['LCOM1', 'LCOM5'], 0.9)
+    concerning = df[(df['LCOM1'] > thresholds['LCOM1']) | (df['LCOM5'] > thresholds['LCOM5'])]
+    top_n(df, 'LCOM1', 15)
+    mid = len(df) // 3
+    pd.concat([top_n(df, 'LCOM1', 4), rank_slice(df, 'LCOM1', mid, mid + 3), top_n(df, 'LCOM1', 3, largest=False)])
+    return df, len(concerning)
+
+PIPELINES = {'baseline': baseline_pipeline, 'selection': selection_pipeline}
+
+def _peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def run_case(pipeline, path):
+    # Runs in a fresh worker process, so the peak RSS belongs to this case only
+    before = _peak_rss_mb()
+    start = time.perf_counter()
+    df, concerning = PIPELINES[pipeline](path)
+    seconds = time.perf_counter() - start
+    return {
+        'pipeline': pipeline,
+        'seconds': round(seconds, 3),
+        'peak_rss_mb': round(_peak_rss_mb() - before, 1),
+        'frame_mb': round(df.memory_usage(deep=True).sum() / (1024 * 1024), 1),
+        'concerning': concerning,
+    }
+
+def run_benchmark(sizes, workdir=None):
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for rows in sizes:
+            path = os.path.join(tmp, f"metrics_{rows}.csv")
+            synthetic_metrics(rows).to_csv(path, index=False)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            for pipeline in PIPELINES:
+                with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+                    result = pool.submit(run_case, pipeline, path).result()
+                result.update({'rows': rows, 'csv_mb': round(size_mb, 1)})
+                print("{:>10} {:<10} {:>9.2f}s {:>10.1f} MB peak {:>8.1f} MB frame".format(
+                    rows, pipeline, result['seconds'], result['peak_rss_mb'], result['frame_mb']))
+                results.append(result)
+            os.remove(path)
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory of LCOM result loading and ranking")
+    parser.add_argument("--rows", type=int, nargs='+', default=DEFAULT_ROWS,
+                        help="row counts to benchmark (default: 100k, 1M and 10M)")
+    parser.add_argument("-o", "--output", help="also write the results as JSON")
+    parser.add_argument("--workdir", help="where the temporary CSV files are written")
+    args = parser.parse_args()
+
+    print("{:>10} {:<10} {:>10} {:>15} {:>13}".format("Rows", "Pipeline", "Time", "Memory", "Frame"))
+    results = run_benchmark(args.rows, args.workdir)
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(results, out, indent=2)
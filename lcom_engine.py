@@ -0,0 +1,204 @@
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from dependency_graph import CompactGraph
+from java_outline import MIN_FILES_FOR_POOL, parse_members, read_source, type_argument_brackets
+from java_source_index import build_source_index
+from profiling import count, phase
+
+# Same layout as the TypeMetrics.csv-derived lcom_results.csv
+LCOM_COLUMNS = [
+    'Project Name', 'Package Name', 'Type Name',
+    'LCOM1', 'LCOM2', 'LCOM3', 'LCOM4', 'LCOM5', 'YALCOM', 'ClassName',
+]
+
+# Bumped whenever a parser or metric change can alter the results, so the
+# metrics store (lcom_store) re-measures files it measured before
+METRICS_VERSION = 2
+
+# Words that can precede a name without declaring it ("return x;")
+_NOT_TYPES = {
+    'return', 'throw', 'new', 'case', 'else', 'yield', 'assert', 'do',
+    'instanceof', 'final', 'this', 'super',
+}
+
+def method_usage(methods, fields):
+    # Method x field access matrix and method x method call matrix of one
+    # type. A name counts as a field access when it is a field of the type
+    # and isn't shadowed by a parameter or local declared earlier in the
+    # method, or when it is qualified with "this.". Calls to overloaded
+    # names link to every overload.
+    field_index = {name: j for j, name in enumerate(fields)}
+    method_index = {}
+    for i, method in enumerate(methods):
+        method_index.setdefault(method['name'], []).append(i)
+
+    access = np.zeros((len(methods), len(fields)), dtype=bool)
+    calls = np.zeros((len(methods), len(methods)), dtype=bool)
+    for i, method in enumerate(methods):
+        body = method['body']
+        local = set(method['params'])
+        # Only a '>' closing "List<String>" can end a declaration's type,
+        # not a comparison ("i > size)") or a lambda arrow ("() -> size")
+        brackets = type_argument_brackets(body)
+        for k, (kind, value, _, _) in enumerate(body):
+            if kind != 'word':
+                continue
+            previous = body[k - 1] if k else None
+            following = body[k + 1] if k + 1 < len(body) else None
+            qualified = False
+            if previous is not None and previous[1] == '.':
+                if k < 2 or body[k - 2][1] != 'this':
+                    continue  # Member of some other object
+                qualified = True
+
+            if following is not None and following[1] == '(':
+                for callee in method_index.get(value, ()):
+                    calls[i, callee] = True
+                continue
+
+            if not qualified and previous is not None and following is not None \
+                    and following[1] in ('=', ';', ':', ',', ')') \
+                    and ((previous[0] == 'word' and previous[1] not in _NOT_TYPES) or previous[1] == ']'
+                         or (previous[1] == '>' and k - 1 in brackets)):
+                local.add(value)  # Local variable or lambda/catch parameter declaration
+                continue
+
+            j = field_index.get(value)
+            if j is not None and (qualified or value not in local):
+                access[i, j] = True
+    return access, calls
+
+def _component_count(m, sources, targets):
+    # Connected components of an undirected method graph given one direction
+    # of each edge; strongly connected components of the symmetric graph
+    graph = CompactGraph(list(range(m)), np.concatenate([sources, targets]).astype(np.int32),
+                         np.concatenate([targets, sources]).astype(np.int32))
+    return graph.components()[1]
+
+def lcom_metrics(access, calls):
+    # LCOM1-LCOM5 and YALCOM from the method x field access matrix:
+    #   LCOM1  method pairs sharing no field (P)
+    #   LCOM2  P - Q where Q is the pairs sharing a field, floored at 0
+    #          (0 when the type has no fields)
+    #   LCOM3  connected components of methods linked by a shared field
+    #   LCOM4  as LCOM3, with method calls as extra links
+    #   LCOM5  Henderson-Sellers: (m - mean methods per field) / (m - 1)
+    #   YALCOM LCOM4 components per method, -1 when the type has no fields
+    #          or no methods. This is our own reading of YALCOM: it agrees
+    #          with the reference TypeMetrics.csv for roughly three types in
+    #          four but not for all (AmazonS3Client there has LCOM4 26 and
+    #          YALCOM 23/320), and the reference tool's definition isn't
+    #          documented, so YALCOM values from the two sources aren't
+    #          comparable.
+    m, a = access.shape
+    if m:
+        # Shared-field counts for every method pair in one matrix product
+        matrix = access.astype(np.float32)
+        shares = (matrix @ matrix.T) > 0
+    else:
+        shares = np.zeros((0, 0), dtype=bool)
+    upper_i, upper_j = np.triu_indices(m, 1)
+    sharing = shares[upper_i, upper_j]
+    q = int(np.count_nonzero(sharing))
+    p = len(sharing) - q
+
+    lcom3 = _component_count(m, upper_i[sharing], upper_j[sharing])
+    linked = sharing | calls[upper_i, upper_j] | calls[upper_j, upper_i]
+    lcom4 = _component_count(m, upper_i[linked], upper_j[linked])
+
+    mean_accessors = access.sum() / a if a else 0.0
+    return {
+        'LCOM1': float(p),
+        'LCOM2': float(max(p - q, 0)) if a else 0.0,
+        'LCOM3': float(lcom3),
+        'LCOM4': float(lcom4),
+        'LCOM5': float((m - mean_accessors) / (m - 1)) if m > 1 else 0.0,
+        'YALCOM': lcom4 / m if a and m else -1.0,
+    }
+
+def type_metrics(text, project_name='.'):
+    # One row per type (nested types included) declared in a Java source
+    rows = []
+    for declared in parse_members(text):
+        # Constructors initialise state rather than use it, so they are left out
+        methods = [method for method in declared['methods'] if not method['constructor']]
+        access, calls = method_usage(methods, declared['fields'])
+        package = declared['package']
+        row = {'Project Name': project_name, 'Package Name': package, 'Type Name': declared['name']}
+        row.update(lcom_metrics(access, calls))
+        row['ClassName'] = package + '.' + declared['name'] if package else declared['name']
+        rows.append(row)
+    return rows
+
+def _file_metrics_safe(args):
+    path, project_name = args
+    try:
+        return path, type_metrics(read_source(path), project_name), None
+    except Exception as e:
+        return path, [], str(e)
+
+def java_source_files(src_root, index=None):
+    # Every .java file under src_root, listed through the cached source index
+    if index is None:
+        index = build_source_index(src_root)
+    return index.paths()
+
+def measure_files(paths, project_name='.', workers=None, pool=None):
+    # Yields (path, rows, error) for each file. Large batches are spread
+    # over a process pool (an existing `pool` can be shared), small ones are
+    # measured in-process.
+    jobs = [(path, project_name) for path in paths]
+    if pool is not None:
+        return pool.map(_file_metrics_safe, jobs, chunksize=16)
+    if len(jobs) >= MIN_FILES_FOR_POOL and workers != 1:
+        with ProcessPoolExecutor(max_workers=workers) as own_pool:
+            return list(own_pool.map(_file_metrics_safe, jobs, chunksize=16))
+    return map(_file_metrics_safe, jobs)
+
+def compute_lcom(src_root, project_name=None, workers=None, pool=None, index=None):
+    # Native replacement for the external TypeMetrics.csv: parses every
+    # source under src_root and returns a DataFrame with the columns of
+    # lcom_results.csv
+    import pandas as pd
+
+    if project_name is None:
+        project_name = src_root
+    rows = []
+    with phase('index'):
+        files = java_source_files(src_root, index)
+    with phase('measure'):
+        for path, file_rows, error in measure_files(files, project_name, workers, pool):
+            if error is not None:
+                print(f"Warning: could not measure {path}: {error}", file=sys.stderr)
+            rows.extend(file_rows)
+    count('files_parsed', len(files))
+    count('types_measured', len(rows))
+    return pd.DataFrame(rows, columns=LCOM_COLUMNS)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compute LCOM metrics for a Java source tree')
+    parser.add_argument('src_root', help='Root directory of the Java sources')
+    parser.add_argument('-o', '--output', default=os.path.join('lcom_output', 'TypeMetrics.csv'),
+                        help='CSV file to write (default: lcom_output/TypeMetrics.csv)')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--project-name', default=None, help='Value of the Project Name column (default: src_root)')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.src_root):
+        print(f"Error: Source directory '{args.src_root}' does not exist!")
+        return 1
+    df = compute_lcom(args.src_root, args.project_name, args.workers)
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    df.to_csv(args.output, index=False)
+    print(f"Measured {len(df)} types; LCOM metrics written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
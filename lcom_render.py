@@ -0,0 +1,97 @@
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+PLOT_CACHE_DIR = '.lcom_plot_cache'
+
+# Bumped whenever the drawing code changes, so stale cached images aren't reused
+PLOT_VERSION = 1
+
+HEATMAP_FILE = 'lcom_heatmap.png'
+BARCHART_FILE = 'lcom1_barchart.png'
+
+def short_class_names(class_names):
+    return [name.split('.')[-1] if '.' in str(name) else name for name in class_names]
+
+def plot_key(kind, labels, data):
+    # Content hash of one figure: what is drawn, not where it is written
+    digest = hashlib.sha1(f"{kind}:{PLOT_VERSION}:".encode())
+    digest.update('\n'.join(map(str, labels)).encode('utf-8'))
+    digest.update('\n'.join(map(str, data.columns)).encode('utf-8'))
+    digest.update(data.to_numpy(dtype='float64').tobytes())
+    return digest.hexdigest()
+
+def _draw_heatmap(path, labels, data):
+    # matplotlib and seaborn are only imported once something has to be
+    # drawn; the Agg canvas never touches pyplot's global figure state
+    import seaborn as sns
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(12, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    heatmap_data = data.copy()
+    heatmap_data.index = labels
+    sns.heatmap(heatmap_data, annot=True, cmap="YlOrRd", ax=ax)
+    ax.set_title(f"LCOM Metrics for Top {len(labels)} Classes")
+    fig.savefig(path, bbox_inches='tight')
+
+def _draw_barchart(path, labels, data):
+    import pandas as pd
+    import seaborn as sns
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(14, 8))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    bar_data = pd.DataFrame({'ClassName': labels, 'LCOM1': data['LCOM1'].to_numpy()})
+    sns.barplot(x='ClassName', y='LCOM1', data=bar_data, ax=ax)
+    ax.set_title(f"LCOM1 Values for Top {len(labels)} Classes")
+    ax.tick_params(axis='x', labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    fig.tight_layout()
+    fig.savefig(path)
+
+def _cached_render(kind, draw, path, labels, data, cache_dir):
+    # Copy a previously rendered image with the same content hash, or draw
+    # it and keep a copy. Cache entries are written to a temporary file and
+    # renamed, so parallel workers rendering the same figure don't clash.
+    # Returns True when the figure was actually drawn.
+    cached = os.path.join(cache_dir, plot_key(kind, labels, data) + '.png') if cache_dir else None
+    if cached and os.path.exists(cached):
+        shutil.copyfile(cached, path)
+        return False
+    draw(path, labels, data)
+    if cached:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(suffix='.png', dir=cache_dir)
+            os.close(fd)
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, cached)
+        except OSError as e:
+            print(f"Warning: could not cache plot in {cache_dir}: {e}", file=sys.stderr)
+    return True
+
+def render_lcom_plots(top_classes, metric_cols, output_dir='.', heatmap_file=HEATMAP_FILE,
+                      barchart_file=BARCHART_FILE, cache_dir=PLOT_CACHE_DIR):
+    # Heatmap of every LCOM metric and a bar chart of LCOM1 for the given
+    # (already selected) top classes. Returns {path: True if drawn, False
+    # if reused from the cache}; a None file name skips that figure.
+    labels = short_class_names(top_classes['ClassName'].tolist())
+    data = top_classes[metric_cols].reset_index(drop=True)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    rendered = {}
+    if heatmap_file:
+        path = os.path.join(output_dir, heatmap_file)
+        rendered[path] = _cached_render('heatmap', _draw_heatmap, path, labels, data, cache_dir)
+    if barchart_file and 'LCOM1' in data.columns:
+        path = os.path.join(output_dir, barchart_file)
+        rendered[path] = _cached_render('barchart', _draw_barchart, path, labels, data[['LCOM1']], cache_dir)
+    return rendered
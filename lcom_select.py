@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+METRIC_COLUMNS = ['LCOM1', 'LCOM2', 'LCOM3', 'LCOM4', 'LCOM5', 'YALCOM']
+
+# Names repeat heavily across rows (every type of a package shares its
+# package name), so they are stored as categories rather than Python strings
+NAME_COLUMNS = ['Project Name', 'Package Name', 'Type Name', 'ClassName']
+
+# LCOM3/LCOM4 are component counts, exact in float32. The pair counts
+# (LCOM1/LCOM2) can outgrow float32's integer range and the ratios
+# (LCOM5/YALCOM) would lose digits in written results, so they stay float64.
+NARROW_COLUMNS = ['LCOM3', 'LCOM4']
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+
+def compact_frame(df):
+    # Categorical name columns and downcast metric columns, in place
+    for column in NAME_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+    for column in METRIC_COLUMNS:
+        if column in df.columns and df[column].dtype.kind == 'f':
+            df[column] = df[column].astype(np.float32 if column in NARROW_COLUMNS else np.float64)
+    return df
+
+def _concat_categorical(frames):
+    # pd.concat falls back to object dtype when chunk categories differ;
+    # unify them first so the result stays categorical
+    for column in NAME_COLUMNS:
+        if all(column in frame.columns for frame in frames):
+            categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+            for frame in frames:
+                frame[column] = frame[column].cat.set_categories(categories)
+    return pd.concat(frames, ignore_index=True)
+
+def read_lcom_metrics(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Load a metrics dump compactly. Parquet/Feather are read column-wise
+    # through Arrow; CSV is read in chunks, each compacted before the next is
+    # parsed, so peak memory stays near the size of the compact frame.
+    if path.endswith('.parquet'):
+        return compact_frame(pd.read_parquet(path))
+    if path.endswith('.feather'):
+        return compact_frame(pd.read_feather(path))
+
+    dtypes = {column: 'category' for column in NAME_COLUMNS}
+    frames = [compact_frame(chunk) for chunk in pd.read_csv(path, dtype=dtypes, chunksize=chunk_rows)]
+    if not frames:
+        return pd.read_csv(path)
+    return _concat_categorical(frames) if len(frames) > 1 else frames[0]
+
+def add_class_names(df):
+    # ClassName = "<package>.<type>", built once per distinct (package, type)
+    # pair from the category codes instead of concatenating every row.
+    # Types without a package keep their bare name.
+    packages = df['Package Name'].astype('category')
+    types = df['Type Name'].astype('category')
+    # Code 0 stands for a missing value in both lookups
+    package_names = [''] + packages.cat.categories.astype(str).tolist()
+    type_names = [''] + types.cat.categories.astype(str).tolist()
+    pairs = (packages.cat.codes.to_numpy().astype(np.int64) + 1) * len(type_names) \
+        + types.cat.codes.to_numpy() + 1
+    unique_pairs, inverse = np.unique(pairs, return_inverse=True)
+    names = []
+    for pair in unique_pairs.tolist():
+        package, type_name = package_names[pair // len(type_names)], type_names[pair % len(type_names)]
+        names.append(f"{package}.{type_name}" if package else type_name)
+    # Categories must be unique; distinct pairs can still spell the same name
+    categories, codes = np.unique(np.array(names, dtype=object), return_inverse=True)
+    df['ClassName'] = pd.Categorical.from_codes(codes[inverse].reshape(-1), categories)
+    return df
+
+def top_n(df, column, n, largest=True):
+    # The n rows with the largest (or smallest) values, without a full sort
+    return df.nlargest(n, column) if largest else df.nsmallest(n, column)
+
+def rank_slice(df, column, start, stop, largest=True):
+    # Rows ranked start..stop-1 by `column` (rank 0 = largest by default):
+    # one O(n) partition that puts exactly those ranks in place
+    n = len(df)
+    start, stop = max(start, 0), min(stop, n)
+    if start >= stop:
+        return df.iloc[0:0]
+    values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+    keys = -values if largest else values
+    keys = np.where(np.isnan(keys), np.inf, keys)  # NaN ranks last, as in sort_values
+    positions = np.argpartition(keys, np.arange(start, stop))[start:stop]
+    return df.iloc[positions]
+
+def quantile_thresholds(df, columns, q):
+    # Per-column quantiles in one call (selection-based, not a sort)
+    present = [column for column in columns if column in df.columns]
+    return df[present].quantile(q) if present else pd.Series(dtype=np.float64)
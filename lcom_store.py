@@ -0,0 +1,287 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+import urllib.request
+
+from lcom_engine import LCOM_COLUMNS, METRICS_VERSION, java_source_files, measure_files
+
+DEFAULT_STORE = 'lcom_metrics.sqlite'
+
+METRIC_COLUMNS = ['LCOM1', 'LCOM2', 'LCOM3', 'LCOM4', 'LCOM5', 'YALCOM']
+
+# Paths are stored relative to the source root, so a store stays valid when
+# the checkout moves. `history` keeps only the metric values that changed
+# in each run (old -> new), which is all the trend view needs. Classes are
+# identified by file and name together, as the same name can be declared
+# in more than one file (e.g. separate source sets).
+_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    path TEXT NOT NULL,
+    project TEXT NOT NULL,
+    package TEXT NOT NULL,
+    type_name TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    {', '.join(f'{m} REAL' for m in METRIC_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS metrics_path ON metrics (path);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started REAL NOT NULL,
+    src_root TEXT NOT NULL,
+    files_measured INTEGER NOT NULL,
+    files_removed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    run_id INTEGER NOT NULL,
+    class_name TEXT NOT NULL,
+    metric TEXT NOT NULL,
+    old_value REAL,
+    new_value REAL,
+    path TEXT
+);
+CREATE INDEX IF NOT EXISTS history_run ON history (run_id);
+'''
+
+def open_store(store_path=DEFAULT_STORE):
+    conn = sqlite3.connect(store_path)
+    conn.executescript(_SCHEMA)
+    # Stores written before history recorded the file get the column added;
+    # their earlier runs keep a NULL path
+    if 'path' not in {row[1] for row in conn.execute('PRAGMA table_info(history)')}:
+        conn.execute('ALTER TABLE history ADD COLUMN path TEXT')
+    return conn
+
+def _read_store(store_path):
+    # Read-only connection to an existing store; a mistyped path is an error
+    # rather than a new, empty store
+    if not os.path.isfile(store_path):
+        raise FileNotFoundError(f"No LCOM metrics store at '{store_path}'")
+    uri = f"file:{urllib.request.pathname2url(os.path.abspath(store_path))}?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+def file_hash(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _class_metrics(conn, paths):
+    # {(path, class name): {metric: value}} for the types declared in `paths`
+    found = {}
+    for start in range(0, len(paths), 500):
+        chunk = paths[start:start + 500]
+        query = (f"SELECT path, class_name, {', '.join(METRIC_COLUMNS)} FROM metrics "
+                 f"WHERE path IN ({', '.join('?' * len(chunk))})")
+        for row in conn.execute(query, chunk):
+            found[row[:2]] = dict(zip(METRIC_COLUMNS, row[2:]))
+    return found
+
+def _metric_changes(before, after):
+    # (class, metric, old, new, path) for every value that differs; added
+    # and removed classes show up with a None on one side
+    changes = []
+    for key in sorted(set(before) | set(after)):
+        old = before.get(key, {})
+        new = after.get(key, {})
+        for metric in METRIC_COLUMNS:
+            if old.get(metric) != new.get(metric):
+                changes.append((key[1], metric, old.get(metric), new.get(metric), key[0]))
+    return changes
+
+def update_store(src_root, store_path=DEFAULT_STORE, project_name=None, workers=None, pool=None, index=None):
+    # Bring the store in line with src_root, re-measuring only files whose
+    # content changed and dropping files that disappeared. Files with an
+    # unchanged size and mtime aren't even hashed. Returns a summary dict.
+    if project_name is None:
+        project_name = src_root
+    conn = open_store(store_path)
+    try:
+        # Metrics from an older engine version are measured again: clearing
+        # the recorded hashes makes every file look changed, while its old
+        # rows stay until then so the history shows what the upgrade changed
+        if conn.execute('PRAGMA user_version').fetchone()[0] != METRICS_VERSION:
+            with conn:
+                conn.execute("UPDATE files SET content_hash = '', mtime_ns = -1")
+                conn.execute(f'PRAGMA user_version = {METRICS_VERSION}')
+
+        known = {path: (content_hash, mtime, size)
+                 for path, content_hash, mtime, size in conn.execute('SELECT path, content_hash, mtime_ns, size FROM files')}
+
+        current = {}
+        for path in java_source_files(src_root, index):
+            rel = os.path.relpath(path, src_root)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            current[rel] = (path, st.st_mtime_ns, st.st_size)
+
+        changed = []   # (rel, hash, mtime, size) of files to re-measure
+        touched = []   # same content, new mtime
+        for rel, (path, mtime, size) in current.items():
+            old = known.get(rel)
+            if old is not None and old[1] == mtime and old[2] == size:
+                continue
+            content_hash = file_hash(path)
+            if old is not None and old[0] == content_hash:
+                touched.append((mtime, size, rel))
+            else:
+                changed.append((rel, content_hash, mtime, size))
+        removed = [rel for rel in known if rel not in current]
+
+        stale = [rel for rel, _, _, _ in changed] + removed
+        before = _class_metrics(conn, stale)
+        results = measure_files([current[rel][0] for rel, _, _, _ in changed], project_name, workers, pool)
+
+        with conn:
+            conn.executemany('UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?', touched)
+            for start in range(0, len(stale), 500):
+                chunk = stale[start:start + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                conn.execute(f'DELETE FROM metrics WHERE path IN ({placeholders})', chunk)
+                conn.execute(f'DELETE FROM files WHERE path IN ({placeholders})', chunk)
+
+            file_info = {rel: (content_hash, mtime, size) for rel, content_hash, mtime, size in changed}
+            for path, rows, error in results:
+                rel = os.path.relpath(path, src_root)
+                if error is not None:
+                    # Not recorded, so the file is retried on the next update
+                    print(f"Warning: could not measure {path}: {error}")
+                    continue
+                conn.execute('INSERT INTO files VALUES (?, ?, ?, ?)', (rel,) + file_info[rel])
+                conn.executemany(
+                    f"INSERT INTO metrics VALUES (?, ?, ?, ?, ?, {', '.join('?' * len(METRIC_COLUMNS))})",
+                    [(rel, row['Project Name'], row['Package Name'], row['Type Name'], row['ClassName'])
+                     + tuple(row[m] for m in METRIC_COLUMNS) for row in rows],
+                )
+
+            after = _class_metrics(conn, stale)
+            cursor = conn.execute('INSERT INTO runs (started, src_root, files_measured, files_removed) VALUES (?, ?, ?, ?)',
+                                  (time.time(), os.path.abspath(src_root), len(changed), len(removed)))
+            run_id = cursor.lastrowid
+            changes = _metric_changes(before, after)
+            conn.executemany('INSERT INTO history (run_id, class_name, metric, old_value, new_value, path) '
+                             'VALUES (?, ?, ?, ?, ?, ?)', [(run_id,) + change for change in changes])
+    finally:
+        conn.close()
+
+    return {
+        'run_id': run_id,
+        'files': len(current),
+        'measured': len(changed),
+        'unchanged': len(current) - len(changed),
+        'removed': len(removed),
+        'changed_values': len(changes),
+    }
+
+def load_metrics(store_path=DEFAULT_STORE):
+    # Current metrics as a DataFrame with the columns of lcom_results.csv
+    import pandas as pd
+
+    conn = _read_store(store_path)
+    try:
+        rows = conn.execute(
+            f"SELECT project, package, type_name, {', '.join(METRIC_COLUMNS)}, class_name FROM metrics ORDER BY path, rowid"
+        ).fetchall()
+    finally:
+        conn.close()
+    return pd.DataFrame(rows, columns=LCOM_COLUMNS)
+
+def lcom_trend(store_path=DEFAULT_STORE, run_id=None):
+    # Per-class metric deltas recorded by one update (default: the latest
+    # run that changed anything), one row per class and file with old/new/
+    # delta columns per changed metric and a status of added, removed or
+    # changed
+    import pandas as pd
+
+    conn = _read_store(store_path)
+    try:
+        if run_id is None:
+            row = conn.execute('SELECT MAX(run_id) FROM history').fetchone()
+            run_id = row[0]
+        # Stores from before history recorded the file have no path column
+        path = 'path' if 'path' in {row[1] for row in conn.execute('PRAGMA table_info(history)')} else 'NULL'
+        records = conn.execute(
+            f'SELECT {path}, class_name, metric, old_value, new_value FROM history WHERE run_id = ?', (run_id,)
+        ).fetchall() if run_id is not None else []
+    finally:
+        conn.close()
+
+    trend = {}
+    for path, class_name, metric, old, new in records:
+        entry = trend.setdefault((path, class_name),
+                                 {'ClassName': class_name, 'Path': path, 'added': True, 'removed': True})
+        entry['added'] &= old is None
+        entry['removed'] &= new is None
+        entry[f'{metric} old'] = old
+        entry[f'{metric} new'] = new
+        entry[f'{metric} delta'] = new - old if old is not None and new is not None else None
+
+    rows = []
+    for entry in trend.values():
+        added, removed = entry.pop('added'), entry.pop('removed')
+        entry['Status'] = 'added' if added else 'removed' if removed else 'changed'
+        rows.append(entry)
+    columns = ['ClassName', 'Path', 'Status'] + [f'{m} {part}' for m in METRIC_COLUMNS for part in ('old', 'new', 'delta')]
+    df = pd.DataFrame(rows, columns=columns)
+    df.attrs['run_id'] = run_id
+    return df
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Incremental LCOM metrics store')
+    parser.add_argument('--store', default=DEFAULT_STORE, help=f'SQLite store (default: {DEFAULT_STORE})')
+    commands = parser.add_subparsers(dest='command', required=True)
+    update = commands.add_parser('update', help='Re-measure changed sources and record a run')
+    update.add_argument('src_root', help='Root directory of the Java sources')
+    update.add_argument('-j', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    update.add_argument('--project-name', default=None, help='Value of the Project Name column (default: src_root)')
+    trend = commands.add_parser('trend', help='Show per-class LCOM deltas of a run')
+    trend.add_argument('--run', type=int, default=None, help='Run id (default: latest run with changes)')
+    trend.add_argument('-o', '--output', default=None, help='Also write the trend to this CSV file')
+    export = commands.add_parser('export', help='Write the current metrics as CSV')
+    export.add_argument('output', help='CSV file to write')
+    args = parser.parse_args(argv)
+
+    if args.command == 'update':
+        if not os.path.isdir(args.src_root):
+            print(f"Error: Source directory '{args.src_root}' does not exist!")
+            return 1
+        summary = update_store(args.src_root, args.store, args.project_name, args.workers)
+        print(f"Run {summary['run_id']}: {summary['files']} files, {summary['measured']} measured, "
+              f"{summary['unchanged']} unchanged, {summary['removed']} removed, "
+              f"{summary['changed_values']} metric values changed")
+    elif args.command == 'trend':
+        try:
+            df = lcom_trend(args.store, args.run)
+        except (OSError, sqlite3.DatabaseError) as e:
+            print(f"Error: {e}")
+            return 1
+        if df.empty:
+            print("No LCOM changes recorded")
+        else:
+            print(f"LCOM changes in run {df.attrs['run_id']}:")
+            print(df[['ClassName', 'Path', 'Status'] + [f'{m} delta' for m in METRIC_COLUMNS]].to_string(index=False))
+        if args.output:
+            df.to_csv(args.output, index=False)
+    else:
+        try:
+            df = load_metrics(args.store)
+        except (OSError, sqlite3.DatabaseError) as e:
+            print(f"Error: {e}")
+            return 1
+        df.to_csv(args.output, index=False)
+        print(f"LCOM metrics written to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
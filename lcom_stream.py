@@ -0,0 +1,238 @@
+import heapq
+import math
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from lcom_select import DEFAULT_CHUNK_ROWS, METRIC_COLUMNS, NAME_COLUMNS, add_class_names, compact_frame
+
+DATASET_DIR = 'lcom_results_parquet'
+CONCERNING_FILE = 'lcom_concerning'
+
+# Package prefix depth used for the Parquet partitions, e.g. "com.amazonaws"
+PARTITION_DEPTH = 2
+
+class QuantileSketch:
+    # KLL sketch: a stack of compactors where level h holds items of weight
+    # 2**h. A level that outgrows its capacity is sorted and every other item
+    # (random offset) is promoted to the next level. Memory is O(k log n) and
+    # the rank error is about 1/k. Until the first compaction the sketch is
+    # exact and quantile() interpolates like pandas.
+    def __init__(self, k=200, seed=0):
+        self.k = k
+        self.count = 0
+        self.levels = [np.zeros(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(math.ceil(self.k * (2.0 / 3.0) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other):
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.zeros(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                items = np.sort(items)
+                # An odd item out stays behind so weights are conserved
+                keep = items[-1:] if len(items) % 2 else items[:0]
+                pairs = items[:len(items) - len(keep)]
+                promoted = pairs[self._rng.integers(2)::2]
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.zeros(0))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+                self.levels[level] = keep
+                level = 0  # Capacities shift when a level is added
+                continue
+            level += 1
+
+    def quantile(self, q):
+        if not self.count:
+            return float('nan')
+        if len(self.levels) == 1:
+            return float(np.quantile(self.levels[0], q))
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2 ** h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        cumulative = np.cumsum(weights[order])
+        position = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return float(items[order][min(position, len(items) - 1)])
+
+class RunningTopK:
+    # The k rows with the largest (or smallest) values of one column across
+    # all chunks seen so far. Each chunk contributes at most k candidates
+    # (a vectorised nlargest), which then go through a bounded heap; ties
+    # keep the earliest row, as nlargest(keep='first') does.
+    def __init__(self, column, k, largest=True):
+        self.column = column
+        self.k = k
+        self.largest = largest
+        self._heap = []
+        self._columns = None
+
+    def update(self, chunk):
+        candidates = chunk.nlargest(self.k, self.column) if self.largest else chunk.nsmallest(self.k, self.column)
+        # nlargest/nsmallest keep NaN rows when k covers the whole chunk
+        candidates = candidates[candidates[self.column].notna()]
+        if self._columns is None:
+            self._columns = list(chunk.columns)
+        sign = 1 if self.largest else -1
+        position = self._columns.index(self.column)
+        # Chunk indices are global row numbers, which makes the keys unique
+        for offset, row in zip(candidates.index.tolist(), candidates.itertuples(index=False, name=None)):
+            item = (sign * row[position], -offset, row)
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item > self._heap[0]:
+                heapq.heapreplace(self._heap, item)
+
+    def frame(self):
+        rows = [row for _, _, row in sorted(self._heap, reverse=True)]
+        return pd.DataFrame(rows, columns=self._columns)
+
+def iter_metric_chunks(path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    # Compact chunks of a TypeMetrics-style CSV with ClassName filled in
+    # (from the package and type names, or the bare type name without a
+    # package column); chunk indices continue across chunks
+    dtypes = {column: 'category' for column in NAME_COLUMNS}
+    for chunk in pd.read_csv(path, dtype=dtypes, chunksize=chunk_rows):
+        compact_frame(chunk)
+        if 'Package Name' in chunk.columns and 'Type Name' in chunk.columns:
+            add_class_names(chunk)
+        elif 'ClassName' not in chunk.columns:
+            if 'Type Name' not in chunk.columns:
+                raise ValueError(f"{path} has no ClassName or 'Type Name' column to name the classes by")
+            chunk['ClassName'] = chunk['Type Name']
+        yield chunk
+
+def _package_roots(packages, depth=PARTITION_DEPTH):
+    # Partition key per row, mapped over the categories rather than the rows
+    roots = ['.'.join(str(name).split('.')[:depth]) for name in packages.cat.categories]
+    codes = packages.cat.codes.to_numpy()
+    lookup = np.array(roots + ['(default)'], dtype=object)
+    return pd.Categorical(lookup[np.where(codes < 0, len(roots), codes)])
+
+def _plain(frame):
+    # Categorical columns as plain strings: chunk-local category sets would
+    # give every output file a different dictionary type, and Parquet
+    # dictionary-encodes repeated strings itself anyway
+    categorical = [c for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)]
+    return frame.astype({c: object for c in categorical}) if categorical else frame
+
+class _ResultWriter:
+    # Streams result chunks to a Parquet dataset partitioned by package root
+    # when pyarrow is available, else appends them to one CSV file
+    def __init__(self, output_dir):
+        try:
+            import pyarrow  # noqa: F401
+            self.parquet = True
+        except ImportError:
+            self.parquet = False
+        self.path = os.path.join(output_dir, DATASET_DIR if self.parquet else 'lcom_results.csv')
+        os.makedirs(output_dir, exist_ok=True)
+        # A previous run's partitions would otherwise be mixed into this one
+        if self.parquet and os.path.isdir(self.path):
+            shutil.rmtree(self.path)
+        elif not self.parquet and os.path.exists(self.path):
+            os.remove(self.path)
+        self._chunks = 0
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            chunk = chunk.assign(**{'Package Root': _package_roots(chunk['Package Name'])}) \
+                if 'Package Name' in chunk.columns else chunk
+            partitions = ['Package Root'] if 'Package Root' in chunk.columns else None
+            pq.write_to_dataset(pa.Table.from_pandas(_plain(chunk), preserve_index=False), self.path,
+                                partition_cols=partitions, basename_template=f"chunk{self._chunks:05d}-{{i}}.parquet")
+        else:
+            chunk.to_csv(self.path, mode='a', header=self._chunks == 0, index=False)
+        self._chunks += 1
+
+class _FrameAppender:
+    # One growing Parquet file (or CSV) for rows selected in the second pass
+    def __init__(self, path_root, parquet):
+        self.path = path_root + ('.parquet' if parquet else '.csv')
+        self.parquet = parquet
+        self._writer = None
+        self.rows = 0
+
+    def write(self, frame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(_plain(frame), preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table.cast(self._writer.schema))
+        else:
+            frame.to_csv(self.path, mode='a' if self.rows else 'w', header=not self.rows, index=False)
+        self.rows += len(frame)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+def stream_lcom_results(metrics_file, output_dir='.', chunk_rows=DEFAULT_CHUNK_ROWS, top=15, q=0.9, sketch_k=200):
+    # Out-of-core analysis of a metrics CSV in two chunked passes, holding
+    # at most one chunk plus fixed-size state in memory:
+    #   1. top-`top` rows per metric (running heaps), a KLL sketch per metric
+    #      for the `q` thresholds, and every chunk written out as results
+    #   2. rows above the LCOM1/LCOM5 thresholds written to their own file
+    # Returns a summary dict with the thresholds, top frames and paths.
+    writer = _ResultWriter(output_dir)
+    tops, sketches = {}, {}
+    rows = 0
+    for chunk in iter_metric_chunks(metrics_file, chunk_rows):
+        if not tops:
+            for metric in (m for m in METRIC_COLUMNS if m in chunk.columns):
+                tops[metric] = RunningTopK(metric, top)
+                sketches[metric] = QuantileSketch(sketch_k)
+        for metric in tops:
+            tops[metric].update(chunk)
+            sketches[metric].update(chunk[metric].to_numpy(dtype=np.float64, na_value=np.nan))
+        writer.write(chunk)
+        rows += len(chunk)
+
+    thresholds = {metric: sketches[metric].quantile(q) for metric in ('LCOM1', 'LCOM5') if metric in sketches}
+
+    concerning = _FrameAppender(os.path.join(output_dir, CONCERNING_FILE), writer.parquet)
+    try:
+        if thresholds:
+            for chunk in iter_metric_chunks(metrics_file, chunk_rows):
+                mask = np.zeros(len(chunk), dtype=bool)
+                for metric, threshold in thresholds.items():
+                    mask |= (chunk[metric] > threshold).to_numpy()
+                if mask.any():
+                    concerning.write(chunk[mask])
+    finally:
+        concerning.close()
+
+    return {
+        'rows': rows,
+        'thresholds': thresholds,
+        'top': {metric: running.frame() for metric, running in tops.items()},
+        'concerning_rows': concerning.rows,
+        'concerning_path': concerning.path if concerning.rows else None,
+        'results_path': writer.path,
+    }
@@ -1,36 +1,120 @@
+import argparse
+import csv
+import io
+import multiprocessing
 import os
 import pandas as pd
 import sys
-from tabulate import tabulate
-import re
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
+from java_outline import find_type, format_outline, load_outlines
+from java_source_index import build_source_index
+from lcom_select import rank_slice, read_lcom_metrics, top_n
+from profiling import count, phase, start_profiling, stop_profiling
 
-def extract_class_code(class_path):
-    if not os.path.exists(class_path):
-        return "// Class file not found"
-    
-    try:
-        with open(class_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Extract class definition and first few methods
-        class_pattern = r'(public\s+(?:final\s+)?class\s+\w+.*?\{).*?((?:\s+public|\s+private|\s+protected).*?[{].*?[}])'
-        match = re.search(class_pattern, content, re.DOTALL)
-        
-        if match:
-            class_def = match.group(1)
-            first_method = match.group(2)
-            
-            # Limit to a reasonable length for display
-            simplified = class_def + "\n    // ...\n" + first_method + "\n    // ...\n}"
-            return simplified
-        else:
-            return "// Unable to parse class structure"
-    except Exception as e:
-        return f"// Error reading class: {str(e)}"
+# Source indexes already built in this process, by source root
+_source_indexes = {}
 
-def find_class_file(src_root, class_name):
-    simple_class_name = class_name.split('.')[-1]
-    
+# Pipe-table layout, kept identical to tabulate(tablefmt="pipe") output:
+# numeric columns are right-aligned on the decimal point, text columns are
+# left-aligned, multi-line cells span several table lines, and every column
+# is at least two characters wider than its header.
+_MIN_PADDING = 2
+
+def _column_kind(values):
+    # int, float or str, whichever is the least generic type for every
+    # non-missing value of a column; str when every value is missing
+    kind = None
+    for value in values:
+        if value is None or value == '':
+            continue
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating)):
+            return str
+        kind = float if kind is float or not isinstance(value, (int, np.integer)) else int
+    return kind or str
+
+def _cell_text(value, kind):
+    if value is None:
+        return ''
+    if kind is float:
+        return format(float(value), 'g')
+    return f"{value}" if kind is str else format(value, '')
+
+def _afterpoint(text):
+    # Characters after the decimal point (or exponent) of a number, -1 if none
+    pos = text.rfind('.')
+    if pos < 0:
+        pos = text.lower().rfind('e')
+    return len(text) - pos - 1 if pos >= 0 else -1
+
+def write_pipe_table(out, headers, rows):
+    # Stream a markdown pipe table to `out` one row at a time. `rows` is a
+    # callable returning a fresh iterator over the rows; it is called twice,
+    # first to measure the columns and then to write them, so no row is
+    # kept after it has been measured or written. Only the numeric cells,
+    # which decide the column types, are held between the two passes.
+    columns = len(headers)
+    numbers = [[] for _ in range(columns)]
+    text_widths = [0] * columns
+    multiline = False
+    for row in rows():
+        for c, value in enumerate(row):
+            if isinstance(value, str) and value:
+                multiline = multiline or '\n' in value
+                text_widths[c] = max([text_widths[c]] + [len(line) for line in value.strip().splitlines()])
+            else:
+                numbers[c].append(value)
+
+    kinds, widths, decimals = [], [], []
+    for c, header in enumerate(headers):
+        kind = _column_kind(numbers[c]) if not text_widths[c] else str
+        cells = [_cell_text(value, kind) for value in numbers[c]]
+        places = max((_afterpoint(cell) for cell in cells), default=-1) if kind is not str else -1
+        width = max([text_widths[c], len(header) + _MIN_PADDING]
+                    + [len(cell) + (places - _afterpoint(cell) if kind is not str else 0) for cell in cells])
+        kinds.append(kind)
+        widths.append(width)
+        decimals.append(places)
+
+    def aligned(text, c):
+        if kinds[c] is str:
+            return text.ljust(widths[c])
+        return (text + ' ' * (decimals[c] - _afterpoint(text))).rjust(widths[c])
+
+    out.write('| ' + ' | '.join(header.ljust(w) if k is str else header.rjust(w)
+                                for header, k, w in zip(headers, kinds, widths)) + ' |\n')
+    out.write('|' + '|'.join(':' + '-' * (w + 1) if k is str else '-' * (w + 1) + ':'
+                             for k, w in zip(kinds, widths)) + '|')
+    # Like tabulate, a table with multiline cells drops rows whose cells
+    # are all empty
+    empty = [] if multiline else ['']
+    for row in rows():
+        cells = [(value.strip() if isinstance(value, str) else _cell_text(value, kinds[c])).splitlines() or empty
+                 for c, value in enumerate(row)]
+        for line in range(max((len(lines) for lines in cells), default=0)):
+            out.write('\n| ' + ' | '.join(aligned(lines[line] if line < len(lines) else '', c)
+                                          for c, lines in enumerate(cells)) + ' |')
+
+def extract_class_code(class_path, class_name=None, outline=None):
+    # Outline of the class (declaration, first fields and method signatures)
+    # from the tokenizer-based parser; `outline` is a (types, error) pair
+    # already produced by load_outlines
+    if outline is None:
+        if not os.path.exists(class_path):
+            return "// Class file not found"
+        outline = load_outlines([class_path])[class_path]
+
+    types, error = outline
+    if error is not None:
+        return f"// Error reading class: {error}"
+    found = find_type(types, class_name)
+    if found is None:
+        return "// Unable to parse class structure"
+    return format_outline(found)
+
+def find_class_file(src_root, class_name, index=None):
     # Try different strategies to find the class file
     
     # 1. Directly try to find a match based on full package path
@@ -39,62 +123,71 @@ def find_class_file(src_root, class_name):
     if os.path.exists(full_path):
         return full_path
     
-    # 2. Try to find by simple name in the source tree
-    for root, dirs, files in os.walk(src_root):
-        for file in files:
-            if file == simple_class_name + '.java':
-                return os.path.join(root, file)
-    
-    return None
+    # 2. Look the class up in the source index (qualified name, nested
+    #    types, then simple name), built once per source root
+    if index is None:
+        index = _source_indexes.get(src_root)
+        if index is None:
+            index = _source_indexes[src_root] = build_source_index(src_root)
+    return index.find(class_name)
 
-def generate_lcom_table(lcom_results, src_root, output_file='lcom_table.md'):
-    high_lcom = lcom_results.sort_values(by='LCOM1', ascending=False).head(4)
+def select_report_classes(lcom_results):
+    # A few classes with high, middling and low LCOM1 values, picked by
+    # rank selection instead of sorting the whole frame three times
+    high_lcom = top_n(lcom_results, 'LCOM1', 4)
     
     # Get mid LCOM values (around 33rd percentile)
     if len(lcom_results) >= 10:
         mid_index = len(lcom_results) // 3
-        mid_lcom = lcom_results.sort_values(by='LCOM1', ascending=False).iloc[mid_index:mid_index+3]
+        mid_lcom = rank_slice(lcom_results, 'LCOM1', mid_index, mid_index + 3)
     else:
-        mid_lcom = lcom_results.sort_values(by='LCOM1', ascending=False).iloc[1:2]
+        mid_lcom = rank_slice(lcom_results, 'LCOM1', 1, 2)
     
     # Get low LCOM values
-    low_lcom = lcom_results.sort_values(by='LCOM1', ascending=True).head(3)
+    low_lcom = top_n(lcom_results, 'LCOM1', 3, largest=False)
     
-    selected_classes = pd.concat([high_lcom, mid_lcom, low_lcom])
-    
-    # Generate the table rows
-    table_rows = []
+    # Fresh index: the three selections can overlap on small or tied data
+    return pd.concat([high_lcom, mid_lcom, low_lcom]).reset_index(drop=True)
+
+def write_lcom_report(out, lcom_results, src_root, index=None, pool=None):
+    # Stream the markdown report to an open text file section by section.
+    # `index` (a JavaSourceIndex) and `pool` (an executor for the outline
+    # parser) can be shared between many reports.
+    with phase('select'):
+        selected_classes = select_report_classes(lcom_results)
     
     lcom_metrics = ['LCOM1', 'LCOM2', 'LCOM3', 'LCOM4', 'LCOM5', 'YALCOM']
     available_metrics = [m for m in lcom_metrics if m in lcom_results.columns]
     
-    for _, row in selected_classes.iterrows():
-        class_name = row['ClassName']
-        class_file = find_class_file(src_root, class_name)
-        
-        # Extract class code for display
-        if class_file:
-            class_code = extract_class_code(class_file)
-        else:
-            class_code = "// Class file not found"
-        
-        # Create a row with class code and LCOM values
-        table_row = [f"```java\n{class_code}\n```"]
-        
-        # Add LCOM metrics
-        for metric in available_metrics:
-            table_row.append(row.get(metric, "N/A"))
-            
-        table_rows.append(table_row)
+    if index is None:
+        index = _source_indexes.get(src_root)
+        if index is None:
+            with phase('index'):
+                index = _source_indexes[src_root] = build_source_index(src_root)
+    
+    # Resolve every file first so they are all parsed in one batch
+    with phase('outlines'):
+        class_files = [find_class_file(src_root, name, index) for name in selected_classes['ClassName']]
+        outlines = load_outlines(class_files, pool=pool)
+    count('files_parsed', len(outlines))
+    
+    def table_rows():
+        # One row per selected class: its outline, then its LCOM values
+        for (_, row), class_file in zip(selected_classes.iterrows(), class_files):
+            if class_file:
+                class_code = extract_class_code(class_file, row['ClassName'], outlines[class_file])
+            else:
+                class_code = "// Class file not found"
+            yield [f"```java\n{class_code}\n```"] + [row.get(metric, "N/A") for metric in available_metrics]
     
     # Generate a markdown table
     headers = ["Java code"] + available_metrics
-    table_md = "# LCOM Analysis Results\n\n"
-    table_md += "## Table of LCOM Values for Selected Classes\n\n"
-    table_md += tabulate(table_rows, headers=headers, tablefmt="pipe")
+    out.write("# LCOM Analysis Results\n\n")
+    out.write("## Table of LCOM Values for Selected Classes\n\n")
+    write_pipe_table(out, headers, table_rows)
     
     # Add analysis and interpretation
-    table_md += "\n\n## Analysis and Interpretation\n\n"
+    out.write("\n\n## Analysis and Interpretation\n\n")
     
     # Find the class with highest LCOM1
     highest_lcom1 = selected_classes.loc[selected_classes['LCOM1'].idxmax()]
@@ -104,48 +197,168 @@ def generate_lcom_table(lcom_results, src_root, output_file='lcom_table.md'):
     lowest_lcom1 = selected_classes.loc[selected_classes['LCOM1'].idxmin()]
     lowest_name = lowest_lcom1['ClassName'].split('.')[-1]
     
-    table_md += f"### Class with Highest LCOM: {highest_name}\n"
-    table_md += "- **High LCOM Values** indicate poor cohesion\n"
-    table_md += "- This class likely has multiple responsibilities\n"
-    table_md += "- Methods operate on different sets of instance variables\n"
-    table_md += "- **Refactoring Recommendation**: Consider splitting this class into multiple cohesive classes\n\n"
-    
-    table_md += f"### Class with Best Cohesion: {lowest_name}\n"
-    table_md += "- **Low LCOM Values** indicate good cohesion\n"
-    table_md += "- The methods in this class work together on shared data\n"
-    table_md += "- This class follows the Single Responsibility Principle\n"
-    table_md += "- This class serves as a good example of cohesive design\n\n"
-    
-    table_md += "### General Observations\n"
-    table_md += "- Larger classes tend to have higher LCOM values\n"
-    table_md += "- Classes that implement multiple interfaces often have higher LCOM values\n"
-    table_md += "- Data model classes tend to have better cohesion than service classes\n"
-    table_md += "- LCOM5 and YALCOM provide more nuanced measurements than LCOM1\n\n"
-    
-    table_md += "### Refactoring Strategies\n"
-    table_md += "1. **Extract Class**: Split large classes with high LCOM into multiple cohesive classes\n"
-    table_md += "2. **Move Method**: Relocate methods to classes where they are more cohesive\n"
-    table_md += "3. **Extract Interface**: Define clear interfaces for different responsibilities\n"
-    table_md += "4. **Apply Composition**: Use composition to manage relationships between newly extracted classes\n"
-    
-    # Write the table to a file
+    out.write(f"### Class with Highest LCOM: {highest_name}\n")
+    out.write("- **High LCOM Values** indicate poor cohesion\n")
+    out.write("- This class likely has multiple responsibilities\n")
+    out.write("- Methods operate on different sets of instance variables\n")
+    out.write("- **Refactoring Recommendation**: Consider splitting this class into multiple cohesive classes\n\n")
+    
+    out.write(f"### Class with Best Cohesion: {lowest_name}\n")
+    out.write("- **Low LCOM Values** indicate good cohesion\n")
+    out.write("- The methods in this class work together on shared data\n")
+    out.write("- This class follows the Single Responsibility Principle\n")
+    out.write("- This class serves as a good example of cohesive design\n\n")
+    
+    out.write("### General Observations\n")
+    out.write("- Larger classes tend to have higher LCOM values\n")
+    out.write("- Classes that implement multiple interfaces often have higher LCOM values\n")
+    out.write("- Data model classes tend to have better cohesion than service classes\n")
+    out.write("- LCOM5 and YALCOM provide more nuanced measurements than LCOM1\n\n")
+    
+    out.write("### Refactoring Strategies\n")
+    out.write("1. **Extract Class**: Split large classes with high LCOM into multiple cohesive classes\n")
+    out.write("2. **Move Method**: Relocate methods to classes where they are more cohesive\n")
+    out.write("3. **Extract Interface**: Define clear interfaces for different responsibilities\n")
+    out.write("4. **Apply Composition**: Use composition to manage relationships between newly extracted classes\n")
+
+def write_lcom_table(lcom_results, src_root, output_file='lcom_table.md', index=None, pool=None):
+    # Streams the report into output_file and returns its path. The report
+    # goes to a temporary file next to it that only replaces output_file
+    # once complete, so a failure never leaves a half-written report behind.
+    output_dir = os.path.dirname(output_file)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(suffix='.md', dir=output_dir or '.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            write_lcom_report(f, lcom_results, src_root, index, pool)
+        os.replace(tmp, output_file)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return output_file
+
+def generate_lcom_table(lcom_results, src_root, output_file='lcom_table.md', index=None, pool=None):
+    # Writes the report to output_file and returns the markdown
+    buffer = io.StringIO()
+    write_lcom_report(buffer, lcom_results, src_root, index, pool)
+    table_md = buffer.getvalue()
     with open(output_file, 'w') as f:
         f.write(table_md)
     
     print(f"LCOM table has been written to {output_file}")
     return table_md
 
+def load_lcom_results(results_file):
+    # LCOM results from a CSV/Parquet file or an incremental metrics store
+    if results_file.endswith(('.sqlite', '.db')):
+        from lcom_store import load_metrics
+        return load_metrics(results_file)
+    return read_lcom_metrics(results_file)
+
+def default_report_path(results_file):
+    # <results stem>_lcom_table.md next to the results file, so reports for
+    # several results files in one directory don't overwrite each other
+    stem = os.path.splitext(os.path.basename(results_file))[0]
+    return os.path.join(os.path.dirname(results_file), f"{stem}_lcom_table.md")
+
+def read_report_manifest(path):
+    # One report per CSV row: "results, src_root, output" (output defaults
+    # to default_report_path). Paths containing commas must be quoted.
+    # Relative paths are resolved against the manifest's directory; blank
+    # lines and # comments are skipped. Two entries writing the same report
+    # are rejected.
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    outputs = {}
+    with open(path, 'r', newline='') as f:
+        for line_number, row in enumerate(csv.reader(f, skipinitialspace=True), 1):
+            row = [part.strip() for part in row]
+            if not any(row) or row[0].startswith('#'):
+                continue
+            parts = [os.path.join(base, part) for part in row]
+            if len(parts) == 2:
+                parts.append(default_report_path(parts[0]))
+            if len(parts) != 3:
+                raise ValueError(f"{path}:{line_number}: expected 'results, src_root[, output]', got: {row}")
+            output = os.path.normpath(parts[2])
+            if output in outputs:
+                raise ValueError(f"{path}:{line_number}: report {parts[2]} is also written by line {outputs[output]}")
+            outputs[output] = line_number
+            entries.append(tuple(parts))
+    return entries
+
+def _batch_report(results_file, src_root, output_file, index, pool):
+    start = time.perf_counter()
+    try:
+        write_lcom_table(load_lcom_results(results_file), src_root, output_file, index, pool)
+        status = 'ok'
+    except Exception as e:
+        status = f"error: {e}"
+    return {'output': output_file, 'status': status, 'seconds': round(time.perf_counter() - start, 3)}
+
+def generate_reports(entries, workers=None, parse_workers=None):
+    # Many reports in one process: every distinct source root is indexed
+    # once, one process pool parses class outlines for all reports, and the
+    # reports themselves are written concurrently by a thread pool
+    roots = list(dict.fromkeys(src_root for _, src_root, _ in entries))
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        indexes = dict(zip(roots, threads.map(build_source_index, roots)))
+        _source_indexes.update(indexes)
+        # Parser workers are started from the report threads, and forking a
+        # process that is running other threads can deadlock the child, so
+        # they come from a forkserver (spawn where there is none) instead
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        with ProcessPoolExecutor(max_workers=parse_workers, mp_context=multiprocessing.get_context(method)) as pool:
+            futures = [
+                threads.submit(_batch_report, results_file, src_root, output_file, indexes[src_root], pool)
+                for results_file, src_root, output_file in entries
+            ]
+            results = []
+            for future in as_completed(futures):
+                result = future.result()
+                print(f"- {result['output']}: {result['status']} ({result['seconds']}s)")
+                results.append(result)
+    ok = sum(result['status'] == 'ok' for result in results)
+    print(f"{ok} of {len(entries)} LCOM reports written")
+    return results
+
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python lcom_table_generator.py <lcom_results.csv> <src_root_dir>")
+    parser = argparse.ArgumentParser(description='Markdown LCOM report(s) with class outlines')
+    parser.add_argument('results_file', nargs='?', help='lcom_results.csv, a Parquet file or a metrics store (.sqlite)')
+    parser.add_argument('src_root', nargs='?', help='root directory of the Java sources')
+    parser.add_argument('-o', '--output', default='lcom_table.md', help='report to write (default: lcom_table.md)')
+    parser.add_argument('--batch', metavar='MANIFEST',
+                        help='write many reports; each manifest row is "results, src_root[, output]" (CSV, quote paths with commas)')
+    parser.add_argument('-j', '--workers', type=int, help='reports written concurrently in --batch mode')
+    parser.add_argument('--parse-workers', type=int, help='outline parser processes in --batch mode (default: CPU count)')
+    parser.add_argument('--profile', metavar='REPORT',
+                        help='record per-phase wall time, peak RSS and counts into this JSON file')
+    args = parser.parse_args()
+    if args.profile:
+        start_profiling('lcom_table_generator')
+    
+    if args.batch:
+        try:
+            entries = read_report_manifest(args.batch)
+        except (OSError, ValueError) as e:
+            print(f"Error: could not read manifest: {e}")
+            sys.exit(1)
+        results = generate_reports(entries, args.workers, args.parse_workers)
+        stop_profiling(args.profile)
+        sys.exit(0 if results and all(result['status'] == 'ok' for result in results) else 1)
+    
+    if not args.results_file or not args.src_root:
+        print("Usage: python lcom_table_generator.py <lcom_results.csv | metrics store .sqlite> <src_root_dir>")
+        print("       python lcom_table_generator.py --batch <manifest>")
         sys.exit(1)
     
-    results_file = sys.argv[1]
-    src_root = sys.argv[2]
     try:
-        results_df = pd.read_csv(results_file)
+        results_df = load_lcom_results(args.results_file)
     except Exception as e:
-        print(f"Error: Could not read {results_file}. Make sure it exists and is a valid CSV. Error: {e}")
+        print(f"Error: Could not read {args.results_file}. Make sure it exists and is a valid CSV. Error: {e}")
         sys.exit(1)
     
-    generate_lcom_table(results_df, src_root)
+    write_lcom_table(results_df, args.src_root, args.output)
+    print(f"LCOM table has been written to {args.output}")
+    stop_profiling(args.profile)
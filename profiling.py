@@ -0,0 +1,91 @@
+import json
+import os
+import platform
+import sys
+import time
+from contextlib import contextmanager
+
+# Opt-in instrumentation shared by the analysis scripts. Nothing is recorded
+# unless a profiler has been started; the hooks then cost one global lookup.
+_active = None
+
+def peak_rss_mb():
+    # Peak resident set size of this process so far (None where unsupported)
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+class Profiler:
+    # Wall time and peak RSS per named phase, plus named counts. Phases can
+    # nest; each is recorded with its dotted path ("load.parse").
+    def __init__(self, label=None):
+        self.label = label
+        self.phases = []
+        self.counts = {}
+        self._stack = []
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        path = '.'.join(self._stack + [name])
+        self._stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            self.phases.append({
+                'phase': path,
+                'seconds': round(time.perf_counter() - start, 6),
+                'peak_rss_mb': peak_rss_mb(),
+            })
+
+    def count(self, name, value):
+        self.counts[name] = self.counts.get(name, 0) + value
+
+    def report(self):
+        return {
+            'label': self.label,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seconds': round(time.perf_counter() - self._start, 6),
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': self.phases,
+            'counts': self.counts,
+        }
+
+    def write(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w') as out:
+            json.dump(self.report(), out, indent=2)
+
+def start_profiling(label=None):
+    global _active
+    _active = Profiler(label)
+    return _active
+
+def stop_profiling(path=None):
+    # Detach the active profiler, optionally writing its JSON report
+    global _active
+    profiler, _active = _active, None
+    if profiler is not None and path:
+        profiler.write(path)
+    return profiler
+
+@contextmanager
+def phase(name):
+    if _active is None:
+        yield
+    else:
+        with _active.phase(name):
+            yield
+
+def count(name, value=1):
+    if _active is not None:
+        _active.count(name, value)
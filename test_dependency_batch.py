@@ -0,0 +1,35 @@
+import pytest
+
+from dependency_batch import find_pydeps_files, repository_name
+
+@pytest.mark.parametrize('path, name', [
+    ('deps/app.json', 'app'),
+    ('app.core.json.gz', 'app.core'),
+    ('app.json.zst', 'app'),
+    ('app.v2.deps', 'app.v2'),
+])
+def test_repository_name(path, name):
+    assert repository_name(path) == name
+
+def test_directory_listing(tmp_path):
+    for name in ['b.json', 'a.json.gz', '.hidden.json', 'notes.txt']:
+        (tmp_path / name).write_text('{}')
+    assert find_pydeps_files(str(tmp_path)) == [('a', str(tmp_path / 'a.json.gz')), ('b', str(tmp_path / 'b.json'))]
+
+def test_manifest_names_are_made_unique(tmp_path, capsys):
+    manifest = tmp_path / 'repos.txt'
+    manifest.write_text(
+        '# repositories\n'
+        'one/app.json\n'
+        '\n'
+        'two/app.json.gz\n'
+        'app, three/deps.json\n'
+        'core, /abs/core.json\n'
+    )
+    assert find_pydeps_files(str(manifest)) == [
+        ('app', str(tmp_path / 'one/app.json')),
+        ('app-2', str(tmp_path / 'two/app.json.gz')),
+        ('app-3', str(tmp_path / 'three/deps.json')),
+        ('core', '/abs/core.json'),
+    ]
+    assert capsys.readouterr().err.count("repository name 'app' is used more than once") == 2
@@ -0,0 +1,263 @@
+import gzip
+import json
+import os
+
+import networkx as nx
+import numpy as np
+import pytest
+
+import dependency_graph
+from dependency_graph import (
+    CompactGraph,
+    ReachabilityIndex,
+    dependency_depth_array,
+    edge_cache_path,
+    find_cyclic_components,
+    iter_pydeps_entries,
+    iter_representative_cycles,
+    load_compact_graph,
+    strongly_connected_components,
+)
+
+def random_graph(seed, n=None, p=None):
+    # Small random digraph as a CompactGraph plus the equivalent networkx
+    # graph. Duplicate imports and self-imports are included on purpose.
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 40)) if n is None else n
+    p = float(rng.uniform(0.0, 0.15)) if p is None else p
+    names = [f"pkg.mod{i}" for i in range(n)]
+    mask = rng.random((n, n)) < p
+    sources, targets = np.nonzero(mask)
+    extra = rng.integers(0, len(sources) + 1) if len(sources) else 0
+    picks = rng.integers(0, len(sources), extra) if len(sources) else []
+    sources = np.concatenate([sources, sources[picks]]).astype(np.int32)
+    targets = np.concatenate([targets, targets[picks]]).astype(np.int32)
+
+    graph = CompactGraph(names, sources, targets)
+    G = nx.DiGraph()
+    G.add_nodes_from(names)
+    G.add_edges_from((names[u], names[v]) for u, v in zip(sources.tolist(), targets.tolist()))
+    return graph, G, sources, targets
+
+SEEDS = range(40)
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_adjacency_matches_networkx(seed):
+    graph, G, sources, targets = random_graph(seed)
+    assert graph.number_of_nodes() == G.number_of_nodes()
+    assert graph.number_of_edges() == G.number_of_edges()
+    # Fan-in/fan-out count every listed import, duplicates included
+    assert graph.fan_out.tolist() == np.bincount(sources, minlength=len(graph.names)).tolist()
+    assert graph.fan_in.tolist() == np.bincount(targets, minlength=len(graph.names)).tolist()
+    for name in graph.names:
+        assert sorted(graph.successors(name)) == sorted(G.successors(name))
+        assert sorted(graph.predecessors(name)) == sorted(G.predecessors(name))
+    for u in graph.names[:5]:
+        for v in graph.names[:5]:
+            assert graph.has_edge(u, v) == G.has_edge(u, v)
+    assert not graph.has_edge(graph.names[0], 'missing')
+    assert nx.utils.edges_equal(graph.to_networkx().edges(), G.edges())
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_components_match_networkx(seed):
+    graph, G, _, _ = random_graph(seed)
+    component, count = graph.components()
+    ours = {}
+    for v, c in enumerate(component.tolist()):
+        ours.setdefault(c, set()).add(graph.names[v])
+    assert count == len(ours)
+    assert sorted(map(sorted, ours.values())) == sorted(map(sorted, nx.strongly_connected_components(G)))
+
+    # Ids are a reverse topological order of the condensation
+    sources = graph.edge_sources()
+    assert (component[sources] >= component[graph.targets]).all()
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_region_components_match_induced_subgraph(seed):
+    graph, G, _, _ = random_graph(seed)
+    rng = np.random.default_rng(seed + 1000)
+    region = {v for v in range(graph.number_of_nodes()) if rng.random() < 0.5}
+    component, count = strongly_connected_components(graph, region)
+    assert set(component) == region
+    ours = {}
+    for v, c in component.items():
+        ours.setdefault(c, set()).add(graph.names[v])
+    assert count == len(ours)
+    induced = G.subgraph(graph.names[v] for v in region)
+    assert sorted(map(sorted, ours.values())) == sorted(map(sorted, nx.strongly_connected_components(induced)))
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_depths_are_condensation_longest_paths(seed):
+    graph, G, _, _ = random_graph(seed)
+    C = nx.condensation(G)
+    # Longest path (in edges) starting at each condensation node
+    longest = {}
+    for c in reversed(list(nx.topological_sort(C))):
+        longest[c] = max((longest[d] + 1 for d in C.successors(c)), default=0)
+    expected = [longest[C.graph['mapping'][name]] for name in graph.names]
+    assert dependency_depth_array(graph).tolist() == expected
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_cyclic_components_and_representative_cycles(seed):
+    graph, G, _, _ = random_graph(seed)
+    expected = [sorted(c) for c in nx.strongly_connected_components(G)
+                if len(c) > 1 or G.has_edge(next(iter(c)), next(iter(c)))]
+    cyclic = find_cyclic_components(graph)
+    assert sorted(cyclic) == sorted(expected)
+    assert [len(c) for c in cyclic] == sorted((len(c) for c in cyclic), reverse=True)
+
+    members = {name: i for i, c in enumerate(cyclic) for name in c}
+    for cycle in iter_representative_cycles(graph, cyclic):
+        assert len({members[name] for name in cycle}) == 1
+        for u, v in zip(cycle, cycle[1:] + cycle[:1]):
+            assert G.has_edge(u, v)
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_reachability_matches_networkx(seed):
+    graph, G, _, _ = random_graph(seed)
+    index = ReachabilityIndex(graph)
+    for name in graph.names:
+        assert index.affected_by(name) == sorted(nx.ancestors(G, name))
+        assert index.dependencies_of(name) == sorted(nx.descendants(G, name))
+        assert index.count_affected(name) == len(nx.ancestors(G, name))
+        assert index.count_dependencies(name) == len(nx.descendants(G, name))
+
+def test_reachability_batch_query():
+    graph, G, _, _ = random_graph(7, n=30, p=0.08)
+    changed = ['pkg.mod3', 'pkg.mod11', 'pkg/mod20.py', 'not/a/module.py']
+    affected, unresolved = ReachabilityIndex(graph).affected_by_changes(changed)
+    expected = {'pkg.mod3', 'pkg.mod11', 'pkg.mod20'}
+    for name in list(expected):
+        expected |= nx.ancestors(G, name)
+    assert affected == sorted(expected)
+    assert unresolved == ['not/a/module.py']
+
+def test_empty_graph():
+    graph = CompactGraph([], np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32))
+    assert graph.components()[1] == 0
+    assert dependency_depth_array(graph).tolist() == []
+    assert find_cyclic_components(graph) == []
+
+# Streaming pydeps reader and edge cache
+
+VALID_DUMPS = [
+    '{}',
+    '  {\n}\n',
+    '{"a": {"imports": ["b", "c"], "name": "a"}, "b": {"imports": ["a"]}, "c": {}}',
+    '{"m": {"imports": ["x"], "path": "/src/m.py", "bacon": 1.5e3}, "x": {"imports": null}}',
+    '{"esc\\"aped": {"imports": ["\\u00e9t\\u00e9", "a}b", "c{,d"]}, "\\u00e9t\\u00e9": {"n": [true, false, null]}}',
+    '{"a": {"imports": []}, "a": {"imports": ["b"]}}',
+    '{"num": 12345678901234567890, "deep": {"x": [[[{"y": "z"}]]]}}\n\n\t ',
+]
+
+MALFORMED_DUMPS = [
+    '',
+    '   ',
+    '{',
+    '{"a": 1',
+    '{"a": 1,}',
+    '{,"a": 1}',
+    '{"a" 1}',
+    '{"a": 1 "b": 2}',
+    '{"a": 1,, "b": 2}',
+    '{a: 1}',
+    '{"a": [1, 2}',
+    '{"a": tru}',
+    '{"a": 1}}',
+    '{"a": 1} x',
+    '{"a": 1}{}',
+    '{"a": "unterminated}',
+]
+
+CHUNK_SIZES = [1, 2, 3, 7, 1 << 20]
+
+def write_dump(tmp_path, text, name='pydeps.json'):
+    path = tmp_path / name
+    path.write_text(text, encoding='utf-8')
+    return str(path)
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('text', VALID_DUMPS)
+def test_streaming_reader_matches_json_load(tmp_path, text, chunk_size):
+    path = write_dump(tmp_path, text)
+    pairs = list(iter_pydeps_entries(path, chunk_size=chunk_size))
+    # Every top-level member in document order, duplicates included; the
+    # hook sees the top-level object last
+    members = []
+    json.loads(text, object_pairs_hook=lambda items: members.append(items) or dict(items))
+    assert [key for key, _ in pairs] == [key for key, _ in members[-1]]
+    assert dict(pairs) == json.loads(text)
+
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+@pytest.mark.parametrize('text', MALFORMED_DUMPS)
+def test_streaming_reader_rejects_what_json_load_rejects(tmp_path, text, chunk_size):
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(text)
+    path = write_dump(tmp_path, text)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_pydeps_entries(path, chunk_size=chunk_size))
+
+def test_streaming_reader_requires_an_object(tmp_path):
+    path = write_dump(tmp_path, '[{"a": 1}]')
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_pydeps_entries(path))
+
+def test_streaming_reader_reads_gzip(tmp_path):
+    text = VALID_DUMPS[2]
+    path = tmp_path / 'pydeps.json.gz'
+    with gzip.open(path, 'wt', encoding='utf-8') as out:
+        out.write(text)
+    assert dict(iter_pydeps_entries(str(path), chunk_size=5)) == json.loads(text)
+
+def graph_edges(graph):
+    return sorted((graph.names[u], graph.names[v])
+                  for u, v in zip(graph.edge_sources().tolist(), graph.targets.tolist()))
+
+def _refuse_parsing(path, chunk_size=None):
+    raise AssertionError(f"{path} was parsed although the edge cache is current")
+
+def test_edge_cache_is_written_and_reused(tmp_path, monkeypatch):
+    path = write_dump(tmp_path, VALID_DUMPS[2])
+    graph = load_compact_graph(path)
+    assert os.path.exists(edge_cache_path(path))
+
+    monkeypatch.setattr(dependency_graph, 'iter_pydeps_entries', _refuse_parsing)
+    cached = load_compact_graph(path)
+    assert cached.names == graph.names
+    assert graph_edges(cached) == graph_edges(graph)
+    assert cached.fan_in.tolist() == graph.fan_in.tolist()
+
+def test_edge_cache_is_invalidated_by_mtime_and_size(tmp_path):
+    path = write_dump(tmp_path, '{"a": {"imports": ["b"]}, "b": {}}')
+    load_compact_graph(path)
+    stat = os.stat(path)
+
+    # Same size, different content: only the mtime tells the change apart
+    write_dump(tmp_path, '{"a": {"imports": ["c"]}, "c": {}}')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert graph_edges(load_compact_graph(path)) == [('a', 'c')]
+
+    # Different size, mtime forced back to the cached one
+    write_dump(tmp_path, '{"a": {"imports": ["b", "c"]}, "b": {}, "c": {}}')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert graph_edges(load_compact_graph(path)) == [('a', 'b'), ('a', 'c')]
+
+def test_unreadable_edge_cache_falls_back_to_parsing(tmp_path):
+    path = write_dump(tmp_path, '{"a": {"imports": ["b"]}, "b": {}}')
+    with open(edge_cache_path(path), 'wb') as out:
+        out.write(b'not an npz file')
+    assert graph_edges(load_compact_graph(path)) == [('a', 'b')]
+    # ... and the broken cache is replaced by a good one
+    with np.load(edge_cache_path(path), allow_pickle=False) as cached:
+        assert int(cached['count']) == 2
+
+def test_no_cache_neither_reads_nor_writes(tmp_path):
+    path = write_dump(tmp_path, '{"a": {"imports": ["b"]}, "b": {}}')
+    load_compact_graph(path, use_cache=False)
+    assert not os.path.exists(edge_cache_path(path))
+
+    load_compact_graph(path)
+    write_dump(tmp_path, '{"a": {"imports": ["c"]}, "c": {}}')
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert graph_edges(load_compact_graph(path, use_cache=False)) == [('a', 'c')]
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from dependency_graph import CompactGraph
+from dependency_packages import hierarchical_rollup, rollup_packages, top_k
+
+@pytest.mark.parametrize('seed', range(30))
+def test_top_k_matches_full_sort(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(0, 60))
+    # Few distinct values, so ties are common
+    values = rng.integers(0, 6, n).tolist()
+    names = [f"mod{i:02d}" for i in rng.permutation(n).tolist()]
+    for k in (0, 1, 5, n, n + 3):
+        expected = sorted(range(n), key=lambda i: (-values[i], names[i]))[:k]
+        assert top_k(values, k, names) == expected
+
+def test_top_k_without_names():
+    values = [3, 9, 1, 9, 4]
+    assert [values[i] for i in top_k(values, 3)] == [9, 9, 4]
+
+def random_graph(seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 40))
+    names = [f"app.{'abc'[i % 3]}.{'xy'[i % 2]}.mod{i}" if i % 5 else f"top{i}" for i in range(n)]
+    sources = rng.integers(0, n, 3 * n).astype(np.int32)
+    targets = rng.integers(0, n, 3 * n).astype(np.int32)
+    return CompactGraph(names, sources, targets), sources, targets
+
+@pytest.mark.parametrize('seed', range(20))
+def test_rollup_matches_brute_force(seed):
+    graph, sources, targets = random_graph(seed)
+    for depth in (1, 2, 3):
+        rollup = rollup_packages(graph, depth)
+        package = ['.'.join(name.split('.')[:depth]) for name in graph.names]
+        assert sorted(rollup['names']) == sorted(set(package))
+        position = {name: i for i, name in enumerate(rollup['names'])}
+
+        # Module-level edges are counted once each (the CSR keeps distinct imports)
+        edges = {(u, v) for u, v in zip(sources.tolist(), targets.tolist())}
+        crossing = [(package[u], package[v]) for u, v in edges if package[u] != package[v]]
+        pairs = set(crossing)
+        for name in rollup['names']:
+            i = position[name]
+            assert rollup['modules'][i] == package.count(name)
+            assert rollup['fan_out'][i] == sum(1 for a, _ in pairs if a == name)
+            assert rollup['fan_in'][i] == sum(1 for _, b in pairs if b == name)
+            assert rollup['imports_out'][i] == sum(1 for a, _ in crossing if a == name)
+            assert rollup['imports_in'][i] == sum(1 for _, b in crossing if b == name)
+            total = rollup['fan_in'][i] + rollup['fan_out'][i]
+            assert rollup['instability'][i] == pytest.approx(rollup['fan_out'][i] / total if total else 0.0)
+        assert rollup['graph'].number_of_edges() == len(pairs)
+
+def test_hierarchical_rollup_levels():
+    graph, _, _ = random_graph(1)
+    deepest = max(len(name.split('.')) for name in graph.names)
+    assert [r['depth'] for r in hierarchical_rollup(graph)] == list(range(1, deepest + 1))
+    assert [r['depth'] for r in hierarchical_rollup(graph, 2)] == [1, 2]
+    assert [r['depth'] for r in hierarchical_rollup(graph, 99)] == list(range(1, deepest + 1))
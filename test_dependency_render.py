@@ -0,0 +1,87 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import dependency_render
+from dependency_graph import CompactGraph
+from dependency_render import (
+    aggregate_graph,
+    cached_layout,
+    condense_graph,
+    layered_layout,
+    layout_key,
+    render_dependency_graph,
+)
+
+def random_graph(seed, n=30):
+    rng = np.random.default_rng(seed)
+    names = [f"pkg{i % 3}.sub{i % 2}.mod{i}" for i in range(n)]
+    sources = rng.integers(0, n, 2 * n).astype(np.int32)
+    targets = rng.integers(0, n, 2 * n).astype(np.int32)
+    return CompactGraph(names, sources, targets)
+
+def _refuse_layout(graph):
+    raise AssertionError("layout recomputed although a cached one exists")
+
+def test_layout_is_cached_and_reused(tmp_path, monkeypatch):
+    graph = random_graph(0)
+    cache_dir = str(tmp_path / 'layouts')
+    pos = cached_layout(graph, 'module', 2, cache_dir)
+    assert os.listdir(cache_dir) == [layout_key(graph, 'module', 2) + '.npy']
+
+    monkeypatch.setattr(dependency_render, 'layered_layout', _refuse_layout)
+    assert np.array_equal(cached_layout(graph, 'module', 2, cache_dir), pos)
+
+def test_layout_key_follows_graph_and_view():
+    graph = random_graph(0)
+    key = layout_key(graph, 'scc', 2)
+    assert layout_key(random_graph(0), 'scc', 2) == key
+    assert layout_key(random_graph(1), 'scc', 2) != key
+    assert layout_key(graph, 'package', 2) != key
+    assert layout_key(graph, 'scc', 3) != key
+    renamed = CompactGraph(['x' + name for name in graph.names], graph.edge_sources(), graph.targets)
+    assert layout_key(renamed, 'scc', 2) != key
+
+def test_corrupt_cache_entry_is_recomputed(tmp_path):
+    graph = random_graph(2)
+    cache_dir = str(tmp_path)
+    path = os.path.join(cache_dir, layout_key(graph, 'scc', 2) + '.npy')
+    with open(path, 'wb') as out:
+        out.write(b'garbage')
+    assert np.array_equal(cached_layout(graph, 'scc', 2, cache_dir), layered_layout(graph))
+    assert np.array_equal(np.load(path), layered_layout(graph))
+
+def test_no_cache_dir_writes_nothing(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cached_layout(random_graph(3), 'scc', 2, cache_dir=None)
+    assert os.listdir(tmp_path) == []
+
+@pytest.mark.parametrize('seed', range(10))
+def test_layered_layout_puts_dependencies_below(seed):
+    graph = random_graph(seed)
+    labels, group_of = condense_graph(graph, 'scc')
+    drawn, weights = aggregate_graph(graph, labels, group_of)
+    pos = layered_layout(drawn)
+    assert pos.shape == (drawn.number_of_nodes(), 2)
+    # The condensation is acyclic, so every import points to a lower layer
+    sources = drawn.edge_sources()
+    assert (pos[sources, 1] > pos[drawn.targets, 1]).all()
+    # Nodes of a layer sit on distinct, centred positions
+    for y in np.unique(pos[:, 1]):
+        xs = np.sort(pos[pos[:, 1] == y, 0])
+        assert np.allclose(np.diff(xs), 1.0)
+        assert xs.sum() == pytest.approx(0.0)
+    assert weights.sum() == graph.fan_in.sum()
+
+def test_render_json_view(tmp_path):
+    graph = random_graph(4)
+    output = str(tmp_path / 'graph.json')
+    assert render_dependency_graph(graph, output, view='scc', cache_dir=str(tmp_path / 'cache')) == output
+    with open(output) as f:
+        data = json.load(f)
+    assert len(data['nodes']) == graph.components()[1]
+    assert data['view'] == 'scc'
+    with pytest.raises(ValueError):
+        render_dependency_graph(graph, str(tmp_path / 'graph.txt'), cache_dir=None)
@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+
+from dependency_graph import CompactGraph, find_cyclic_components
+from dependency_snapshot import (
+    HIGH_FAN_IN_THRESHOLD,
+    load_snapshot,
+    save_snapshot,
+    snapshot_from_graph,
+    update_snapshot,
+)
+
+def make_graph(names, edges):
+    index = {name: i for i, name in enumerate(names)}
+    sources = np.array([index[u] for u, _ in edges], dtype=np.int32)
+    targets = np.array([index[v] for _, v in edges], dtype=np.int32)
+    return CompactGraph(list(names), sources, targets)
+
+def random_edges(rng, names, p):
+    return [(u, v) for u in names for v in names if rng.random() < p]
+
+def mutate(rng, names, edges, serial):
+    # Remove and add a few modules and imports, then shuffle the module
+    # order so ids differ between the two graphs
+    removed = {name for name in names if rng.random() < 0.1}
+    added = [f"new{serial}.mod{i}" for i in range(int(rng.integers(0, 4)))]
+    names = [name for name in names if name not in removed] + added
+    edges = [(u, v) for u, v in edges if u not in removed and v not in removed and rng.random() > 0.1]
+    p = 2.0 / max(len(names), 1)
+    edges += [(u, v) for u in names for v in names if rng.random() < p * 0.3]
+    edges += [(u, v) for u in added for v in names if rng.random() < p]
+    order = rng.permutation(len(names))
+    return [names[i] for i in order], edges
+
+def partition(names, component):
+    groups = {}
+    for name, c in zip(names, component.tolist()):
+        groups.setdefault(c, set()).add(name)
+    return sorted(map(sorted, groups.values()))
+
+def edge_set(graph):
+    return {(graph.names[u], graph.names[v])
+            for u, v in zip(graph.edge_sources().tolist(), graph.targets.tolist())}
+
+def assert_same_snapshot(updated, full):
+    assert updated['names'] == full['names']
+    for key in ('offsets', 'targets', 'fan_in', 'fan_out', 'depth'):
+        assert updated[key].tolist() == full[key].tolist(), key
+    # Component labels differ; the partition into SCCs must not
+    assert partition(updated['names'], updated['component']) == partition(full['names'], full['component'])
+
+@pytest.mark.parametrize('seed', range(30))
+def test_update_matches_full_recompute(seed):
+    rng = np.random.default_rng(seed)
+    names = [f"pkg{i % 4}.mod{i}" for i in range(int(rng.integers(1, 30)))]
+    edges = random_edges(rng, names, float(rng.uniform(0.02, 0.15)))
+    graph = make_graph(names, edges)
+    snapshot = snapshot_from_graph(graph)
+
+    # A chain of updates, each starting from the previous updated snapshot
+    for step in range(4):
+        new_names, new_edges = mutate(rng, names, edges, step)
+        new_graph = make_graph(new_names, new_edges)
+        updated, delta = update_snapshot(snapshot, new_graph)
+        assert_same_snapshot(updated, snapshot_from_graph(new_graph))
+
+        assert delta['added_modules'] == sorted(set(new_names) - set(names))
+        assert delta['removed_modules'] == sorted(set(names) - set(new_names))
+        assert delta['added_edges'] == sorted(edge_set(new_graph) - edge_set(graph))
+        assert delta['removed_edges'] == sorted(edge_set(graph) - edge_set(new_graph))
+
+        old_cycles = set(map(frozenset, find_cyclic_components(graph)))
+        new_cycles = set(map(frozenset, find_cyclic_components(new_graph)))
+        assert set(map(frozenset, delta['new_cycles'])) == new_cycles - old_cycles
+        assert set(map(frozenset, delta['resolved_cycles'])) == old_cycles - new_cycles
+
+        old_fan_in = dict(zip(graph.names, graph.fan_in.tolist()))
+        crossed_up = [(name, old_fan_in.get(name, 0), fan_in)
+                      for name, fan_in in zip(new_graph.names, new_graph.fan_in.tolist())
+                      if old_fan_in.get(name, 0) <= HIGH_FAN_IN_THRESHOLD < fan_in]
+        assert sorted(delta['fan_in_crossed_up']) == sorted(crossed_up)
+
+        old_depth = dict(zip(snapshot['names'], snapshot['depth'].tolist()))
+        regressions = {(name, old_depth[name], depth)
+                       for name, depth in zip(updated['names'], updated['depth'].tolist())
+                       if name in old_depth and depth > old_depth[name]}
+        assert set(delta['depth_regressions']) == regressions
+
+        names, edges, graph, snapshot = new_names, new_edges, new_graph, updated
+
+def test_unchanged_graph_reanalyses_nothing():
+    rng = np.random.default_rng(3)
+    names = [f"m{i}" for i in range(20)]
+    graph = make_graph(names, random_edges(rng, names, 0.1))
+    snapshot, delta = update_snapshot(snapshot_from_graph(graph), graph)
+    assert delta['reanalysed_modules'] == 0
+    assert not any(delta[key] for key in ('added_edges', 'removed_edges', 'new_cycles', 'resolved_cycles'))
+    assert_same_snapshot(snapshot, snapshot_from_graph(graph))
+
+def test_snapshot_round_trip(tmp_path):
+    rng = np.random.default_rng(5)
+    names = [f"pkg.mé{i}" for i in range(15)]
+    snapshot = snapshot_from_graph(make_graph(names, random_edges(rng, names, 0.2)))
+    path = str(tmp_path / 'state.npz')
+    save_snapshot(path, snapshot)
+    loaded = load_snapshot(path)
+    assert loaded['names'] == snapshot['names']
+    for key in ('offsets', 'targets', 'fan_in', 'fan_out', 'component', 'depth'):
+        assert loaded[key].tolist() == snapshot[key].tolist()
@@ -0,0 +1,113 @@
+import pytest
+
+from java_outline import _walk, parse_members, parse_outline, tokenize, type_argument_brackets
+
+SOURCE = '''package a.b;
+import java.util.*;
+
+@Deprecated(since = "1") public class Outer<T extends Comparable<T>> {
+    private Map<String, List<Integer>> map = new HashMap<>();
+    int a, b = 1 < 2 ? 3 : 4;
+    static final String S = "class Fake {";
+    // class Commented { }
+    Runnable r = new Runnable() { public void run() { a++; } };
+    Outer() { a = 0; }
+    abstract void f();
+    int g(int x) { return x > a ? b : a; }
+    enum Color { RED, GREEN(1) { int k() { return 1; } }, BLUE; int v; }
+    interface I { int C = 1; void m(); }
+    static class Inner { int z; }
+}
+'''
+
+def events(text, keep_bodies=True):
+    # _walk events with the token lists joined into readable strings
+    joined = lambda tokens: None if tokens is None else ' '.join(value for _, value, _, _ in tokens)
+    return [(event, joined(tokens), joined(extra) if event == 'method' else None)
+            for event, tokens, extra in _walk(text, keep_bodies)]
+
+def test_walk_events():
+    assert events(SOURCE) == [
+        ('statement', 'package a . b', None),
+        ('statement', 'import java . util . *', None),
+        ('type', '@Deprecated(since = "1") public class Outer < T extends Comparable < T > >', None),
+        ('field', 'private Map < String , List < Integer > > map = new HashMap < > ( )', None),
+        ('field', 'int a , b = 1 < 2 ? 3 : 4', None),
+        ('field', 'static final String S = "class Fake {"', None),
+        ('field', 'Runnable r = new Runnable ( )', None),
+        ('method', 'Outer ( )', 'a = 0 ;'),
+        ('method', 'abstract void f ( )', None),
+        ('method', 'int g ( int x )', 'return x > a ? b : a ;'),
+        ('type', 'enum Color', None),
+        ('constants', 'RED , GREEN ( 1 ) , BLUE', None),
+        ('field', 'int v', None),
+        ('end', None, None),
+        ('type', 'interface I', None),
+        ('field', 'int C = 1', None),
+        ('method', 'void m ( )', None),
+        ('end', None, None),
+        ('type', 'static class Inner', None),
+        ('field', 'int z', None),
+        ('end', None, None),
+        ('end', None, None),
+    ]
+
+def test_walk_without_bodies():
+    methods = [(tokens, body) for event, tokens, body in events(SOURCE, keep_bodies=False) if event == 'method']
+    assert methods == [('Outer ( )', None), ('abstract void f ( )', None), ('int g ( int x )', None),
+                       ('void m ( )', None)]
+
+def test_tokenize_skips_comments_and_keeps_literals_whole():
+    text = 'a /* x { */ "b // c" \'{\' """\n}\n""" // d {\n@A(x = ")") e'
+    assert [(kind, value) for kind, value, _, _ in tokenize(text)] == [
+        ('word', 'a'), ('string', '"b // c"'), ('char', "'{'"), ('text_block', '"""\n}\n"""'),
+        ('annotation', '@A(x = ")")'), ('word', 'e'),
+    ]
+
+def marked(code):
+    # The tokens of `code` with type-argument brackets shown as [[ and ]]
+    tokens = list(tokenize(code))
+    brackets = type_argument_brackets(tokens)
+    return ' '.join(('[[' if value == '<' else ']]') if k in brackets else value
+                    for k, (_, value, _, _) in enumerate(tokens))
+
+@pytest.mark.parametrize('code, expected', [
+    ('List<String> names;', 'List [[ String ]] names ;'),
+    ('Map<String, List<Integer>> m;', 'Map [[ String , List [[ Integer ]] ]] m ;'),
+    ('new HashMap<>()', 'new HashMap [[ ]] ( )'),
+    ('List<? extends T> xs', 'List [[ ? extends T ]] xs'),
+    ('Map.Entry<K, V[]> e', 'Map . Entry [[ K , V [ ] ]] e'),
+    ('return i > size;', 'return i > size ;'),
+    ('if (a < b && c > d)', 'if ( a < b & & c > d )'),
+    ('for (int i = 0; i < n; i++)', 'for ( int i = 0 ; i < n ; i + + )'),
+    ('x -> x > 0', 'x - > x > 0'),
+    ('a << 2 >> 1', 'a < < 2 > > 1'),
+    ('Function<T, R> f = t -> t', 'Function [[ T , R ]] f = t - > t'),
+])
+def test_type_argument_brackets(code, expected):
+    assert marked(code) == expected
+
+def test_parse_members():
+    types = {t['name']: t for t in parse_members(SOURCE)}
+    assert list(types) == ['Outer', 'Outer.Color', 'Outer.I', 'Outer.Inner']
+    outer = types['Outer']
+    assert outer['package'] == 'a.b'
+    # Static fields are constants, not state
+    assert outer['fields'] == ['map', 'a', 'b', 'r']
+    assert [(m['name'], m['params'], m['constructor'], m['static']) for m in outer['methods']] == [
+        ('Outer', [], True, False), ('f', [], False, False), ('g', ['x'], False, False),
+    ]
+    assert types['Outer.Color']['fields'] == ['v']
+    # Interface fields are implicitly static
+    assert types['Outer.I']['fields'] == []
+    assert types['Outer.Inner']['fields'] == ['z']
+
+def test_parse_outline():
+    outlines = parse_outline(SOURCE)
+    assert [(o['kind'], o['name'], o['parent']) for o in outlines] == [
+        ('class', 'Outer', None), ('enum', 'Color', 'Outer'), ('interface', 'I', 'Outer'),
+        ('class', 'Inner', 'Outer'),
+    ]
+    assert outlines[0]['declaration'] == 'public class Outer<T extends Comparable<T>>'
+    assert outlines[0]['fields'][:2] == ['private Map<String, List<Integer>> map', 'int a, b']
+    assert outlines[1]['constants'] == ['RED', 'GREEN', 'BLUE']
@@ -0,0 +1,137 @@
+import numpy as np
+import pytest
+
+from lcom_engine import LCOM_COLUMNS, compute_lcom, lcom_metrics, type_metrics
+
+METRICS = ['LCOM1', 'LCOM2', 'LCOM3', 'LCOM4', 'LCOM5', 'YALCOM']
+
+# Small classes with their metrics worked out by hand. m is the number of
+# methods (constructors excluded), P/Q the method pairs without/with a
+# shared field, LCOM5 = (m - mean accessors per field) / (m - 1).
+CASES = [
+    (
+        # f{x} g{x,y} h{y} k{}: P=4 Q=2, components {f,g,h} {k},
+        # 2 accessors per field
+        'plain',
+        '''class A {
+            int x, y;
+            A() { x = 0; y = 0; }
+            int f() { return x; }
+            int g() { return x + y; }
+            int h() { return y; }
+            void k() { }
+        }''',
+        {'A': [4, 2, 2, 2, 2 / 3, 2 / 4]},
+    ),
+    (
+        # p{a} via "this.a" despite the parameter, q{} (local b shadows the
+        # field, calls use), use{}, r{b}: P=6 Q=0, the call joins q and use
+        'shadowing and calls',
+        '''class B {
+            private int a;
+            private int b;
+            void p(int a) { this.a = a; }
+            void q() { int b = 1; use(b); }
+            void use(int v) { System.out.println(v); }
+            int r() { return b; }
+        }''',
+        {'B': [6, 6, 4, 3, 1.0, 3 / 4]},
+    ),
+    (
+        # f{items} (the generic local "size" shadows the field), g{size}
+        # (a comparison, not a type), h{size} (a lambda arrow): P=2 Q=1
+        'generics',
+        '''class G<T extends Comparable<T>> {
+            private List<T> items = new ArrayList<>();
+            private int size;
+            boolean f(T t) { Map<String, List<T>> size = null; return items.add(t); }
+            boolean g(int i) { return i > size; }
+            Supplier<Integer> h() { return () -> size; }
+        }''',
+        {'G': [2, 1, 2, 2, 0.75, 2 / 3]},
+    ),
+    (
+        # Outer: inc{count}, listen{count} through the anonymous class body.
+        # Outer.Inner: get{v}, twice{} calls get.
+        'nested and anonymous',
+        '''package p;
+        public class Outer {
+            private int count;
+            void inc() { count++; }
+            void listen() { button.add(new Listener() { public void on() { count++; } }); }
+            static class Inner {
+                private int v;
+                int get() { return v; }
+                int twice() { return get() * 2; }
+            }
+        }''',
+        {'p.Outer': [0, 0, 1, 1, 0.0, 1 / 2], 'p.Outer.Inner': [1, 1, 2, 1, 1.0, 1 / 2]},
+    ),
+    (
+        # No instance fields: LCOM2 is 0 and YALCOM -1; every method is its
+        # own component
+        'field-less',
+        '''interface Shape { int SIDES = 0; double area(); double perimeter(); }
+        class Util {
+            static final int TWO = 2;
+            static int twice(int x) { return TWO * x; }
+            static int thrice(int x) { return 3 * x; }
+        }
+        class Empty { }''',
+        {'Shape': [1, 0, 2, 2, 2.0, -1.0], 'Util': [1, 0, 2, 2, 2.0, -1.0],
+         'Empty': [0, 0, 0, 0, 0.0, -1.0]},
+    ),
+]
+
+@pytest.mark.parametrize('source, expected', [case[1:] for case in CASES], ids=[case[0] for case in CASES])
+def test_type_metrics_by_hand(source, expected):
+    rows = {row['ClassName']: row for row in type_metrics(source)}
+    assert sorted(rows) == sorted(expected)
+    for class_name, values in expected.items():
+        assert [rows[class_name][metric] for metric in METRICS] == pytest.approx(values), class_name
+
+def brute_force(access, calls):
+    # Reference LCOM values straight from the definitions
+    m, a = access.shape
+    pairs = [(i, j) for i in range(m) for j in range(i + 1, m)]
+    shared = {(i, j) for i, j in pairs if (access[i] & access[j]).any()}
+    p, q = len(pairs) - len(shared), len(shared)
+
+    def components(linked):
+        parent = list(range(m))
+        def find(i):
+            while parent[i] != i:
+                i = parent[i]
+            return i
+        for i, j in linked:
+            parent[find(i)] = find(j)
+        return len({find(i) for i in range(m)})
+
+    called = {(i, j) for i, j in pairs if calls[i, j] or calls[j, i]}
+    lcom4 = components(shared | called)
+    mean = access.sum() / a if a else 0.0
+    return [p, max(p - q, 0) if a else 0, components(shared), lcom4,
+            (m - mean) / (m - 1) if m > 1 else 0.0, lcom4 / m if a and m else -1.0]
+
+@pytest.mark.parametrize('seed', range(50))
+def test_lcom_metrics_match_definitions(seed):
+    rng = np.random.default_rng(seed)
+    m, a = int(rng.integers(0, 12)), int(rng.integers(0, 6))
+    access = rng.random((m, a)) < rng.uniform(0.05, 0.5)
+    calls = rng.random((m, m)) < 0.1
+    result = lcom_metrics(access, calls)
+    assert [result[metric] for metric in METRICS] == pytest.approx(brute_force(access, calls))
+
+def test_compute_lcom_over_a_tree(tmp_path, monkeypatch):
+    # The source index cache goes to the working directory
+    monkeypatch.chdir(tmp_path)
+    for name, (_, source, _) in zip(('A', 'B', 'G'), CASES):
+        (tmp_path / f'{name}.java').write_text(source)
+    (tmp_path / 'nested').mkdir()
+    (tmp_path / 'nested' / 'Outer.java').write_text(CASES[3][1])
+    df = compute_lcom(str(tmp_path), project_name='demo', workers=1)
+    assert list(df.columns) == LCOM_COLUMNS
+    assert sorted(df['ClassName']) == ['A', 'B', 'G', 'p.Outer', 'p.Outer.Inner']
+    assert set(df['Project Name']) == {'demo'}
+    row = df.set_index('ClassName').loc['p.Outer.Inner']
+    assert (row['Package Name'], row['Type Name'], row['LCOM4']) == ('p', 'Outer.Inner', 1.0)
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+
+import lcom_store
+from lcom_store import load_metrics, lcom_trend, update_store
+
+TWO_FIELDS = 'class {name} {{ int x, y; int f() {{ return x; }} int g() {{ return y; }} }}'
+ONE_FIELD = 'class {name} {{ int x; int f() {{ return x; }} int g() {{ return x; }} }}'
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    # The source index cache goes to the working directory, kept out of src
+    monkeypatch.chdir(tmp_path)
+    src = tmp_path / 'src'
+    for path, source in [('main/A.java', TWO_FIELDS), ('test/A.java', TWO_FIELDS), ('main/B.java', ONE_FIELD)]:
+        (src / path).parent.mkdir(parents=True, exist_ok=True)
+        (src / path).write_text(source.format(name=os.path.basename(path)[:-5]))
+    return src
+
+def update(src):
+    return update_store(str(src), str(src.parent / 'lcom.sqlite'), project_name='demo', workers=1)
+
+def test_only_changed_files_are_measured(tree):
+    first = update(tree)
+    assert (first['files'], first['measured'], first['removed']) == (3, 3, 0)
+    assert update(tree)['measured'] == 0
+
+    # Same content with a new mtime is rehashed but not measured
+    path = tree / 'main' / 'B.java'
+    os.utime(path, ns=(1, 1))
+    assert update(tree)['measured'] == 0
+
+    (tree / 'main' / 'A.java').write_text(ONE_FIELD.format(name='A'))
+    (tree / 'main' / 'B.java').unlink()
+    summary = update(tree)
+    assert (summary['files'], summary['measured'], summary['removed']) == (2, 1, 1)
+    df = load_metrics(str(tree.parent / 'lcom.sqlite'))
+    assert sorted(df['ClassName']) == ['A', 'A']
+
+def test_classes_are_told_apart_by_file(tree):
+    update(tree)
+    # One of two classes named A changes; the other must not show up
+    (tree / 'test' / 'A.java').write_text(ONE_FIELD.format(name='A'))
+    update(tree)
+    trend = lcom_trend(str(tree.parent / 'lcom.sqlite'))
+    assert set(zip(trend['ClassName'], trend['Path'])) == {('A', os.path.join('test', 'A.java'))}
+    assert set(trend['Status']) == {'changed'}
+    assert trend['LCOM1 old'].tolist() == [1.0] and trend['LCOM1 new'].tolist() == [0.0]
+
+def test_reading_a_missing_store_creates_nothing(tmp_path, capsys):
+    store = tmp_path / 'missing.sqlite'
+    with pytest.raises(FileNotFoundError):
+        load_metrics(str(store))
+    with pytest.raises(FileNotFoundError):
+        lcom_trend(str(store))
+    assert lcom_store.main(['--store', str(store), 'trend']) == 1
+    assert 'Error:' in capsys.readouterr().out
+    assert not store.exists()
@@ -0,0 +1,124 @@
+import heapq
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lcom_stream import QuantileSketch, RunningTopK, iter_metric_chunks, stream_lcom_results
+
+QUANTILES = np.linspace(0.01, 0.99, 25)
+
+def samples(kind, n, rng):
+    if kind == 'uniform':
+        return rng.random(n)
+    if kind == 'lognormal':
+        return rng.lognormal(0.0, 2.0, n)
+    # Heavy ties, like integer LCOM1 values
+    return rng.integers(0, 50, n).astype(np.float64)
+
+def rank_error(sorted_values, value, q):
+    # How far q lies outside the rank interval of `value` (0 when inside)
+    n = len(sorted_values)
+    low = np.searchsorted(sorted_values, value, 'left') / n
+    high = np.searchsorted(sorted_values, value, 'right') / n
+    return max(0.0, low - q, q - high)
+
+def test_sketch_is_exact_before_compaction():
+    values = np.random.default_rng(0).random(150)
+    sketch = QuantileSketch(k=200)
+    sketch.update(values)
+    for q in QUANTILES:
+        assert sketch.quantile(q) == pytest.approx(np.quantile(values, q))
+
+@pytest.mark.parametrize('kind', ['uniform', 'lognormal', 'ties'])
+@pytest.mark.parametrize('seed', range(5))
+def test_sketch_rank_error_is_bounded(kind, seed):
+    rng = np.random.default_rng(seed)
+    values = samples(kind, 100_000, rng)
+    k = 200
+    sketch = QuantileSketch(k=k, seed=seed)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    ordered = np.sort(values)
+    # The KLL rank error is about 1/k; allow a few times that
+    for q in QUANTILES:
+        assert rank_error(ordered, sketch.quantile(q), q) <= 4.0 / k
+    # Memory stays O(k log n) and no weight is lost in compaction
+    assert sum(len(level) for level in sketch.levels) <= 3 * k
+    assert sum(len(level) * 2 ** h for h, level in enumerate(sketch.levels)) == len(values) == sketch.count
+
+def test_merged_sketches_keep_the_bound():
+    rng = np.random.default_rng(1)
+    parts = [samples('lognormal', 30_000, rng) for _ in range(3)]
+    merged = QuantileSketch(k=200, seed=1)
+    for i, part in enumerate(parts):
+        sketch = QuantileSketch(k=200, seed=i + 10)
+        sketch.update(part)
+        merged.merge(sketch)
+    ordered = np.sort(np.concatenate(parts))
+    assert merged.count == len(ordered)
+    for q in QUANTILES:
+        assert rank_error(ordered, merged.quantile(q), q) <= 4.0 / 200
+
+def test_sketch_ignores_nan_and_handles_empty_input():
+    sketch = QuantileSketch()
+    assert np.isnan(sketch.quantile(0.5))
+    sketch.update([np.nan, 1.0, np.nan, 3.0])
+    assert sketch.count == 2
+    assert sketch.quantile(0.5) == 2.0
+
+def chunks_of(frame, size):
+    # Chunks with global row numbers as index, like read_csv(chunksize=...)
+    return [frame.iloc[start:start + size] for start in range(0, len(frame), size)]
+
+@pytest.mark.parametrize('largest', [True, False])
+@pytest.mark.parametrize('seed', range(10))
+def test_running_top_k_matches_heapq(seed, largest):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(0, 500))
+    values = rng.integers(0, 20, n).astype(np.float64)
+    values[rng.random(n) < 0.05] = np.nan
+    frame = pd.DataFrame({'row': np.arange(n), 'LCOM1': values})
+    k = int(rng.integers(1, 30))
+
+    running = RunningTopK('LCOM1', k, largest=largest)
+    for chunk in chunks_of(frame, int(rng.integers(1, 60))):
+        running.update(chunk)
+    result = running.frame()
+
+    # heapq.nlargest/nsmallest are stable: ties keep the earliest row
+    rows = [(row, value) for row, value in enumerate(values.tolist()) if not np.isnan(value)]
+    pick = heapq.nlargest if largest else heapq.nsmallest
+    expected = pick(k, rows, key=lambda item: item[1])
+    assert result['row'].tolist() == [row for row, _ in expected]
+    assert result['LCOM1'].tolist() == [value for _, value in expected]
+    assert list(result.columns) == ['row', 'LCOM1']
+
+def test_metric_chunks_fall_back_to_type_names(tmp_path):
+    path = tmp_path / 'TypeMetrics.csv'
+    pd.DataFrame({'Type Name': ['A', 'B'], 'LCOM1': [1.0, 2.0]}).to_csv(path, index=False)
+    chunk = next(iter_metric_chunks(str(path)))
+    assert chunk['ClassName'].astype(str).tolist() == ['A', 'B']
+
+    pd.DataFrame({'LCOM1': [1.0, 2.0]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match='ClassName'):
+        next(iter_metric_chunks(str(path)))
+
+def test_stream_matches_in_memory_analysis(tmp_path):
+    rng = np.random.default_rng(4)
+    n = 5_000
+    frame = pd.DataFrame({
+        'Project Name': 'demo',
+        'Package Name': [f"org.p{i % 7}.sub" for i in range(n)],
+        'Type Name': [f"T{i}" for i in range(n)],
+        'LCOM1': rng.integers(0, 1000, n).astype(np.float64),
+        'LCOM5': rng.random(n),
+    })
+    path = tmp_path / 'TypeMetrics.csv'
+    frame.to_csv(path, index=False)
+    summary = stream_lcom_results(str(path), str(tmp_path / 'out'), chunk_rows=700, top=10)
+    assert summary['rows'] == n
+    expected = frame.nlargest(10, 'LCOM1')
+    assert summary['top']['LCOM1']['Type Name'].astype(str).tolist() == expected['Type Name'].tolist()
+    ordered = np.sort(frame['LCOM1'].to_numpy())
+    assert rank_error(ordered, summary['thresholds']['LCOM1'], 0.9) <= 4.0 / 200
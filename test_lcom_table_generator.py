@@ -0,0 +1,74 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from tabulate import tabulate
+
+import lcom_table_generator
+from lcom_table_generator import default_report_path, read_report_manifest, write_lcom_table, write_pipe_table
+
+def random_cell(rng, kind):
+    if kind == 'int':
+        return int(rng.integers(-5000, 5000))
+    if kind == 'float':
+        return float(rng.choice([rng.normal(0, 100), rng.integers(0, 10), rng.random() / 1000, 1e7 * rng.random()]))
+    words = ['Foo', 'com.example.Bar', 'x', '', 'public void run() {', '    return 1;', '}']
+    text = '\n'.join(rng.choice(words, int(rng.integers(1, 4))).tolist())
+    # Blank report cells are empty strings (tabulate would take a lone
+    # '\n' for a number)
+    return text if text.strip() else ''
+
+@pytest.mark.parametrize('seed', range(60))
+def test_pipe_table_matches_tabulate(seed):
+    rng = np.random.default_rng(seed)
+    kinds = rng.choice(['int', 'float', 'str', 'mixed'], int(rng.integers(1, 6))).tolist()
+    headers = [f"Column {c}" if rng.random() < 0.5 else f"C{c}" for c in range(len(kinds))]
+    rows = []
+    for _ in range(int(rng.integers(1, 12))):
+        rows.append([random_cell(rng, rng.choice(['int', 'float']) if kind == 'mixed' else kind) for kind in kinds])
+
+    out = io.StringIO()
+    write_pipe_table(out, headers, lambda: iter(rows))
+    assert out.getvalue() == tabulate(rows, headers=headers, tablefmt='pipe')
+
+def test_default_report_path():
+    assert default_report_path(os.path.join('out', 'proj.a_results.csv')) == \
+        os.path.join('out', 'proj.a_results_lcom_table.md')
+
+def test_read_report_manifest(tmp_path):
+    manifest = tmp_path / 'reports.csv'
+    manifest.write_text(
+        '# results, src_root, output\n'
+        '\n'
+        'a.csv, src/a\n'
+        '"b, c.csv", src/b, "out/b, report.md"\n'
+    )
+    assert read_report_manifest(str(manifest)) == [
+        (str(tmp_path / 'a.csv'), str(tmp_path / 'src/a'), str(tmp_path / 'a_lcom_table.md')),
+        (str(tmp_path / 'b, c.csv'), str(tmp_path / 'src/b'), str(tmp_path / 'out/b, report.md')),
+    ]
+
+@pytest.mark.parametrize('text, message', [
+    ('a.csv\n', ':1: expected'),
+    ('a.csv, src, out.md, extra\n', ':1: expected'),
+    ('a.csv, src\nx/../a_lcom_table.md.csv, src, a_lcom_table.md\n', ':2: report .* also written by line 1'),
+])
+def test_read_report_manifest_rejects_bad_rows(tmp_path, text, message):
+    manifest = tmp_path / 'reports.csv'
+    manifest.write_text(text)
+    with pytest.raises(ValueError, match=message):
+        read_report_manifest(str(manifest))
+
+def _failing_report(out, *args):
+    out.write('| partial')
+    raise RuntimeError('source tree vanished')
+
+def test_failed_report_leaves_the_previous_one(tmp_path, monkeypatch):
+    output = tmp_path / 'report.md'
+    output.write_text('previous report\n')
+    monkeypatch.setattr(lcom_table_generator, 'write_lcom_report', _failing_report)
+    with pytest.raises(RuntimeError):
+        write_lcom_table(None, str(tmp_path), str(output))
+    assert output.read_text() == 'previous report\n'
+    assert os.listdir(tmp_path) == ['report.md']